@@ -1,4 +1,7 @@
 """A tool for linking two DataJoint tables located on different database servers."""
+from .infrastructure.daemon import SyncDaemon
 from .infrastructure.link import create_link as link
+from .infrastructure.link import create_schema_link as link_schema
+from .infrastructure.scheduling import pull_tables
 
-__all__ = ["link"]
+__all__ = ["link", "link_schema", "pull_tables", "SyncDaemon"]
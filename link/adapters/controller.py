@@ -24,8 +24,15 @@ class DJController:
 
     def pull(self, primary_keys: Iterable[PrimaryKey]) -> None:
         """Execute the pull use-case."""
-        self._message_bus.handle(commands.PullEntities(frozenset(self._translator.to_identifiers(primary_keys))))
+        with self._translator.scope():
+            self._message_bus.handle(commands.PullEntities(frozenset(self._translator.to_identifiers(primary_keys))))
 
     def delete(self, primary_keys: Iterable[PrimaryKey]) -> None:
         """Execute the delete use-case."""
-        self._message_bus.handle(commands.DeleteEntities(frozenset(self._translator.to_identifiers(primary_keys))))
+        with self._translator.scope():
+            self._message_bus.handle(commands.DeleteEntities(frozenset(self._translator.to_identifiers(primary_keys))))
+
+    def reserve(self, primary_keys: Iterable[PrimaryKey]) -> None:
+        """Execute the reserve use-case."""
+        with self._translator.scope():
+            self._message_bus.handle(commands.ReserveEntities(frozenset(self._translator.to_identifiers(primary_keys))))
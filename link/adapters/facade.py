@@ -14,16 +14,11 @@ class DJLinkFacade(ABC):
     """A facade around a link that is persisted using DataJoint."""
 
     @abstractmethod
-    def get_assignment(self, primary_key: PrimaryKey) -> DJAssignment:
-        """Get the assignment of the entity with the given primary key to components."""
+    def get_persistent_states(self, primary_keys: Iterable[PrimaryKey]) -> list[DJPersistentState]:
+        """Get the persistent states of the entities with the given primary keys.
 
-    @abstractmethod
-    def get_condition(self, primary_key: PrimaryKey) -> DJCondition:
-        """Get the condition of the entity with the given primary key."""
-
-    @abstractmethod
-    def get_process(self, primary_key: PrimaryKey) -> DJProcess:
-        """Get the process of the entity with the given primary key."""
+        The states are returned in the same order as the given primary keys.
+        """
 
     @abstractmethod
     def add_to_local(self, primary_keys: Iterable[PrimaryKey]) -> None:
@@ -35,7 +30,10 @@ class DJLinkFacade(ABC):
 
     @abstractmethod
     def start_pull_process(self, primary_keys: Iterable[PrimaryKey]) -> None:
-        """Start the pull process for the entities identified by the given primary keys."""
+        """Start the pull process for the entities identified by the given primary keys.
+
+        Entities whose pull process was started concurrently (e.g. by another worker) are skipped.
+        """
 
     @abstractmethod
     def finish_pull_process(self, primary_keys: Iterable[PrimaryKey]) -> None:
@@ -58,35 +56,12 @@ ProcessType = Literal["PULL", "DELETE", "NONE"]
 
 
 @dataclass(frozen=True)
-class DJProcess:
-    """An association between an entity's primary key and its process."""
-
-    primary_key: PrimaryKey
-    current_process: ProcessType
-
-
-@dataclass(frozen=True)
-class DJAssignments:
-    """The assignments of primary keys to the different components."""
-
-    source: list[PrimaryKey]
-    outbound: list[PrimaryKey]
-    local: list[PrimaryKey]
-
-
-@dataclass(frozen=True)
-class DJAssignment:
-    """The presence of a specific entity in the three different tables that make up its link."""
-
-    primary_key: PrimaryKey
-    source: bool
-    outbound: bool
-    local: bool
-
-
-@dataclass(frozen=True)
-class DJCondition:
-    """The condition of a specific entity."""
+class DJPersistentState:
+    """The persistent state of a specific entity."""
 
     primary_key: PrimaryKey
+    in_source: bool
+    in_outbound: bool
+    in_local: bool
     is_flagged: bool
+    current_process: ProcessType
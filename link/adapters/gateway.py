@@ -24,23 +24,35 @@ class DJLinkGateway(LinkGateway):
 
     def create_entity(self, identifier: Identifier) -> Entity:
         """Create a entity instance from persistent data."""
-        dj_assignment = self.facade.get_assignment(self.translator.to_primary_key(identifier))
-        components = []
-        if dj_assignment.source:
-            components.append(Components.SOURCE)
-        if dj_assignment.outbound:
-            components.append(Components.OUTBOUND)
-        if dj_assignment.local:
-            components.append(Components.LOCAL)
-        dj_condition = self.facade.get_condition(self.translator.to_primary_key(identifier))
+        return self._create_entities([identifier])[0]
+
+    def create_entities(self, identifiers: Iterable[Identifier]) -> list[Entity]:
+        """Create entity instances from persistent data."""
+        return self._create_entities(identifiers)
+
+    def _create_entities(self, identifiers: Iterable[Identifier]) -> list[Entity]:
+        identifiers = list(identifiers)
         persisted_to_domain_process_map = {"PULL": Processes.PULL, "DELETE": Processes.DELETE, "NONE": Processes.NONE}
-        dj_process = self.facade.get_process(self.translator.to_primary_key(identifier))
-        return create_entity(
-            identifier,
-            components=components,
-            is_tainted=dj_condition.is_flagged,
-            process=persisted_to_domain_process_map[dj_process.current_process],
-        )
+        entities = []
+        for identifier, dj_state in zip(
+            identifiers, self.facade.get_persistent_states(self.translator.to_primary_keys(identifiers))
+        ):
+            components = []
+            if dj_state.in_source:
+                components.append(Components.SOURCE)
+            if dj_state.in_outbound:
+                components.append(Components.OUTBOUND)
+            if dj_state.in_local:
+                components.append(Components.LOCAL)
+            entities.append(
+                create_entity(
+                    identifier,
+                    components=components,
+                    is_tainted=dj_state.is_flagged,
+                    process=persisted_to_domain_process_map[dj_state.current_process],
+                )
+            )
+        return entities
 
     def apply(self, updates: Iterable[events.StateChanged]) -> None:
         """Apply updates to the persistent data representing the link."""
@@ -51,18 +63,21 @@ class DJLinkGateway(LinkGateway):
 
         transition_updates = (update for update in updates if update.command)
         for command_value, command_updates in groupby(sorted(transition_updates, key=keyfunc), key=keyfunc):
-            primary_keys = (self.translator.to_primary_key(update.identifier) for update in command_updates)
-            if Commands(command_value) is Commands.ADD_TO_LOCAL:
-                self.facade.add_to_local(primary_keys)
-            if Commands(command_value) is Commands.REMOVE_FROM_LOCAL:
-                self.facade.remove_from_local(primary_keys)
-            if Commands(command_value) is Commands.START_PULL_PROCESS:
-                self.facade.start_pull_process(primary_keys)
-            if Commands(command_value) is Commands.FINISH_PULL_PROCESS:
-                self.facade.finish_pull_process(primary_keys)
-            if Commands(command_value) is Commands.DEPRECATE:
-                self.facade.deprecate(primary_keys)
-            if Commands(command_value) is Commands.START_DELETE_PROCESS:
-                self.facade.start_delete_process(primary_keys)
-            if Commands(command_value) is Commands.FINISH_DELETE_PROCESS:
-                self.facade.finish_delete_process(primary_keys)
+            self._execute(Commands(command_value), (update.identifier for update in command_updates))
+
+    def _execute(self, command: Commands, identifiers: Iterable[Identifier]) -> None:
+        primary_keys = self.translator.to_primary_keys(identifiers)
+        if command is Commands.ADD_TO_LOCAL:
+            self.facade.add_to_local(primary_keys)
+        if command is Commands.REMOVE_FROM_LOCAL:
+            self.facade.remove_from_local(primary_keys)
+        if command is Commands.START_PULL_PROCESS:
+            self.facade.start_pull_process(primary_keys)
+        if command is Commands.FINISH_PULL_PROCESS:
+            self.facade.finish_pull_process(primary_keys)
+        if command is Commands.DEPRECATE:
+            self.facade.deprecate(primary_keys)
+        if command is Commands.START_DELETE_PROCESS:
+            self.facade.start_delete_process(primary_keys)
+        if command is Commands.FINISH_DELETE_PROCESS:
+            self.facade.finish_delete_process(primary_keys)
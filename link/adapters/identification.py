@@ -1,28 +1,114 @@
 """Contains code used to translate between DataJoint primary keys and identifiers."""
 from __future__ import annotations
 
-from collections.abc import Iterable
-from typing import Union
-from uuid import uuid4
+import hashlib
+from array import array
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from decimal import Decimal
+from numbers import Integral, Real
+from typing import Any, Optional, Tuple
 
 from link.domain.custom_types import Identifier
 
 from .custom_types import PrimaryKey
 
+Attributes = Tuple[str, ...]
+
+
+class IdentifierCollision(Exception):
+    """Raised when two different primary keys are derived to the same identifier."""
+
+
+def canonicalize(primary_key: PrimaryKey) -> str:
+    """Return a canonical representation of the given primary key.
+
+    The representation does not depend on the order of the attributes and numbers are represented the same regardless
+    of their type (e.g. 5, 5.0, Decimal("5.00") and numpy.int64(5)): integral values as integers and all other values
+    in their shortest fixed-point notation (e.g. 0.5 and Decimal("0.50") as 0.5). Each value is tagged with its
+    kind and every attribute name and value is prefixed with its length such that different primary keys never share
+    a representation (e.g. {"a": "1"} and {"a": 1}).
+    """
+
+    def encode(value: Any) -> str:
+        if isinstance(value, Integral):
+            return f"i{int(value)}"
+        if isinstance(value, (Real, Decimal)):
+            number = value if isinstance(value, Decimal) else Decimal(repr(float(value)))
+            if number.is_finite() and number == number.to_integral_value():
+                return f"i{int(number)}"
+            return f"f{number.normalize():f}"
+        if isinstance(value, str):
+            return f"s{value}"
+        return f"{type(value).__name__}:{value}"
+
+    parts = (part for attr in sorted(primary_key) for part in (attr, encode(primary_key[attr])))
+    return "".join(f"{len(part)}:{part}" for part in parts)
+
+
+def derive_identifier(primary_key: PrimaryKey) -> Identifier:
+    """Derive the identifier of the given primary key from its canonical representation.
+
+    The identifier only depends on the contents of the primary key and is therefore the same in every process.
+    """
+    digest = hashlib.blake2b(canonicalize(primary_key).encode(), digest_size=8).digest()
+    return Identifier(int.from_bytes(digest, "big") >> 1)
+
 
 class IdentificationTranslator:
-    """Translates between DataJoint-specific primary keys and domain-model-specific identifiers."""
+    """Translates between DataJoint-specific primary keys and domain-model-specific identifiers.
+
+    Identifiers are derived from the contents of the primary keys (see derive_identifier). Primary keys are stored
+    column-wise: one list of values per attribute indexed by row and a compact array recording which attributes make
+    up the primary key in each row. The translator only needs to remember primary keys to translate identifiers back.
 
-    def __init__(self) -> None:
+    If max_size is given the translator forgets all but the max_size most recently used primary keys whenever the
+    outermost scope exits without an error. Identifiers of forgotten primary keys can not be translated back until
+    the primary key is translated again, so they must not be used outside of the scope they were handed out in. A
+    max_size of zero forgets all keys after each scope.
+    """
+
+    def __init__(self, max_size: Optional[int] = None) -> None:
         """Initialize the translator."""
-        self._key_to_identifier: dict[tuple[tuple[str, Union[str, int, float]], ...], Identifier] = {}
-        self._identifier_to_key: dict[Identifier, tuple[tuple[str, Union[str, int, float]], ...]] = {}
+        if max_size is not None and max_size < 0:
+            raise ValueError("max_size must be a non-negative integer")
+        self._max_size = max_size
+        self._depth = 0
+        self._clock = 0
+        self._clear()
+
+    def __len__(self) -> int:
+        """Return the number of primary keys known to the translator."""
+        return len(self._signature_of)
+
+    @contextmanager
+    def scope(self) -> Iterator[None]:
+        """Return a context within which handed out identifiers stay valid."""
+        self._depth += 1
+        try:
+            yield
+        except BaseException:
+            self._depth -= 1
+            raise
+        self._depth -= 1
+        if self._depth == 0 and self._max_size is not None and len(self) > self._max_size:
+            self._evict(self._max_size)
 
     def to_identifier(self, primary_key: PrimaryKey) -> Identifier:
-        """Translate the given primary key to its corresponding identifier."""
-        primary_key_tuple = tuple((k, v) for k, v in primary_key.items())
-        identifier = self._key_to_identifier.setdefault(primary_key_tuple, Identifier(uuid4()))
-        self._identifier_to_key[identifier] = primary_key_tuple
+        """Translate the given primary key to its corresponding identifier.
+
+        Raises IdentifierCollision if a different primary key known to the translator has the same identifier.
+        """
+        identifier = derive_identifier(primary_key)
+        row = self._rows.get(identifier)
+        if row is None:
+            self._add_primary_key(identifier, primary_key)
+            return identifier
+        known = self._get_row(row)
+        if known != primary_key:
+            raise IdentifierCollision(f"Primary keys {known} and {primary_key} have the same identifier {identifier}")
+        if self._max_size is not None:
+            self._last_used[row] = self._tick()
         return identifier
 
     def to_identifiers(self, primary_keys: Iterable[PrimaryKey]) -> set[Identifier]:
@@ -31,4 +117,58 @@ class IdentificationTranslator:
 
     def to_primary_key(self, identifier: Identifier) -> PrimaryKey:
         """Translate the given identifier to its corresponding primary key."""
-        return dict(self._identifier_to_key[identifier])
+        return self._get_row(self._rows[identifier])
+
+    def to_primary_keys(self, identifiers: Iterable[Identifier]) -> list[PrimaryKey]:
+        """Translate multiple identifiers to their corresponding primary keys preserving their order."""
+        rows = [self._rows[identifier] for identifier in identifiers]
+        if len(self._signatures) != 1:
+            return [self._get_row(row) for row in rows]
+        attrs = self._signatures[0]
+        columns = ([self._columns[attr][row] for row in rows] for attr in attrs)
+        return [dict(zip(attrs, values)) for values in zip(*columns)]
+
+    def _get_row(self, row: int) -> PrimaryKey:
+        return {attr: self._columns[attr][row] for attr in self._signatures[self._signature_of[row]]}
+
+    def _tick(self) -> int:
+        self._clock += 1
+        return self._clock
+
+    def _clear(self) -> None:
+        self._rows: dict[Identifier, int] = {}
+        self._identifiers = array("q")
+        self._signatures: list[Attributes] = []
+        self._signature_indexes: dict[Attributes, int] = {}
+        self._signature_of = array("H")
+        self._last_used = array("Q")
+        self._columns: dict[str, list[Any]] = {}
+
+    def _evict(self, n_kept: int) -> None:
+        """Forget all but the n_kept most recently used primary keys."""
+        rows = sorted(range(len(self)), key=self._last_used.__getitem__)[len(self) - n_kept :]
+        kept = [(Identifier(self._identifiers[row]), self._get_row(row)) for row in rows]
+        self._clear()
+        for identifier, primary_key in kept:
+            self._add_primary_key(identifier, primary_key)
+
+    def _add_signature(self, signature: Attributes) -> int:
+        self._signature_indexes[signature] = len(self._signatures)
+        self._signatures.append(signature)
+        for attr in signature:
+            self._columns.setdefault(attr, [None] * len(self))
+        return self._signature_indexes[signature]
+
+    def _add_primary_key(self, identifier: Identifier, primary_key: PrimaryKey) -> None:
+        signature = tuple(primary_key)
+        try:
+            signature_index = self._signature_indexes[signature]
+        except KeyError:
+            signature_index = self._add_signature(signature)
+        self._rows[identifier] = len(self)
+        self._identifiers.append(identifier)
+        self._signature_of.append(signature_index)
+        if self._max_size is not None:
+            self._last_used.append(self._tick())
+        for attr, column in self._columns.items():
+            column.append(primary_key.get(attr))
@@ -0,0 +1,104 @@
+"""Contains a column-oriented representation of many entities."""
+from __future__ import annotations
+
+from array import array
+from collections import deque
+from collections.abc import Iterable, Sequence
+
+from .custom_types import Identifier
+from .events import InvalidOperationRequested, OperationApplied, StateChanged
+from .state import (
+    DELETE_PATHS,
+    PROCESSES,
+    PULL_PATHS,
+    START_PULL_PATHS,
+    STATES,
+    Entity,
+    Path,
+    Processes,
+    State,
+)
+
+
+class EntityBatch:
+    """A batch of entities whose states, processes and taints are stored in compact integer arrays.
+
+    Pulling and deleting the batch is equivalent to pulling and deleting each entity individually, but looks the
+    outcome of each entity up in the precompiled paths of the state machine instead of applying one operation after
+    another. The events of the entities are recorded in the order in which the entities would have emitted them.
+    """
+
+    def __init__(
+        self,
+        identifiers: Sequence[Identifier],
+        states: Iterable[type[State]],
+        processes: Iterable[Processes],
+        is_tainted: Iterable[bool],
+    ) -> None:
+        """Initialize the batch."""
+        self.identifiers = list(identifiers)
+        self._states = array("B", (STATES.index(state) for state in states))
+        self._processes = array("B", (PROCESSES.index(process) for process in processes))
+        self._is_tainted = array("B", is_tainted)
+        self.events: deque[OperationApplied] = deque()
+        assert len(self.identifiers) == len(self._states) == len(self._processes) == len(self._is_tainted)
+
+    @classmethod
+    def from_entities(cls, entities: Iterable[Entity]) -> EntityBatch:
+        """Create a batch from individual entities."""
+        entities = list(entities)
+        return cls(
+            [entity.identifier for entity in entities],
+            (entity.state for entity in entities),
+            (entity.current_process for entity in entities),
+            (entity.is_tainted for entity in entities),
+        )
+
+    @property
+    def states(self) -> list[type[State]]:
+        """Return the states of the entities in the batch."""
+        return [STATES[state] for state in self._states]
+
+    @property
+    def processes(self) -> list[Processes]:
+        """Return the processes of the entities in the batch."""
+        return [PROCESSES[process] for process in self._processes]
+
+    @property
+    def is_tainted(self) -> list[bool]:
+        """Return whether the entities in the batch are tainted."""
+        return [bool(is_tainted) for is_tainted in self._is_tainted]
+
+    def pull(self) -> None:
+        """Pull all entities in the batch."""
+        self._apply(PULL_PATHS)
+
+    def delete(self) -> None:
+        """Delete all entities in the batch."""
+        self._apply(DELETE_PATHS)
+
+    def start_pull(self) -> None:
+        """Start pulling all entities in the batch without finishing their pull processes."""
+        self._apply(START_PULL_PATHS)
+
+    def _apply(self, paths: dict[int, Path]) -> None:
+        n_processes = len(PROCESSES)
+        outcomes: dict[int, tuple[Path, int, int]] = {}
+        for index, identifier in enumerate(self.identifiers):
+            code = (self._states[index] * n_processes + self._processes[index]) * 2 + self._is_tainted[index]
+            try:
+                path, state, process = outcomes[code]
+            except KeyError:
+                path = paths[code]
+                state, process = STATES.index(path.state), PROCESSES.index(path.process)
+                outcomes[code] = path, state, process
+            for step in path.steps:
+                if step.transition is None:
+                    self.events.append(InvalidOperationRequested(step.operation, identifier, step.state))
+                else:
+                    transition = step.transition
+                    self.events.append(
+                        StateChanged(step.operation, identifier, transition.transition, transition.command)
+                    )
+            self._states[index] = state
+            self._processes[index] = process
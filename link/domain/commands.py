@@ -40,3 +40,8 @@ class PullEntities(BatchCommand):
 @dataclass(frozen=True)
 class DeleteEntities(BatchCommand):
     """Delete the requested entities."""
+
+
+@dataclass(frozen=True)
+class ReserveEntities(BatchCommand):
+    """Start the pull processes of the requested entities without finishing them."""
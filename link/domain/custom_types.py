@@ -1,5 +1,4 @@
 """Contains custom types."""
 from typing import NewType
-from uuid import UUID
 
-Identifier = NewType("Identifier", UUID)
+Identifier = NewType("Identifier", int)
@@ -4,7 +4,7 @@ from __future__ import annotations
 from collections import deque
 from dataclasses import dataclass
 from enum import Enum, auto
-from functools import partial
+from typing import NamedTuple
 
 from .custom_types import Identifier
 from .events import InvalidOperationRequested, OperationApplied, StateChanged
@@ -13,38 +13,6 @@ from .events import InvalidOperationRequested, OperationApplied, StateChanged
 class State:
     """An entity's state."""
 
-    @classmethod
-    def start_pull(cls, entity: Entity) -> None:
-        """Return the command needed to start the pull process for the entity."""
-        return cls._create_invalid_operation(entity, Operations.START_PULL)
-
-    @classmethod
-    def start_delete(cls, entity: Entity) -> None:
-        """Return the commands needed to start the delete process for the entity."""
-        return cls._create_invalid_operation(entity, Operations.START_DELETE)
-
-    @classmethod
-    def process(cls, entity: Entity) -> None:
-        """Return the commands needed to process the entity."""
-        return cls._create_invalid_operation(entity, Operations.PROCESS)
-
-    @staticmethod
-    def _create_invalid_operation(entity: Entity, operation: Operations) -> None:
-        entity.events.append(InvalidOperationRequested(operation, entity.identifier, entity.state))
-
-    @classmethod
-    def _transition_entity(
-        cls, entity: Entity, operation: Operations, new_state: type[State], *, new_process: Processes | None = None
-    ) -> None:
-        if new_process is None:
-            new_process = entity.current_process
-        transition = Transition(cls, new_state)
-        entity.state = transition.new
-        entity.current_process = new_process
-        entity.events.append(
-            StateChanged(operation, entity.identifier, transition, TRANSITION_MAP[transition]),
-        )
-
 
 class States:
     """A namespace containing all states."""
@@ -68,11 +36,6 @@ states = States()
 class Unshared(State):
     """The default state of an entity."""
 
-    @classmethod
-    def start_pull(cls, entity: Entity) -> None:
-        """Return the command needed to start the pull process for an entity."""
-        return cls._transition_entity(entity, Operations.START_PULL, Activated, new_process=Processes.PULL)
-
 
 states.register(Unshared)
 
@@ -80,18 +43,6 @@ states.register(Unshared)
 class Activated(State):
     """The state of an activated entity."""
 
-    @classmethod
-    def process(cls, entity: Entity) -> None:
-        """Return the commands needed to process an activated entity."""
-        transition_entity = partial(cls._transition_entity, entity, Operations.PROCESS)
-        if entity.is_tainted:
-            return transition_entity(Deprecated, new_process=Processes.NONE)
-        elif entity.current_process is Processes.PULL:
-            return transition_entity(Received)
-        elif entity.current_process is Processes.DELETE:
-            return transition_entity(Unshared, new_process=Processes.NONE)
-        raise RuntimeError
-
 
 states.register(Activated)
 
@@ -99,19 +50,6 @@ states.register(Activated)
 class Received(State):
     """The state of an received entity."""
 
-    @classmethod
-    def process(cls, entity: Entity) -> None:
-        """Return the commands needed to process a received entity."""
-        transition_entity = partial(cls._transition_entity, entity, Operations.PROCESS)
-        if entity.current_process is Processes.PULL:
-            if entity.is_tainted:
-                return transition_entity(Tainted, new_process=Processes.NONE)
-            else:
-                return transition_entity(Shared, new_process=Processes.NONE)
-        elif entity.current_process is Processes.DELETE:
-            return transition_entity(Activated)
-        raise RuntimeError
-
 
 states.register(Received)
 
@@ -119,11 +57,6 @@ states.register(Received)
 class Shared(State):
     """The state of an entity that has been copied to the local side."""
 
-    @classmethod
-    def start_delete(cls, entity: Entity) -> None:
-        """Return the commands needed to start the delete process for the entity."""
-        return cls._transition_entity(entity, Operations.START_DELETE, Received, new_process=Processes.DELETE)
-
 
 states.register(Shared)
 
@@ -131,11 +64,6 @@ states.register(Shared)
 class Tainted(State):
     """The state of an entity that has been flagged as faulty by the source side."""
 
-    @classmethod
-    def start_delete(cls, entity: Entity) -> None:
-        """Return the commands needed to start the delete process for the entity."""
-        return cls._transition_entity(entity, Operations.START_DELETE, Received, new_process=Processes.DELETE)
-
 
 states.register(Tainted)
 
@@ -261,6 +189,154 @@ STATE_MAP = {
 }
 
 
+class _Rule(NamedTuple):
+    state: type[State]
+    operation: Operations
+    process: Processes | None
+    is_tainted: bool | None
+    new_state: type[State]
+    new_process: Processes
+
+
+_RULES = (
+    _Rule(Unshared, Operations.START_PULL, None, None, Activated, Processes.PULL),
+    _Rule(Activated, Operations.PROCESS, None, True, Deprecated, Processes.NONE),
+    _Rule(Activated, Operations.PROCESS, Processes.PULL, False, Received, Processes.PULL),
+    _Rule(Activated, Operations.PROCESS, Processes.DELETE, False, Unshared, Processes.NONE),
+    _Rule(Received, Operations.PROCESS, Processes.PULL, False, Shared, Processes.NONE),
+    _Rule(Received, Operations.PROCESS, Processes.PULL, True, Tainted, Processes.NONE),
+    _Rule(Received, Operations.PROCESS, Processes.DELETE, None, Activated, Processes.DELETE),
+    _Rule(Shared, Operations.START_DELETE, None, None, Received, Processes.DELETE),
+    _Rule(Tainted, Operations.START_DELETE, None, None, Received, Processes.DELETE),
+)
+"""The rules of the state machine. A process or taint of None matches any value. Unmatched operations are invalid."""
+
+
+def _match_rule(state: type[State], operation: Operations, process: Processes, is_tainted: bool) -> _Rule | None:
+    for rule in _RULES:
+        if (
+            rule.state is state
+            and rule.operation is operation
+            and rule.process in (None, process)
+            and rule.is_tainted in (None, is_tainted)
+        ):
+            return rule
+    return None
+
+
+STATES: tuple[type[State], ...] = (Unshared, Activated, Received, Shared, Tainted, Deprecated)
+OPERATIONS: tuple[Operations, ...] = tuple(Operations)
+PROCESSES: tuple[Processes, ...] = tuple(Processes)
+_STATE_INDEXES = {state: index for index, state in enumerate(STATES)}
+_PROCESS_INDEXES = {process: index for index, process in enumerate(PROCESSES)}
+_STATE_OFFSETS = {state: index * len(OPERATIONS) * len(PROCESSES) * 2 for state, index in _STATE_INDEXES.items()}
+_OPERATION_OFFSETS = {operation: index * len(PROCESSES) * 2 for index, operation in enumerate(OPERATIONS)}
+_PROCESS_OFFSETS = {process: index * 2 for process, index in _PROCESS_INDEXES.items()}
+
+
+def encode(state: type[State], process: Processes, is_tainted: bool) -> int:
+    """Encode the state, process and taint of an entity into a single integer."""
+    return (_STATE_INDEXES[state] * len(PROCESSES) + _PROCESS_INDEXES[process]) * 2 + is_tainted
+
+
+class CompiledTransition(NamedTuple):
+    """A transition together with the process the entity has afterwards and the command persisting it."""
+
+    transition: Transition
+    process: Processes
+    command: Commands
+
+
+def _compile_transitions() -> list[CompiledTransition | None]:
+    table: list[CompiledTransition | None] = []
+    for state in STATES:
+        for operation in OPERATIONS:
+            for process in PROCESSES:
+                for is_tainted in (False, True):
+                    rule = _match_rule(state, operation, process, is_tainted)
+                    if rule is None:
+                        table.append(None)
+                        continue
+                    transition = Transition(state, rule.new_state)
+                    table.append(CompiledTransition(transition, rule.new_process, TRANSITION_MAP[transition]))
+    return table
+
+
+TRANSITION_TABLE = _compile_transitions()
+"""Transitions indexed by state, operation, process and taint. Invalid operations are represented by None."""
+
+
+def lookup_transition(
+    state: type[State], operation: Operations, process: Processes, is_tainted: bool
+) -> CompiledTransition | None:
+    """Return the transition resulting from applying the operation to an entity or None if it is invalid."""
+    return TRANSITION_TABLE[
+        _STATE_OFFSETS[state] + _OPERATION_OFFSETS[operation] + _PROCESS_OFFSETS[process] + is_tainted
+    ]
+
+
+class Step(NamedTuple):
+    """An operation applied to an entity in a given state and the resulting transition (None if it is invalid)."""
+
+    operation: Operations
+    state: type[State]
+    transition: CompiledTransition | None
+
+
+class Path(NamedTuple):
+    """The operations applied to an entity by a high-level action and their outcome."""
+
+    operations: tuple[Operations, ...]
+    commands: tuple[Commands, ...]
+    steps: tuple[Step, ...]
+    state: type[State]
+    process: Processes
+
+
+def _compile_path(
+    state: type[State], process: Processes, is_tainted: bool, start: Operations, *, finish: bool = True
+) -> Path:
+    steps: list[Step] = []
+
+    def apply(operation: Operations) -> None:
+        nonlocal state, process
+        compiled = lookup_transition(state, operation, process, is_tainted)
+        steps.append(Step(operation, state, compiled))
+        if compiled is not None:
+            state, process = compiled.transition.new, compiled.process
+
+    def finish_process() -> None:
+        while finish and process is not Processes.NONE:
+            apply(Operations.PROCESS)
+
+    finish_process()
+    apply(start)
+    finish_process()
+    operations = tuple(step.operation for step in steps)
+    commands = tuple(step.transition.command for step in steps if step.transition is not None)
+    return Path(operations, commands, tuple(steps), state, process)
+
+
+def _compile_paths(start: Operations, *, finish: bool = True) -> dict[int, Path]:
+    paths = {}
+    for persistent_state, state in STATE_MAP.items():
+        processes = [Processes.PULL, Processes.DELETE] if persistent_state.has_process else [Processes.NONE]
+        for process in processes:
+            code = encode(state, process, persistent_state.is_tainted)
+            paths[code] = _compile_path(state, process, persistent_state.is_tainted, start, finish=finish)
+    return paths
+
+
+PULL_PATHS = _compile_paths(Operations.START_PULL)
+"""The result of pulling an entity indexed by the encoded state, process and taint of the entity."""
+
+DELETE_PATHS = _compile_paths(Operations.START_DELETE)
+"""The result of deleting an entity indexed by the encoded state, process and taint of the entity."""
+
+START_PULL_PATHS = _compile_paths(Operations.START_PULL, finish=False)
+"""The result of starting to pull an entity indexed by the encoded state, process and taint of the entity."""
+
+
 @dataclass
 class Entity:
     """An entity in a link."""
@@ -273,40 +349,28 @@ class Entity:
 
     def pull(self) -> None:
         """Pull the entity."""
-        self._finish_process()
-        self.apply(Operations.START_PULL)
-        self._finish_process()
+        for operation in PULL_PATHS[encode(self.state, self.current_process, self.is_tainted)].operations:
+            self.apply(operation)
 
     def delete(self) -> None:
         """Delete the entity."""
-        self._finish_process()
-        self.apply(Operations.START_DELETE)
-        self._finish_process()
+        for operation in DELETE_PATHS[encode(self.state, self.current_process, self.is_tainted)].operations:
+            self.apply(operation)
+
+    def start_pull(self) -> None:
+        """Start pulling the entity without finishing the pull process."""
+        for operation in START_PULL_PATHS[encode(self.state, self.current_process, self.is_tainted)].operations:
+            self.apply(operation)
 
     def apply(self, operation: Operations) -> None:
         """Apply an operation to the entity."""
-        if operation is Operations.START_PULL:
-            return self._start_pull()
-        if operation is Operations.START_DELETE:
-            return self._start_delete()
-        if operation is Operations.PROCESS:
-            return self._process()
-
-    def _start_pull(self) -> None:
-        """Start the pull process for the entity."""
-        return self.state.start_pull(self)
-
-    def _start_delete(self) -> None:
-        """Start the delete process for the entity."""
-        return self.state.start_delete(self)
-
-    def _process(self) -> None:
-        """Process the entity."""
-        return self.state.process(self)
-
-    def _finish_process(self) -> None:
-        while self.current_process is not Processes.NONE:
-            self.apply(Operations.PROCESS)
+        compiled = lookup_transition(self.state, operation, self.current_process, self.is_tainted)
+        if compiled is None:
+            self.events.append(InvalidOperationRequested(operation, self.identifier, self.state))
+            return
+        self.state = compiled.transition.new
+        self.current_process = compiled.process
+        self.events.append(StateChanged(operation, self.identifier, compiled.transition, compiled.command))
 
     def __hash__(self) -> int:
         """Return the hash of this entity."""
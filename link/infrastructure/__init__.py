@@ -1,8 +1,11 @@
 """Contains code gluing the adapters to DataJoint."""
 from __future__ import annotations
 
-from collections.abc import Callable, Mapping
+import threading
+from collections.abc import Callable, Mapping, Sequence
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
+from typing import Optional
 
 import datajoint as dj
 
@@ -12,6 +15,7 @@ from .config import (
     create_table_definition_provider,
 )
 from .factory import Tiers, create_dj_connection_factory, create_dj_schema_factory, create_dj_table_factory
+from .introspection import SchemaCache
 
 
 @dataclass(frozen=True)
@@ -25,25 +29,42 @@ class DJConfiguration:
     local_schema: str
     source_table_name: str
     replacement_stores: Mapping[str, str] = field(default_factory=dict)
+    schema_cache_dir: Optional[str] = None
 
 
 @dataclass(frozen=True)
 class DJTables:
-    """The three DataJoint tables involved in a link."""
+    """The three DataJoint tables involved in a link and the tables recording leases and marks of pulls."""
 
     source: Callable[[], dj.Table]
     outbound: Callable[[], dj.Table]
     local: Callable[[], dj.Table]
+    lease: Callable[[], dj.Table]
+    mark: Callable[[], dj.Table]
 
 
-def create_tables(config: DJConfiguration) -> DJTables:
-    """Create a DataJoint link gateway from the given information."""
-    source_credential_provider = create_source_credential_provider(config.source_host)
-    source_connection = create_dj_connection_factory(source_credential_provider)
+def create_tables(
+    config: DJConfiguration,
+    *,
+    source_connection: Optional[Callable[[], dj.Connection]] = None,
+    local_connection: Optional[Callable[[], dj.Connection]] = None,
+    schema_cache: Optional[SchemaCache] = None,
+) -> DJTables:
+    """Create a DataJoint link gateway from the given information.
+
+    Connection factories and the schema cache can be passed in to share them between the tables of multiple links.
+    """
+    if schema_cache is None and config.schema_cache_dir is not None:
+        schema_cache = SchemaCache(config.schema_cache_dir)
+    if source_connection is None:
+        source_connection = create_dj_connection_factory(create_source_credential_provider(config.source_host))
+    if local_connection is None:
+        local_connection = create_dj_connection_factory(create_local_credential_provider())
     source_table = create_dj_table_factory(
-        lambda: config.source_table_name, create_dj_schema_factory(lambda: config.source_schema, source_connection)
+        lambda: config.source_table_name,
+        create_dj_schema_factory(lambda: config.source_schema, source_connection),
+        schema_cache=schema_cache,
     )
-    local_credential_provider = create_local_credential_provider()
     outbound_table = create_dj_table_factory(
         lambda: config.outbound_table_name,
         create_dj_schema_factory(lambda: config.outbound_schema, source_connection),
@@ -58,13 +79,77 @@ def create_tables(config: DJConfiguration) -> DJTables:
             ]
         ),
         context={"source_table": source_table},
+        schema_cache=schema_cache,
     )
     local_table = create_dj_table_factory(
         lambda: config.source_table_name,
-        create_dj_schema_factory(lambda: config.local_schema, create_dj_connection_factory(local_credential_provider)),
+        create_dj_schema_factory(lambda: config.local_schema, local_connection),
         tier=Tiers.MANUAL,
         definition=create_table_definition_provider(source_table),
         parts=source_table,
         replacement_stores=config.replacement_stores,
+        schema_cache=schema_cache,
+    )
+    lease_table = create_dj_table_factory(
+        lambda: config.outbound_table_name + "Lease",
+        create_dj_schema_factory(lambda: config.outbound_schema, source_connection),
+        tier=Tiers.MANUAL,
+        definition=lambda: "\n".join(
+            [
+                "run: varchar(64)",
+                "shard: smallint unsigned",
+                "---",
+                "worker: varchar(255)",
+                "is_done: enum('TRUE', 'FALSE')",
+                "expires: datetime",
+            ]
+        ),
+        schema_cache=schema_cache,
     )
-    return DJTables(source_table, outbound_table, local_table)
+    mark_table = create_dj_table_factory(
+        lambda: config.outbound_table_name + "Mark",
+        create_dj_schema_factory(lambda: config.outbound_schema, source_connection),
+        tier=Tiers.MANUAL,
+        definition=lambda: "\n".join(
+            [
+                "sync: char(32)",
+                "---",
+                "mark = null: varchar(4095)",
+                "n_syncs: int unsigned",
+            ]
+        ),
+        schema_cache=schema_cache,
+    )
+    return DJTables(source_table, outbound_table, local_table, lease_table, mark_table)
+
+
+def set_up_tables(
+    configs: Sequence[DJConfiguration], *, max_workers: int, schema_cache: Optional[SchemaCache] = None
+) -> None:
+    """Create the outbound, local, lease and mark tables of the given links concurrently.
+
+    DataJoint connections must not be shared between threads so each worker uses its own connections for all the links
+    it sets up. The links are submitted in the given order which should follow the foreign keys between the source
+    tables. The first link is set up before all others such that the schemas are only created once.
+    """
+    connections = threading.local()
+
+    def set_up(config: DJConfiguration) -> None:
+        if not hasattr(connections, "source"):
+            connections.source = create_dj_connection_factory(create_source_credential_provider(config.source_host))
+            connections.local = create_dj_connection_factory(create_local_credential_provider())
+        tables = create_tables(
+            config, source_connection=connections.source, local_connection=connections.local, schema_cache=schema_cache
+        )
+        tables.outbound()
+        tables.local()
+        tables.lease()
+        tables.mark()
+
+    if not configs:
+        return
+    set_up(configs[0])
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="link-setup") as pool:
+        futures = [pool.submit(set_up, config) for config in configs[1:]]
+        for future in futures:
+            future.result()
@@ -0,0 +1,125 @@
+"""Contains functionality for transferring attachments kept in external stores."""
+from __future__ import annotations
+
+from collections.abc import Mapping, Sequence
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+from uuid import UUID
+
+import datajoint as dj
+
+Rows = List[Dict[str, Any]]
+"""Rows as stored in the database, i.e. attachments are represented by the bytes of their hashes."""
+
+Attachments = Dict[Tuple[str, UUID], str]
+"""The names of attachments keyed by the name of their source store and their hash."""
+
+
+class DJAttachmentTransfer:
+    """Copies rows with attachments kept in external stores from the source table to the local table.
+
+    DataJoint downloads each attachment from the source store while fetching and uploads it to the local store while
+    inserting, one attachment after another. Here the attachments are downloaded by a bounded pool of threads instead
+    and uploaded as soon as they arrived. Attachments are identified by the hash of their name and content.
+    Attachments that are already tracked by the local store (e.g. because they were pulled before) are neither
+    downloaded nor uploaded. Uploading and tracking use the local connection and therefore happen in the calling
+    thread. Once all attachments are in the local store the rows are copied as stored in the source table such that
+    their hashes refer to the uploaded attachments. This requires attachments to be the only external attributes.
+    """
+
+    def __init__(self, max_workers: int = 4) -> None:
+        """Initialize the transfer."""
+        if max_workers < 1:
+            raise ValueError("max_workers must be a positive integer")
+        self.max_workers = max_workers
+
+    def copy(self, source: dj.Table, local: dj.Table, download_path: str) -> None:
+        """Copy the rows of the (restricted) source table into the local table using the given scratch directory."""
+        attrs = {
+            name: attr.store
+            for name, attr in source.heading.attributes.items()
+            if attr.is_attachment and attr.is_external
+        }
+        stores = {
+            store: (source.external[store], local.external[local.heading.attributes[name].store])
+            for name, store in attrs.items()
+        }
+        rows = _fetch_rows(source)
+        attachments = _fetch_attachments(stores, attrs, rows)
+        self._transfer(stores, _untracked(stores, attachments), download_path)
+        _insert_rows(local, rows)
+
+    def _transfer(
+        self, stores: Mapping[str, tuple[dj.ExternalTable, dj.ExternalTable]], attachments: Attachments, path: str
+    ) -> None:
+        def download(store: str, uuid: UUID, name: str) -> Path:
+            source_store, _ = stores[store]
+            local_path = Path(path, store, uuid.hex, name)
+            local_path.parent.mkdir(parents=True, exist_ok=True)
+            source_store.download_attachment(uuid, name, local_path)
+            return local_path
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="link-attachment") as pool:
+            futures = {
+                pool.submit(download, store, uuid, name): (store, uuid) for (store, uuid), name in attachments.items()
+            }
+            for future in as_completed(futures):
+                store, uuid = futures[future]
+                local_path = future.result()
+                _, local_store = stores[store]
+                if local_store.upload_attachment(local_path) != uuid:
+                    raise RuntimeError(f"Attachment {local_path.name} does not match its hash {uuid}")
+                local_path.unlink()
+
+
+def _fetch_rows(source: dj.Table) -> Rows:
+    columns = ", ".join(f"`{name}`" for name in source.heading.names)
+    cursor = source.connection.query(
+        f"SELECT {columns} FROM {source.full_table_name}{source.where_clause()}", as_dict=True
+    )
+    return list(cursor.fetchall())
+
+
+def _fetch_attachments(
+    stores: Mapping[str, tuple[dj.ExternalTable, dj.ExternalTable]], attrs: Mapping[str, str], rows: Rows
+) -> Attachments:
+    uuids: dict[str, set[UUID]] = {store: set() for store in stores}
+    for row in rows:
+        for name, store in attrs.items():
+            if row[name] is not None:
+                uuids[store].add(UUID(bytes=row[name]))
+    attachments: Attachments = {}
+    for store, store_uuids in uuids.items():
+        if not store_uuids:
+            continue
+        source_store, _ = stores[store]
+        tracked = source_store & [{"hash": uuid} for uuid in store_uuids]
+        for entry in tracked.proj("attachment_name").fetch(as_dict=True):
+            attachments[(store, entry["hash"])] = entry["attachment_name"]
+    return attachments
+
+
+def _untracked(
+    stores: Mapping[str, tuple[dj.ExternalTable, dj.ExternalTable]], attachments: Attachments
+) -> Attachments:
+    untracked = dict(attachments)
+    for store, (_, local_store) in stores.items():
+        uuids = [{"hash": uuid} for key_store, uuid in attachments if key_store == store]
+        if not uuids:
+            continue
+        for entry in (local_store & uuids).proj().fetch(as_dict=True):
+            untracked.pop((store, entry["hash"]), None)
+    return untracked
+
+
+def _insert_rows(local: dj.Table, rows: Sequence[Mapping[str, Any]]) -> None:
+    if not rows:
+        return
+    names = list(rows[0])
+    columns = ", ".join(f"`{name}`" for name in names)
+    placeholders = "(" + ", ".join(["%s"] * len(names)) + ")"
+    local.connection.query(
+        f"INSERT INTO {local.full_table_name} ({columns}) VALUES " + ", ".join([placeholders] * len(rows)),
+        args=[row[name] for row in rows for name in names],
+    )
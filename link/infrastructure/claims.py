@@ -0,0 +1,55 @@
+"""Contains functionality for letting multiple workers pull the same entities concurrently."""
+from __future__ import annotations
+
+from collections.abc import Callable, Iterator, Sequence
+from contextlib import contextmanager
+
+from datajoint import Table
+
+from link.adapters.custom_types import PrimaryKey
+
+from .facade import joining_transaction
+from .sql import to_literal
+
+
+class OutboundClaims:
+    """Claims on entities with an unfinished pull process recorded as row locks in the outbound table.
+
+    Workers claim batches of entities with an unfinished pull process by locking their rows with SELECT ... FOR UPDATE
+    SKIP LOCKED within a transaction on the source connection. Rows locked by other workers are skipped instead of
+    waited for. The locks are held until the transaction ends such that each entity is only processed by one worker at
+    a time. SKIP LOCKED requires MySQL 8.0 (or MariaDB 10.6) or newer.
+    """
+
+    def __init__(self, outbound: Callable[[], Table], source: Table) -> None:
+        """Initialize the claims."""
+        self._outbound = outbound
+        self._source = source
+
+    @contextmanager
+    def claim(self, batch_size: int) -> Iterator[Sequence[PrimaryKey]]:
+        """Claim up to batch_size reserved entities that are not claimed by other workers until exiting.
+
+        Only rows of the outbound table are locked because locking reads do not lock the rows read by sub-queries
+        (i.e. the source table). The transaction uses the READ COMMITTED isolation level so that reads within it see
+        the latest state of the claimed entities instead of a snapshot taken before they were claimed. Updates of the
+        outbound table made by facades in the current thread join the transaction until exiting.
+        """
+        outbound = self._outbound()
+        connection = self._source.connection
+        attrs = list(self._source.primary_key)
+        columns = ", ".join(f"`{attr}`" for attr in attrs)
+        connection.query("SET TRANSACTION ISOLATION LEVEL READ COMMITTED")
+        restriction = f"SELECT {columns} FROM {self._source.full_table_name}{self._source.where_clause()}"
+        with connection.transaction, joining_transaction(connection):
+            rows = connection.query(
+                f"SELECT {columns} FROM {outbound.full_table_name} "
+                f"WHERE process = 'PULL' AND ({columns}) IN ({restriction}) "
+                f"ORDER BY {columns} LIMIT {int(batch_size)} FOR UPDATE SKIP LOCKED",
+                as_dict=True,
+            ).fetchall()
+            if not rows:
+                yield []
+                return
+            literals = ", ".join("(" + ", ".join(to_literal(row[attr]) for attr in attrs) + ")" for row in rows)
+            yield (outbound & f"({columns}) IN ({literals})").proj().fetch(as_dict=True)
@@ -0,0 +1,145 @@
+"""Contains a daemon that keeps local tables in sync with their source tables."""
+from __future__ import annotations
+
+import itertools
+import logging
+import threading
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+from typing import Optional, Sequence, Tuple
+
+from link.adapters.custom_types import PrimaryKey
+
+from .marks import Mark, create_mark
+from .mixin import SourceEndpoint
+
+logger = logging.getLogger(__name__)
+
+Signature = Tuple[int, Optional[Mark]]
+"""The number of rows and the greatest primary key of a source table."""
+
+
+@dataclass
+class SyncMetrics:
+    """Metrics of the syncs of a watched table."""
+
+    n_polls: int = 0
+    n_syncs: int = 0
+    n_failures: int = 0
+    n_pulled: int = 0
+    sync_seconds: float = 0.0
+    lag: Optional[float] = None
+    """Seconds between the last poll that found no change and the end of the sync picking the change up."""
+    pending_deletes: Sequence[PrimaryKey] = field(default_factory=list)
+    """The primary keys of flagged entities that still need to be deleted from the local table."""
+
+    @property
+    def throughput(self) -> float:
+        """Return the number of pulled entities per second spent syncing."""
+        return self.n_pulled / self.sync_seconds if self.sync_seconds else 0.0
+
+
+@dataclass
+class _Watch:
+    source: SourceEndpoint
+    interval: float
+    due: float = 0.0
+    polled: Optional[float] = None
+    signature: Optional[Signature] = None
+    n_flagged: Optional[int] = None
+    metrics: SyncMetrics = field(default_factory=SyncMetrics)
+
+
+class SyncDaemon:
+    """Keeps local tables in sync with their (restricted) source tables by polling the source tables.
+
+    Each table is probed by counting its rows and looking up its greatest primary key. Tables whose probe changed are
+    synced incrementally (see SourceEndpoint.sync) and polled again after min_interval seconds. Unchanged tables are
+    polled less and less often by multiplying their interval by backoff up to max_interval seconds. Flagged entities
+    are not deleted but reported as pending deletes in the metrics of their table. They are counted on every poll and
+    only fetched when their number changed. Flagging entities does not trigger a sync. The same source endpoints (and
+    therefore connections and spawned tables) are reused across all polls.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        sources: Iterable[SourceEndpoint],
+        *,
+        min_interval: float = 1.0,
+        max_interval: float = 300.0,
+        backoff: float = 2.0,
+        reconcile_every: int = 10,
+        page_size: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize the daemon."""
+        if min_interval <= 0 or max_interval < min_interval:
+            raise ValueError("Intervals must satisfy 0 < min_interval <= max_interval")
+        if backoff < 1:
+            raise ValueError("backoff must be at least one")
+        self._watches = {source.full_table_name: _Watch(source, min_interval) for source in sources}
+        self._min_interval = min_interval
+        self._max_interval = max_interval
+        self._backoff = backoff
+        self._reconcile_every = reconcile_every
+        self._page_size = page_size
+        self._clock = clock
+
+    @property
+    def metrics(self) -> dict[str, SyncMetrics]:
+        """Return the metrics of the watched tables keyed by their full names."""
+        return {name: watch.metrics for name, watch in self._watches.items()}
+
+    def run(self, *, stop: Optional[threading.Event] = None, max_polls: Optional[int] = None) -> None:
+        """Poll the watched tables until the stop event is set or max_polls polls were done."""
+        if stop is None:
+            stop = threading.Event()
+        if not self._watches:
+            return
+        for n_polls in itertools.count():
+            if max_polls is not None and n_polls >= max_polls:
+                return
+            watch = min(self._watches.values(), key=lambda watch: watch.due)
+            if stop.wait(max(watch.due - self._clock(), 0)):
+                return
+            self._poll(watch)
+
+    def _poll(self, watch: _Watch) -> None:
+        metrics = watch.metrics
+        metrics.n_polls += 1
+        try:
+            signature = self._probe(watch.source)
+            self._update_pending_deletes(watch)
+            if signature != watch.signature:
+                start = self._clock()
+                n_pulled = watch.source.sync(reconcile_every=self._reconcile_every, page_size=self._page_size)
+                end = self._clock()
+                metrics.n_syncs += 1
+                metrics.n_pulled += n_pulled
+                metrics.sync_seconds += end - start
+                metrics.lag = end - (watch.polled if watch.polled is not None else start)
+                watch.signature = signature
+                watch.interval = self._min_interval
+            else:
+                watch.interval = min(watch.interval * self._backoff, self._max_interval)
+        except Exception:
+            logger.exception(f"Syncing {watch.source.full_table_name} failed")
+            metrics.n_failures += 1
+            watch.interval = min(watch.interval * self._backoff, self._max_interval)
+        watch.polled = self._clock()
+        watch.due = watch.polled + watch.interval
+
+    @staticmethod
+    def _probe(source: SourceEndpoint) -> Signature:
+        attrs = list(source.primary_key)
+        latest = source.proj().fetch(as_dict=True, order_by=[f"`{attr}` DESC" for attr in attrs], limit=1)
+        return len(source), create_mark(latest[0], attrs) if latest else None
+
+    @staticmethod
+    def _update_pending_deletes(watch: _Watch) -> None:
+        pending_deletes = watch.source.pending_deletes
+        n_flagged = len(pending_deletes)
+        if n_flagged != watch.n_flagged:
+            watch.metrics.pending_deletes = pending_deletes.proj().fetch(as_dict=True)
+            watch.n_flagged = n_flagged
@@ -1,13 +1,34 @@
 """Contains the DataJoint table facade."""
 from __future__ import annotations
 
-from collections.abc import Callable
+import threading
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager, nullcontext
 from tempfile import TemporaryDirectory
-from typing import Any, ContextManager, Iterable, Literal, Mapping, Protocol, Sequence, Union
+from typing import (
+    Any,
+    ContextManager,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Literal,
+    Mapping,
+    Optional,
+    Protocol,
+    Sequence,
+    Tuple,
+    Union,
+)
 
 from link.adapters import PrimaryKey
-from link.adapters.facade import DJAssignment, DJCondition, DJProcess, ProcessType
 from link.adapters.facade import DJLinkFacade as AbstractDJLinkFacade
+from link.adapters.facade import DJPersistentState
+from link.service.executors import split_into_chunks
+
+from .introspection import PartTableCache
+from .sequence import prefetch
+from .staging import restrict
 
 
 class Connection(Protocol):
@@ -17,11 +38,38 @@ class Connection(Protocol):
     def transaction(self) -> ContextManager[Connection]:
         """Context manager for transactions."""
 
+    def query(self, query: str, args: Sequence[Any] = ...) -> Any:
+        """Execute the given query."""
+
+
+class Attribute(Protocol):
+    """DataJoint attribute protocol."""
+
+    @property
+    def is_external(self) -> bool:
+        """Whether the attribute's values are kept in an external store."""
+
+    @property
+    def is_attachment(self) -> bool:
+        """Whether the attribute's values are attachments."""
+
+
+class Heading(Protocol):
+    """DataJoint heading protocol."""
+
+    @property
+    def names(self) -> list[str]:
+        """The names of all attributes."""
+
+    @property
+    def attributes(self) -> Mapping[str, Attribute]:
+        """The attributes keyed by their names."""
+
 
 class Table(Protocol):
     """DataJoint table protocol."""
 
-    def insert(self, rows: Iterable[Mapping[str, Any]]) -> None:
+    def insert(self, rows: Iterable[Mapping[str, Any]], *, skip_duplicates: bool = ...) -> None:
         """Insert the given rows into the table."""
 
     def fetch(self, *, as_dict: Literal[True], download_path: str = ...) -> list[dict[str, Any]]:
@@ -39,6 +87,9 @@ class Table(Protocol):
     def proj(self, *attributes: str) -> Table:
         """Project the table to the given set of attributes."""
 
+    def join(self, other: Any, *, left: bool = ...) -> Table:
+        """Join the table with the other table."""
+
     def __and__(self, condition: Union[str, PrimaryKey, Iterable[PrimaryKey]]) -> Table:
         """Restrict the rows in the table to the ones matching the given condition."""
 
@@ -48,76 +99,210 @@ class Table(Protocol):
     def __contains__(self, primary_key: PrimaryKey) -> bool:
         """Check if the table contains a row with the given primary key."""
 
+    def where_clause(self) -> str:
+        """Return the SQL WHERE clause corresponding to the table's restriction."""
+
     @property
     def table_name(self) -> str:
         """The table's name (without schema name)."""
 
+    @property
+    def full_table_name(self) -> str:
+        """The table's name (including schema name)."""
+
     @property
     def connection(self) -> Connection:
         """The table's connection object."""
 
+    @property
+    def heading(self) -> Heading:
+        """The table's heading."""
+
+
+class AttachmentTransfer(Protocol):
+    """Protocol for copying rows with attachments kept in external stores."""
+
+    def copy(self, source: Any, local: Any, download_path: str) -> None:
+        """Copy the rows of the (restricted) source table into the local table using the given scratch directory."""
+
+
+Rows = List[Dict[str, Any]]
+
+FrozenPrimaryKey = FrozenSet[Tuple[str, Union[str, int, float]]]
+
+
+def freeze(primary_key: PrimaryKey) -> FrozenPrimaryKey:
+    """Return a hashable representation of the given primary key that ignores the order of its attributes."""
+    return frozenset(primary_key.items())
+
+
+_joined = threading.local()
+
+
+@contextmanager
+def joining_transaction(connection: Connection) -> Iterator[None]:
+    """Make facades in the current thread update rows within the transaction open on the given connection.
+
+    Without it each update of the outbound table is done in a transaction of its own. Claimed pulls use it such that
+    the updates of a claimed batch are committed together with the release of the claims.
+    """
+    previous = getattr(_joined, "connection", None)
+    _joined.connection = connection
+    try:
+        yield
+    finally:
+        _joined.connection = previous
+
 
 class DJLinkFacade(AbstractDJLinkFacade):
     """Facade around DataJoint operations needed to interact with stored links."""
 
-    def __init__(self, source: Callable[[], Table], outbound: Callable[[], Table], local: Callable[[], Table]) -> None:
-        """Initialize the facade."""
+    def __init__(  # noqa: PLR0913
+        self,
+        source: Callable[[], Table],
+        outbound: Callable[[], Table],
+        local: Callable[[], Table],
+        *,
+        max_rows_per_fetch: int = 100,
+        staging_threshold: int = 1000,
+        copy_server_side: bool = False,
+        prefetch_depth: int = 1,
+        attachment_transfer: Optional[AttachmentTransfer] = None,
+    ) -> None:
+        """Initialize the facade.
+
+        Rows are copied from the source to the local side in chunks of at most max_rows_per_fetch rows. This bounds
+        the memory and scratch disk space needed to copy rows that contain large blobs and/or attachments.
+
+        Tables are restricted to sets of more than staging_threshold primary keys by staging the keys in a temporary
+        table instead of rendering them into the WHERE clause of the query.
+
+        If copy_server_side is true the source and local tables are assumed to live on the same database server and
+        rows without externally stored attributes are copied with INSERT ... SELECT statements issued on the local
+        connection instead of being fetched and inserted again. The local user needs read access to the source schema.
+
+        Chunks of rows (including their attachments) are fetched in a background thread while the previous chunks are
+        inserted into the local table. Up to prefetch_depth fetched chunks are buffered. A prefetch_depth of zero
+        fetches and inserts the chunks one after another.
+
+        Rows of tables with attachments kept in external stores are copied by the attachment transfer if one is given.
+
+        Part tables are discovered once and reused for as long as the children of the master tables do not change.
+        """
         self.source = source
         self.outbound = outbound
         self.local = local
-
-    def get_assignment(self, primary_key: PrimaryKey) -> DJAssignment:
-        """Get the assignment of the entity with the given primary key."""
-        return DJAssignment(
-            primary_key, primary_key in self.source(), primary_key in self.outbound(), primary_key in self.local()
-        )
-
-    def get_condition(self, primary_key: PrimaryKey) -> DJCondition:
-        """Get the condition of the entity with the given primary key."""
-        if primary_key not in self.outbound():
-            is_flagged = False
-        else:
-            is_flagged = (self.outbound() & primary_key).fetch1("is_flagged") == "TRUE"
-        return DJCondition(primary_key, is_flagged)
-
-    def get_process(self, primary_key: PrimaryKey) -> DJProcess:
-        """Get the process of the entity with the given primary key."""
-        process: ProcessType
-        if primary_key not in self.outbound():
-            process = "NONE"
-        else:
-            process = (self.outbound() & primary_key).fetch1("process")
-        return DJProcess(primary_key, process)
+        self.max_rows_per_fetch = max_rows_per_fetch
+        self.staging_threshold = staging_threshold
+        self.copy_server_side = copy_server_side
+        self.prefetch_depth = prefetch_depth
+        self.attachment_transfer = attachment_transfer
+        self.__parts = PartTableCache()
+
+    def get_persistent_states(self, primary_keys: Iterable[PrimaryKey]) -> list[DJPersistentState]:
+        """Get the persistent states of the entities with the given primary keys.
+
+        The presence in the source and outbound tables, the flag and the process are fetched with a single left join
+        on the source server. The presence in the local table is fetched with a single additional query.
+        """
+        primary_keys = list(primary_keys)
+        if not primary_keys:
+            return []
+        outbound_rows = {}
+        with self.__restrict(self.source(), primary_keys) as source:
+            for row in source.proj().join(self.outbound().proj("process", "is_flagged"), left=True).fetch(as_dict=True):
+                process, is_flagged = row.pop("process"), row.pop("is_flagged")
+                outbound_rows[freeze(row)] = (process, is_flagged)
+        with self.__restrict(self.local(), primary_keys) as local:
+            in_local = {freeze(key) for key in local.proj().fetch(as_dict=True)}
+        states = []
+        for primary_key in primary_keys:
+            frozen = freeze(primary_key)
+            in_source = frozen in outbound_rows
+            process, is_flagged = outbound_rows.get(frozen, (None, None))
+            states.append(
+                DJPersistentState(
+                    primary_key,
+                    in_source=in_source,
+                    in_outbound=process is not None,
+                    in_local=frozen in in_local,
+                    is_flagged=is_flagged == "TRUE",
+                    current_process=process if process is not None else "NONE",
+                )
+            )
+        return states
 
     def add_to_local(self, primary_keys: Iterable[PrimaryKey]) -> None:
         """Add the entities corresponding to the given primary keys to the local table."""
 
-        def is_part_table(parent: Table, child: Table) -> bool:
-            return child.table_name.startswith(parent.table_name + "__")
-
-        def remove_parent_prefix_from_part_name(parent: Table, part: Table) -> str:
-            assert is_part_table(parent, part)
-            return part.table_name[len(parent.table_name) :]
-
-        def get_parts(parent: Table) -> dict[str, Table]:
-            parts = (child for child in parent.children(as_objects=True) if is_part_table(parent, child))
-            return {remove_parent_prefix_from_part_name(parent, part): part for part in parts}
-
-        def add_parts_to_local(download_path: str) -> None:
-            local_parts = get_parts(self.local())
-            for source_name, source_part in get_parts(self.source()).items():
-                local_parts[source_name].insert(
-                    (source_part & primary_keys).fetch(as_dict=True, download_path=download_path)
+        def fetch(source: Table, primary_keys: Iterable[PrimaryKey]) -> Iterator[tuple[TemporaryDirectory[str], Rows]]:
+            for chunk in split_into_chunks(primary_keys, self.max_rows_per_fetch):
+                download_path = TemporaryDirectory()
+                try:
+                    with self.__restrict(source, chunk) as restricted:
+                        rows = restricted.fetch(as_dict=True, download_path=download_path.name)
+                except BaseException:
+                    download_path.cleanup()
+                    raise
+                yield download_path, rows
+
+        def transfer_with_attachments(source: Table, local: Table, primary_keys: Iterable[PrimaryKey]) -> None:
+            assert self.attachment_transfer is not None
+            for chunk in split_into_chunks(primary_keys, self.max_rows_per_fetch):
+                with TemporaryDirectory() as download_path, self.__restrict(source, chunk) as restricted:
+                    self.attachment_transfer.copy(restricted, local, download_path)
+
+        def transfer(source: Table, local: Table, primary_keys: Iterable[PrimaryKey]) -> None:
+            externals = [attr for attr in source.heading.attributes.values() if attr.is_external]
+            if self.attachment_transfer is not None and externals and all(attr.is_attachment for attr in externals):
+                transfer_with_attachments(source, local, primary_keys)
+                return
+            # The connections must not be shared because the chunks are fetched in a background thread
+            if self.prefetch_depth == 0 or source.connection is local.connection:
+                chunks: ContextManager[Iterator[tuple[TemporaryDirectory[str], Rows]]] = nullcontext(
+                    fetch(source, primary_keys)
                 )
+            else:
+                chunks = prefetch(
+                    fetch(source, primary_keys), depth=self.prefetch_depth, discard=lambda chunk: chunk[0].cleanup()
+                )
+            with chunks as fetched:
+                for download_path, rows in fetched:
+                    with download_path:
+                        local.insert(rows)
+
+        def can_copy_server_side(table: Table) -> bool:
+            return self.copy_server_side and not any(attr.is_external for attr in table.heading.attributes.values())
+
+        def copy_on_server(source: Table, local: Table, primary_keys: Sequence[PrimaryKey]) -> None:
+            # Keys are rendered into the statement because temporary tables are not visible to the local connection
+            columns = ", ".join(f"`{name}`" for name in source.heading.names)
+            for chunk in split_into_chunks(primary_keys, self.staging_threshold):
+                query = (
+                    f"INSERT INTO {local.full_table_name} ({columns}) "
+                    f"SELECT {columns} FROM {source.full_table_name}{(source & chunk).where_clause()}"
+                )
+                local.connection.query(query)
 
         primary_keys = list(primary_keys)
-        with self.local().connection.transaction, TemporaryDirectory() as download_path:
-            self.local().insert((self.source() & primary_keys).fetch(as_dict=True, download_path=download_path))
-            add_parts_to_local(download_path)
+        with self.local().connection.transaction:
+            if can_copy_server_side(self.source()):
+                copy_on_server(self.source(), self.local(), primary_keys)
+            else:
+                transfer(self.source(), self.local(), primary_keys)
+            local_parts = self.__parts(self.local())
+            for source_name, source_part in self.__parts(self.source()).items():
+                if can_copy_server_side(source_part):
+                    copy_on_server(source_part, local_parts[source_name], primary_keys)
+                    continue
+                with self.__restrict(source_part, primary_keys) as restricted:
+                    part_primary_keys = restricted.proj().fetch(as_dict=True)
+                transfer(source_part, local_parts[source_name], part_primary_keys)
 
     def remove_from_local(self, primary_keys: Iterable[PrimaryKey]) -> None:
         """Remove the entities corresponding to the given primary keys from the local table."""
-        (self.local() & primary_keys).delete()
+        with self.__restrict(self.local(), list(primary_keys)) as local:
+            local.delete()
 
     def deprecate(self, primary_keys: Iterable[PrimaryKey]) -> None:
         """Deprecate the entities corresponding to the given primary keys by updating rows in the outbound table."""
@@ -126,7 +311,8 @@ class DJLinkFacade(AbstractDJLinkFacade):
     def start_pull_process(self, primary_keys: Iterable[PrimaryKey]) -> None:
         """Start the pull process of the entities corresponding to the given primary keys."""
         self.outbound().insert(
-            (dict(key, process="PULL", is_flagged="FALSE", is_deprecated="FALSE") for key in primary_keys)
+            (dict(key, process="PULL", is_flagged="FALSE", is_deprecated="FALSE") for key in primary_keys),
+            skip_duplicates=True,
         )
 
     def finish_pull_process(self, primary_keys: Iterable[PrimaryKey]) -> None:
@@ -139,14 +325,22 @@ class DJLinkFacade(AbstractDJLinkFacade):
 
     def finish_delete_process(self, primary_keys: Iterable[PrimaryKey]) -> None:
         """Finish the delete process of the entities corresponding to the given primary keys."""
-        (self.outbound() & primary_keys).delete_quick()
-
-    @staticmethod
-    def __update_rows(table: Table, primary_keys: Iterable[PrimaryKey], changes: Mapping[str, Any]) -> None:
-        with table.connection.transaction:
-            primary_keys = list(primary_keys)
-            rows = (table & primary_keys).fetch(as_dict=True)
-            for row in rows:
-                row.update(changes)
-            (table & primary_keys).delete_quick()
-            table.insert(rows)
+        with self.__restrict(self.outbound(), list(primary_keys)) as outbound:
+            outbound.delete_quick()
+
+    def __restrict(self, table: Table, primary_keys: Sequence[PrimaryKey]) -> ContextManager[Table]:
+        # Keys are staged in the helper schema or the local schema because the source schema is read-only for us
+        helper = self.local() if table.connection is self.local().connection else self.outbound()
+        schema = helper.full_table_name.split(".")[0]
+        return restrict(table, primary_keys, threshold=self.staging_threshold, schema=schema)
+
+    def __update_rows(self, table: Table, primary_keys: Iterable[PrimaryKey], changes: Mapping[str, Any]) -> None:
+        primary_keys = list(primary_keys)
+        if not primary_keys:
+            return
+        assignments = ", ".join(f"`{attr}` = %s" for attr in changes)
+        with self.__restrict(table, primary_keys) as restricted:
+            query = f"UPDATE {table.full_table_name} SET {assignments}{restricted.where_clause()}"
+            joins = getattr(_joined, "connection", None) is table.connection
+            with nullcontext() if joins else table.connection.transaction:
+                table.connection.query(query, args=list(changes.values()))
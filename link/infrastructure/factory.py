@@ -2,13 +2,19 @@
 from __future__ import annotations
 
 import functools
+import logging
+import re
 from enum import Enum
 from typing import Callable, Mapping, Optional, cast, overload
 
 import datajoint as dj
+from datajoint.utils import to_camel_case
 
 from .config import DatabaseServerCredentials
 from .dj_helpers import replace_stores
+from .introspection import SchemaCache
+
+logger = logging.getLogger(__name__)
 
 
 def create_dj_connection_factory(
@@ -45,8 +51,75 @@ class Tiers(Enum):
     IMPORTED = dj.Imported
 
 
+def fingerprint_schema(schema: dj.Schema) -> str:
+    """Compute a fingerprint of the schema on the server that changes whenever its tables change."""
+    count, checksum = schema.connection.query(
+        "SELECT COUNT(*), COALESCE(SUM(CRC32(CONCAT_WS('\x1f', table_name, column_name, column_type, column_key, "
+        "is_nullable, column_default, column_comment))), 0) FROM information_schema.columns WHERE table_schema = %s",
+        args=[schema.database],
+    ).fetchone()
+    return f"{count}:{checksum}"
+
+
+def _find_master_tier(table_name: str) -> Optional[type[object]]:
+    tiers = (dj.Lookup, dj.Manual, dj.Imported, dj.Computed)
+    return next((tier for tier in tiers if re.fullmatch(tier.tier_regexp, table_name)), None)
+
+
+def _is_master(table_name: str, name: str) -> bool:
+    return _find_master_tier(table_name) is not None and to_camel_case(table_name) == name
+
+
+def list_master_tables(schema: dj.Schema) -> list[str]:
+    """List the class names of the master tables in the schema in topological (i.e. foreign key) order."""
+    return [to_camel_case(name) for name in schema.list_tables() if _find_master_tier(name) is not None]
+
+
+def spawn_table_class(schema: dj.Schema, name: str, cache: SchemaCache) -> Optional[type[dj.Table]]:
+    """Spawn the class of the table with the given name (and its parts) if the table exists in the schema.
+
+    Unlike spawn_missing_classes only the requested table and its parts are decorated. The names of the tables in the
+    schema are taken from the cache. They are listed again if the cache has no entry for the schema or the requested
+    table is missing from it (e.g. because it was created after the entry was stored). If spawning the table from a
+    cached entry fails (e.g. because a table in it was dropped since) the entry is invalidated and the names are listed
+    again as well.
+    """
+    host = schema.connection.conn_info["host"]
+    table_names = cache.load(host, schema.database, lambda: fingerprint_schema(schema))
+    if table_names is not None and any(_is_master(table_name, name) for table_name in table_names):
+        try:
+            return _spawn_table_class(schema, name, table_names)
+        except Exception:
+            logger.warning(f"Spawning {name} from cached table names failed, listing tables of {schema.database} again")
+            cache.invalidate(host, schema.database)
+    fingerprint = fingerprint_schema(schema)
+    table_names = [row[0] for row in schema.connection.query(f"SHOW TABLES IN `{schema.database}`")]
+    cache.store(host, schema.database, fingerprint, table_names)
+    return _spawn_table_class(schema, name, table_names)
+
+
+def _spawn_table_class(schema: dj.Schema, name: str, table_names: list[str]) -> Optional[type[dj.Table]]:
+    for table_name in table_names:
+        tier = _find_master_tier(table_name)
+        if tier is None or to_camel_case(table_name) != name:
+            continue
+        parts = {}
+        for part_name in table_names:
+            match = re.fullmatch(dj.Part.tier_regexp, part_name)
+            if match and match.group("master") == table_name:
+                part_class_name = to_camel_case(match.group("part"))
+                parts[part_class_name] = type(part_class_name, (dj.Part,), {"definition": ...})
+        return schema(cast("type[dj.Table]", type(name, (tier,), parts)), context={})
+    return None
+
+
 @overload
-def create_dj_table_factory(name: Callable[[], str], schema_factory: Callable[[], dj.Schema]) -> Callable[[], dj.Table]:
+def create_dj_table_factory(
+    name: Callable[[], str],
+    schema_factory: Callable[[], dj.Schema],
+    *,
+    schema_cache: Optional[SchemaCache] = None,
+) -> Callable[[], dj.Table]:
     ...
 
 
@@ -60,6 +133,7 @@ def create_dj_table_factory(  # noqa: PLR0913
     parts: Optional[Callable[[], dj.Table]] = None,
     context: Optional[Mapping[str, Callable[[], dj.Table]]] = None,
     replacement_stores: Optional[Mapping[str, str]] = None,
+    schema_cache: Optional[SchemaCache] = None,
 ) -> Callable[[], dj.Table]:
     ...
 
@@ -73,8 +147,13 @@ def create_dj_table_factory(  # noqa: PLR0913
     parts: Optional[Callable[[], dj.Table]] = None,
     context: Optional[Mapping[str, Callable[[], dj.Table]]] = None,
     replacement_stores: Optional[Mapping[str, str]] = None,
+    schema_cache: Optional[SchemaCache] = None,
 ) -> Callable[[], dj.Table]:
-    """Create a factory that produces DataJoint tables."""
+    """Create a factory that produces DataJoint tables.
+
+    If a schema cache is given only the requested table is spawned using the names of the tables in the schema
+    recorded in the cache instead of spawning classes for all tables in the schema.
+    """
     if replacement_stores is None:
         replacement_stores = {}
     if context is None:
@@ -82,30 +161,31 @@ def create_dj_table_factory(  # noqa: PLR0913
 
     @functools.lru_cache(maxsize=None)
     def create_dj_table() -> dj.Table:
-        spawned_table_classes: dict[str, type[dj.Table]] = {}
-        schema_factory().spawn_missing_classes(context=spawned_table_classes)
-        try:
-            return spawned_table_classes[name()]()
-        except KeyError as exception:
-            if tier is None or definition is None:
-                raise RuntimeError from exception
-            part_definitions: dict[str, str] = {}
-            if parts is not None:
-                for child in parts().children(as_objects=True):
-                    if not child.table_name.startswith(parts().table_name + "__"):
-                        continue
-                    part_definition = child.describe(printout=False).replace(parts().full_table_name, "master")
-                    part_definitions[dj.utils.to_camel_case(child.table_name.split("__")[-1])] = part_definition
-            for part_name, part_definition in part_definitions.items():
-                part_definitions[part_name] = replace_stores(part_definition, replacement_stores)
-            part_tables: dict[str, type[dj.Part]] = {}
-            for part_name, part_definition in part_definitions.items():
-                part_tables[part_name] = cast(
-                    "type[dj.Part]", type(part_name, (dj.Part,), {"definition": part_definition})
-                )
-            processed_definition = replace_stores(definition(), replacement_stores)
-            table_cls = type(name(), (tier.value,), {"definition": processed_definition, **part_tables})
-            processed_context = {name: factory() for name, factory in context.items()}
-            return schema_factory()(table_cls, context=processed_context)()
+        if schema_cache is None:
+            spawned_table_classes: dict[str, type[dj.Table]] = {}
+            schema_factory().spawn_missing_classes(context=spawned_table_classes)
+            table_cls = spawned_table_classes.get(name())
+        else:
+            table_cls = spawn_table_class(schema_factory(), name(), schema_cache)
+        if table_cls is not None:
+            return table_cls()
+        if tier is None or definition is None:
+            raise RuntimeError
+        part_definitions: dict[str, str] = {}
+        if parts is not None:
+            for child in parts().children(as_objects=True):
+                if not child.table_name.startswith(parts().table_name + "__"):
+                    continue
+                part_definition = child.describe(printout=False).replace(parts().full_table_name, "master")
+                part_definitions[to_camel_case(child.table_name.split("__")[-1])] = part_definition
+        for part_name, part_definition in part_definitions.items():
+            part_definitions[part_name] = replace_stores(part_definition, replacement_stores)
+        part_tables: dict[str, type[dj.Part]] = {}
+        for part_name, part_definition in part_definitions.items():
+            part_tables[part_name] = cast("type[dj.Part]", type(part_name, (dj.Part,), {"definition": part_definition}))
+        processed_definition = replace_stores(definition(), replacement_stores)
+        table_cls = type(name(), (tier.value,), {"definition": processed_definition, **part_tables})
+        processed_context = {name: factory() for name, factory in context.items()}
+        return schema_factory()(table_cls, context=processed_context)()
 
     return create_dj_table
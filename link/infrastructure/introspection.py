@@ -0,0 +1,110 @@
+"""Contains functionality for caching the results of introspecting tables."""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+from collections.abc import Callable, Iterable
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Optional, Tuple, Union
+
+if TYPE_CHECKING:
+    from .facade import Table
+
+Parts = Dict[str, "Table"]
+"""Part tables keyed by their names without the prefix of their master."""
+
+
+def is_part_table(master: Table, child: Table) -> bool:
+    """Check whether the child is a part table of the given master table."""
+    return child.table_name.startswith(master.table_name + "__")
+
+
+class PartTableCache:
+    """Caches the part tables of master tables.
+
+    DataJoint creates new table objects whenever the children of a table are requested. Each of them needs to load its
+    heading from the server before it can be used. The cache keeps the part tables of each master table and only
+    replaces them once the names of the master's children change (e.g. because a part table was added).
+    """
+
+    def __init__(self) -> None:
+        """Initialize the cache."""
+        self._parts: dict[str, Tuple[Tuple[str, ...], Parts]] = {}
+
+    def __call__(self, master: Table) -> Parts:
+        """Return the part tables of the given master table."""
+        children = master.children(as_objects=True)
+        names = tuple(child.full_table_name for child in children)
+        cached = self._parts.get(master.full_table_name)
+        if cached is not None and cached[0] == names:
+            return cached[1]
+        parts = {
+            child.table_name[len(master.table_name) :]: child for child in children if is_part_table(master, child)
+        }
+        self._parts[master.full_table_name] = (names, parts)
+        return parts
+
+
+class SchemaCache:
+    """Caches the names of the tables in schemas in memory and optionally persists them on disk.
+
+    Entries are keyed by the host and the name of the schema. Entries in memory are used without asking the server
+    until they are invalidated. Entries read from disk are only used if the fingerprint of the schema did not change
+    since they were stored. The fingerprint should be computed on the server and change whenever a table is added,
+    dropped or altered. Entries that are missing, stale or unreadable are treated as absent.
+    """
+
+    def __init__(self, directory: Union[str, os.PathLike[str], None] = None) -> None:
+        """Initialize the cache."""
+        self.directory = Path(directory).expanduser() if directory is not None else None
+        self._entries: dict[tuple[str, str], tuple[str, list[str]]] = {}
+
+    def load(self, host: str, schema: str, fingerprint: Callable[[], str]) -> Optional[list[str]]:
+        """Load the names of the tables in the given schema if the cached entry is still valid.
+
+        The fingerprint is only computed if the entry has to be read from disk.
+        """
+        entry = self._entries.get((host, schema))
+        if entry is None and self.directory is not None:
+            entry = self._read(host, schema)
+            if entry is None or entry[0] != fingerprint():
+                return None
+        if entry is None:
+            return None
+        self._entries[(host, schema)] = entry
+        return list(entry[1])
+
+    def invalidate(self, host: str, schema: str) -> None:
+        """Forget the names of the tables in the given schema."""
+        self._entries.pop((host, schema), None)
+        if self.directory is not None:
+            self._path(host, schema).unlink(missing_ok=True)
+
+    def store(self, host: str, schema: str, fingerprint: str, table_names: Iterable[str]) -> None:
+        """Store the names of the tables in the given schema."""
+        table_names = list(table_names)
+        self._entries[(host, schema)] = (fingerprint, table_names)
+        if self.directory is None:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        entry = {"host": host, "schema": schema, "fingerprint": fingerprint, "table_names": table_names}
+        with tempfile.NamedTemporaryFile("w", dir=self.directory, suffix=".tmp", delete=False) as file:
+            json.dump(entry, file)
+        os.replace(file.name, self._path(host, schema))
+
+    def _read(self, host: str, schema: str) -> Optional[tuple[str, list[str]]]:
+        try:
+            with self._path(host, schema).open() as file:
+                entry = json.load(file)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(entry, dict) or not isinstance(entry.get("fingerprint"), str):
+            return None
+        return entry["fingerprint"], list(entry.get("table_names", []))
+
+    def _path(self, host: str, schema: str) -> Path:
+        assert self.directory is not None
+        key = hashlib.sha256(f"{host}\x1f{schema}".encode()).hexdigest()
+        return self.directory / f"{key}.json"
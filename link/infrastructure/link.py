@@ -2,16 +2,21 @@
 from __future__ import annotations
 
 import logging
-from collections.abc import Callable
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
 from functools import partial
+from types import SimpleNamespace
 from typing import Any, Mapping, Optional, cast
 
+import datajoint as dj
+
 from link.adapters.controller import DJController
 from link.adapters.gateway import DJLinkGateway
 from link.adapters.identification import IdentificationTranslator
 from link.adapters.present import create_state_change_logger
 from link.adapters.progress import DJProgressDisplayAdapter
 from link.domain import commands, events
+from link.service.executors import ChunkExecutor, SequentialChunkExecutor, ThreadedChunkExecutor
 from link.service.handlers import (
     delete,
     delete_entity,
@@ -22,16 +27,45 @@ from link.service.handlers import (
     log_state_change,
     pull,
     pull_entity,
+    reserve,
 )
 from link.service.messagebus import CommandHandlers, EventHandlers, MessageBus
 from link.service.uow import UnitOfWork
 
-from . import DJConfiguration, create_tables
+from . import DJConfiguration, DJTables, create_tables, set_up_tables
+from .attachments import DJAttachmentTransfer
+from .config import create_local_credential_provider, create_source_credential_provider
 from .facade import DJLinkFacade
-from .mixin import create_local_endpoint
+from .factory import create_dj_connection_factory, list_master_tables
+from .introspection import SchemaCache
+from .mixin import LocalEndpoint, create_local_endpoint
 from .progress import TQDMProgressView
 
 
+@dataclass(frozen=True)
+class _LinkOptions:
+    stores: Mapping[str, str] = field(default_factory=dict)
+    chunk_size: int = 100
+    max_rows_per_fetch: int = 100
+    max_workers: int = 1
+    max_cached_keys: Optional[int] = None
+    copy_server_side: bool = False
+    max_attachment_workers: int = 0
+    schema_cache_dir: Optional[str] = None
+
+    def __post_init__(self) -> None:
+        if self.chunk_size < 1:
+            raise ValueError("chunk_size must be a positive integer")
+        if self.max_rows_per_fetch < 1:
+            raise ValueError("max_rows_per_fetch must be a positive integer")
+        if self.max_workers < 1:
+            raise ValueError("max_workers must be a positive integer")
+        if self.max_cached_keys is not None and self.max_cached_keys < 0:
+            raise ValueError("max_cached_keys must be a non-negative integer")
+        if self.max_attachment_workers < 0:
+            raise ValueError("max_attachment_workers must be a non-negative integer")
+
+
 def create_link(  # noqa: PLR0913
     source_host: str,
     source_schema: str,
@@ -40,43 +74,219 @@ def create_link(  # noqa: PLR0913
     local_schema: str,
     *,
     stores: Optional[Mapping[str, str]] = None,
+    chunk_size: int = 100,
+    max_rows_per_fetch: int = 100,
+    max_workers: int = 1,
+    max_cached_keys: Optional[int] = None,
+    copy_server_side: bool = False,
+    max_attachment_workers: int = 0,
+    schema_cache_dir: Optional[str] = None,
 ) -> Callable[[type], Any]:
-    """Create a link."""
-    if stores is None:
-        stores = {}
+    """Create a link.
+
+    Entities are pulled and deleted in chunks of at most chunk_size entities. All entities in a chunk are processed
+    within the same unit of work. Rows are copied to the local table in chunks of at most max_rows_per_fetch rows.
+    Chunks are processed concurrently by up to max_workers threads each using their own database connections.
+    If max_cached_keys is given at most that many primary keys are remembered between pulls/deletes, otherwise all
+    primary keys ever pulled or deleted are remembered for the lifetime of the link.
+    If copy_server_side is true rows are copied to the local table by the database server itself instead of being
+    fetched and inserted again. This requires the source and local tables to live on the same database server and the
+    local user to be allowed to read the source schema.
+    If max_attachment_workers is positive attachments kept in external stores are downloaded by up to that many
+    threads per chunk skipping attachments already tracked by the local store. By default the transfer is left to
+    DataJoint. Tables with other external attributes are always transferred by DataJoint.
+    If schema_cache_dir is given the names of the tables in the involved schemas are cached in that directory such
+    that only the linked tables need to be spawned instead of all tables in each schema.
+    """
+    options = _LinkOptions(
+        {} if stores is None else stores,
+        chunk_size,
+        max_rows_per_fetch,
+        max_workers,
+        max_cached_keys,
+        copy_server_side,
+        max_attachment_workers,
+        schema_cache_dir,
+    )
 
     def inner(obj: type) -> Any:
-        translator = IdentificationTranslator()
-        tables = create_tables(
-            DJConfiguration(
-                source_host, source_schema, outbound_schema, outbound_table, local_schema, obj.__name__, stores
-            )
+        config = DJConfiguration(
+            source_host,
+            source_schema,
+            outbound_schema,
+            outbound_table,
+            local_schema,
+            obj.__name__,
+            options.stores,
+            options.schema_cache_dir,
         )
-        facade = DJLinkFacade(tables.source, tables.outbound, tables.local)
-        gateway = DJLinkGateway(facade, translator)
-        uow = UnitOfWork(gateway)
-        logger = logging.getLogger(obj.__name__)
-
-        command_handlers = cast(CommandHandlers, {})
-        event_handlers = cast(EventHandlers, {})
-        bus = MessageBus(uow, command_handlers, event_handlers)
-        command_handlers[commands.PullEntity] = partial(pull_entity, uow=uow, message_bus=bus)
-        command_handlers[commands.DeleteEntity] = partial(delete_entity, uow=uow, message_bus=bus)
-        command_handlers[commands.PullEntities] = partial(pull, message_bus=bus)
-        command_handlers[commands.DeleteEntities] = partial(delete, message_bus=bus)
-        progress_view = TQDMProgressView()
-        display = DJProgressDisplayAdapter(translator, progress_view)
-        event_handlers[events.ProcessStarted] = [partial(inform_next_process_started, display=display)]
-        event_handlers[events.ProcessFinished] = [partial(inform_current_process_finished, display=display)]
-        event_handlers[events.BatchProcessingStarted] = [partial(inform_batch_processing_started, display=display)]
-        event_handlers[events.BatchProcessingFinished] = [partial(inform_batch_processing_finished, display=display)]
-        event_handlers[events.StateChanged] = [
-            partial(log_state_change, log=create_state_change_logger(translator, logger.info))
-        ]
-        event_handlers[events.InvalidOperationRequested] = [lambda event: None]
-
-        controller = DJController(bus, translator)
-
-        return create_local_endpoint(controller, tables, progress_view)
+        return _create_local_endpoint(config, create_tables(config), options)
 
     return inner
+
+
+def create_schema_link(  # noqa: PLR0913
+    source_host: str,
+    source_schema: str,
+    outbound_schema: str,
+    local_schema: str,
+    *,
+    tables: Optional[Iterable[str]] = None,
+    outbound_table_suffix: str = "Outbound",
+    max_setup_workers: int = 4,
+    n_connections: int = 1,
+    stores: Optional[Mapping[str, str]] = None,
+    chunk_size: int = 100,
+    max_rows_per_fetch: int = 100,
+    max_workers: int = 1,
+    max_cached_keys: Optional[int] = None,
+    copy_server_side: bool = False,
+    max_attachment_workers: int = 0,
+    schema_cache_dir: Optional[str] = None,
+) -> SimpleNamespace:
+    """Link many tables of the source schema at once.
+
+    The given tables (by default all master tables in the source schema) are linked as if each of them was passed to
+    create_link. The outbound table of each link is named after its source table followed by outbound_table_suffix.
+    The links are spread across n_connections pairs of source and local connections such that up to n_connections
+    links can be pulled concurrently (see pull_tables). All links share an in-memory cache of the names of the tables
+    in the involved schemas such that each schema is only listed once (plus once per created table). Missing local,
+    outbound, lease and mark tables are created concurrently by up to max_setup_workers threads in foreign key order.
+    The local endpoints are returned as attributes of a namespace named after their source tables. All other
+    arguments have the same meaning as in create_link.
+    """
+    options = _LinkOptions(
+        {} if stores is None else stores,
+        chunk_size,
+        max_rows_per_fetch,
+        max_workers,
+        max_cached_keys,
+        copy_server_side,
+        max_attachment_workers,
+        schema_cache_dir,
+    )
+    if max_setup_workers < 1:
+        raise ValueError("max_setup_workers must be a positive integer")
+    if n_connections < 1:
+        raise ValueError("n_connections must be a positive integer")
+    connections = [
+        (
+            create_dj_connection_factory(create_source_credential_provider(source_host)),
+            create_dj_connection_factory(create_local_credential_provider()),
+        )
+        for _ in range(n_connections)
+    ]
+    schema_cache = SchemaCache(schema_cache_dir)
+    if tables is None:
+        tables = list_master_tables(dj.Schema(source_schema, connection=connections[0][0](), create_schema=False))
+    configs = [
+        DJConfiguration(
+            source_host,
+            source_schema,
+            outbound_schema,
+            name + outbound_table_suffix,
+            local_schema,
+            name,
+            options.stores,
+            options.schema_cache_dir,
+        )
+        for name in tables
+    ]
+    set_up_tables(configs, max_workers=max_setup_workers, schema_cache=schema_cache)
+    for source_connection, local_connection in connections[: len(configs)]:
+        source_connection().dependencies.load()
+        local_connection().dependencies.load()
+    return SimpleNamespace(
+        **{
+            config.source_table_name: _create_local_endpoint(
+                config,
+                create_tables(
+                    config,
+                    source_connection=connections[index % n_connections][0],
+                    local_connection=connections[index % n_connections][1],
+                    schema_cache=schema_cache,
+                ),
+                options,
+            )
+            for index, config in enumerate(configs)
+        }
+    )
+
+
+def _create_local_endpoint(config: DJConfiguration, tables: DJTables, options: _LinkOptions) -> type[LocalEndpoint]:
+    translator = IdentificationTranslator(max_size=options.max_cached_keys)
+
+    def create_uow(tables: DJTables) -> UnitOfWork:
+        facade = DJLinkFacade(
+            tables.source,
+            tables.outbound,
+            tables.local,
+            max_rows_per_fetch=options.max_rows_per_fetch,
+            copy_server_side=options.copy_server_side,
+            attachment_transfer=(
+                DJAttachmentTransfer(options.max_attachment_workers) if options.max_attachment_workers > 0 else None
+            ),
+        )
+        return UnitOfWork(DJLinkGateway(facade, translator))
+
+    uow = create_uow(tables)
+    executor: ChunkExecutor
+    if options.max_workers == 1:
+        executor = SequentialChunkExecutor(uow)
+    else:
+        worker_connections: dict[int, tuple[Callable[[], dj.Connection], Callable[[], dj.Connection]]] = {}
+
+        def create_worker_uow() -> UnitOfWork:
+            source_connection = create_dj_connection_factory(create_source_credential_provider(config.source_host))
+            local_connection = create_dj_connection_factory(create_local_credential_provider())
+            worker_uow = create_uow(
+                create_tables(config, source_connection=source_connection, local_connection=local_connection)
+            )
+            worker_connections[id(worker_uow)] = (source_connection, local_connection)
+            return worker_uow
+
+        def release_worker_uow(worker_uow: UnitOfWork) -> None:
+            for connection in worker_connections.pop(id(worker_uow)):
+                connection().close()
+
+        executor = ThreadedChunkExecutor(create_worker_uow, options.max_workers, release=release_worker_uow)
+    logger = logging.getLogger(config.source_table_name)
+
+    command_handlers = cast(CommandHandlers, {})
+    event_handlers = cast(EventHandlers, {})
+    bus = MessageBus(uow, command_handlers, event_handlers)
+    command_handlers[commands.PullEntity] = partial(pull_entity, uow=uow, message_bus=bus)
+    command_handlers[commands.DeleteEntity] = partial(delete_entity, uow=uow, message_bus=bus)
+    command_handlers[commands.PullEntities] = partial(
+        pull, executor=executor, message_bus=bus, chunk_size=options.chunk_size
+    )
+    command_handlers[commands.DeleteEntities] = partial(
+        delete, executor=executor, message_bus=bus, chunk_size=options.chunk_size
+    )
+    command_handlers[commands.ReserveEntities] = partial(
+        reserve, executor=executor, message_bus=bus, chunk_size=options.chunk_size
+    )
+    progress_view = TQDMProgressView()
+    display = DJProgressDisplayAdapter(translator, progress_view)
+    event_handlers[events.ProcessStarted] = [partial(inform_next_process_started, display=display)]
+    event_handlers[events.ProcessFinished] = [partial(inform_current_process_finished, display=display)]
+    event_handlers[events.BatchProcessingStarted] = [partial(inform_batch_processing_started, display=display)]
+    event_handlers[events.BatchProcessingFinished] = [partial(inform_batch_processing_finished, display=display)]
+    event_handlers[events.StateChanged] = [
+        partial(log_state_change, log=create_state_change_logger(translator, logger.info))
+    ]
+    event_handlers[events.InvalidOperationRequested] = [lambda event: None]
+
+    controller = DJController(bus, translator)
+
+    def create_heartbeat_connection() -> dj.Connection:
+        return create_dj_connection_factory(create_source_credential_provider(config.source_host))()
+
+    return create_local_endpoint(
+        controller,
+        tables,
+        progress_view,
+        heartbeat_connection=create_heartbeat_connection,
+        processes_sequentially=options.max_workers == 1,
+        close=executor.close,
+    )
@@ -0,0 +1,110 @@
+"""Contains functionality for recording how far incremental syncs have progressed."""
+from __future__ import annotations
+
+import hashlib
+import json
+from collections.abc import Callable, Mapping, Sequence
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Any, List, Optional
+from uuid import UUID
+
+from datajoint import Table
+
+from .sql import to_literal, to_native
+
+Mark = List[Any]
+"""The values of the tracked attributes of the greatest row considered by a sync."""
+
+_ENCODERS: tuple[tuple[type, str, Callable[[Any], str]], ...] = (
+    (datetime, "datetime", datetime.isoformat),
+    (date, "date", date.isoformat),
+    (time, "time", time.isoformat),
+    (timedelta, "timedelta", lambda value: repr(value.total_seconds())),
+    (Decimal, "decimal", str),
+    (UUID, "uuid", str),
+    (bytes, "bytes", bytes.hex),
+)
+"""Encoders of values that JSON can not represent keyed by their type. Subclasses must precede their bases."""
+
+_DECODERS: dict[str, Callable[[str], Any]] = {
+    "datetime": datetime.fromisoformat,
+    "date": date.fromisoformat,
+    "time": time.fromisoformat,
+    "timedelta": lambda value: timedelta(seconds=float(value)),
+    "decimal": Decimal,
+    "uuid": UUID,
+    "bytes": bytes.fromhex,
+}
+
+
+def create_sync_name(restriction: str, attrs: Sequence[str]) -> str:
+    """Create a name identifying the syncs of the given restriction that are tracked by the given attributes."""
+    return hashlib.md5("\x1f".join([restriction, *attrs]).encode()).hexdigest()
+
+
+def create_mark(row: Mapping[str, Any], attrs: Sequence[str]) -> Mark:
+    """Create a high-water mark from the values of the given attributes of the row."""
+    return [to_native(row[attr]) for attr in attrs]
+
+
+def to_row_literal(mark: Mark) -> str:
+    """Convert the mark into an escaped SQL row literal that can be compared with the tracked attributes."""
+    return "(" + ", ".join(to_literal(value) for value in mark) + ")"
+
+
+def encode_mark(mark: Mark) -> str:
+    """Encode the mark as JSON tagging values that JSON can not represent with their type."""
+
+    def encode(value: Any) -> Any:
+        if value is None or isinstance(value, (str, int, float)):
+            return value
+        for kind_type, kind, encode_kind in _ENCODERS:
+            if isinstance(value, kind_type):
+                return {kind: encode_kind(value)}
+        raise TypeError(f"Values of type {type(value).__name__} can not be used in high-water marks")
+
+    return json.dumps([encode(value) for value in mark])
+
+
+def decode_mark(encoded: str) -> Mark:
+    """Decode a mark encoded with encode_mark."""
+
+    def decode(value: Any) -> Any:
+        if not isinstance(value, dict):
+            return value
+        ((kind, text),) = value.items()
+        return _DECODERS[kind](text)
+
+    return [decode(value) for value in json.loads(encoded)]
+
+
+class HighWaterMarks:
+    """The high-water mark of an incremental sync recorded in the mark table.
+
+    The mark holds the greatest values of the tracked attributes that were considered by the previous sync. It is
+    stored as JSON and only turned into SQL literals when a query is built. The table also counts the syncs such that
+    a full reconciliation can be done periodically.
+    """
+
+    def __init__(self, table: Callable[[], Table], sync: str) -> None:
+        """Initialize the marks."""
+        self._table = table
+        self._sync = sync
+
+    def load(self) -> tuple[Optional[Mark], int]:
+        """Return the mark of the sync (if any) and the number of previous syncs."""
+        rows = (self._table() & {"sync": self._sync}).fetch(as_dict=True)
+        if not rows:
+            return None, 0
+        mark = rows[0]["mark"]
+        return decode_mark(mark) if mark is not None else None, rows[0]["n_syncs"]
+
+    def store(self, mark: Optional[Mark]) -> None:
+        """Record the given mark after a successful sync."""
+        table = self._table()
+        table.connection.query(
+            f"INSERT INTO {table.full_table_name} (sync, mark, n_syncs) VALUES (%s, %s, 1) "
+            "ON DUPLICATE KEY UPDATE mark = VALUES(mark), n_syncs = n_syncs + 1",
+            args=[self._sync, encode_mark(mark) if mark is not None else None],
+        )
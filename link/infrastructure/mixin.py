@@ -1,16 +1,28 @@
 """Contains mixins that add functionality to DataJoint tables."""
 from __future__ import annotations
 
-from collections.abc import Callable
-from typing import Sequence, cast
+import itertools
+import logging
+import math
+import time
+from collections.abc import Callable, Iterator
+from datetime import timedelta
+from typing import Optional, Sequence, cast
 
-from datajoint import Table
+from datajoint import Connection, Table
 
 from link.adapters.controller import DJController
 from link.adapters.custom_types import PrimaryKey
 from link.adapters.progress import ProgressView
+from link.service.executors import split_into_chunks
 
 from . import DJTables
+from .claims import OutboundClaims
+from .marks import HighWaterMarks, create_mark, create_sync_name, to_row_literal
+from .sharding import LeaseHeartbeat, ShardLeases, create_worker_name, group_by_shard
+from .sql import to_literal
+
+logger = logging.getLogger(__name__)
 
 
 class SourceEndpoint(Table):
@@ -18,29 +30,213 @@ class SourceEndpoint(Table):
 
     _controller: DJController
     _outbound_table: Callable[[], Table]
+    _lease_table: Callable[[], Table]
+    _mark_table: Callable[[], Table]
+    _heartbeat_connection: Callable[[], Connection]
     _progress_view: ProgressView
+    _processes_sequentially: bool
+
+    def pull(
+        self, *, display_progress: bool = False, exclude_settled: bool = True, page_size: Optional[int] = None
+    ) -> None:
+        """Pull unshared entities from the source table into the local table.
 
-    def pull(self, *, display_progress: bool = False) -> None:
-        """Pull unshared entities from the source table into the local table."""
+        Entities that are already shared, tainted or deprecated are not affected by pulling. They are excluded on
+        the source server by default such that only unshared entities and entities with an unfinished process are
+        processed. Pulling a restriction without such entities does nothing in that case. If exclude_settled is false
+        all entities in the restriction are processed and pulling an empty restriction raises NoEntitiesRequested.
+
+        If a page size is given the entities are pulled page by page in primary key order instead of all at once.
+        Each page is fetched using keyset pagination (i.e. it starts after the last primary key of the previous page)
+        such that pulling starts immediately and memory usage does not depend on the size of the table.
+        """
+        if page_size is not None and page_size < 1:
+            raise ValueError("page_size must be a positive integer")
         if display_progress:
             self._progress_view.enable()
-        primary_keys = self.proj().fetch(as_dict=True)
-        self._controller.pull(primary_keys)
+        self._pull(self._unsettled() if exclude_settled else self, page_size, require_entities=not exclude_settled)
+        self._progress_view.disable()
+
+    def sync(
+        self,
+        *,
+        column: Optional[str] = None,
+        reconcile_every: int = 10,
+        page_size: Optional[int] = None,
+        display_progress: bool = False,
+    ) -> int:
+        """Pull unsettled entities that were added to the source table since the previous sync.
+
+        Each sync records a high-water mark in the mark table: the greatest primary key (or the greatest value of the
+        given column, e.g. an insertion timestamp) among the entities it considered. The next sync of the same
+        restriction only considers entities beyond that mark. Entities that end up behind the mark (e.g. because
+        their primary key is not increasing) are picked up by a full sync which is done every reconcile_every syncs.
+        Returns the number of pulled entities.
+        """
+        if reconcile_every < 1:
+            raise ValueError("reconcile_every must be a positive integer")
+        if page_size is not None and page_size < 1:
+            raise ValueError("page_size must be a positive integer")
+        attrs = [column] if column is not None else list(self.primary_key)
+        marks = HighWaterMarks(self._mark_table, create_sync_name(self.where_clause(), attrs))
+        mark, n_syncs = marks.load()
+        considered = self
+        if mark is not None and n_syncs % reconcile_every != 0:
+            columns = ", ".join(f"`{attr}`" for attr in attrs)
+            considered = self & f"({columns}) {'>=' if column is not None else '>'} {to_row_literal(mark)}"
+        latest = considered.proj(*attrs if column is not None else []).fetch(
+            as_dict=True, order_by=[f"`{attr}` DESC" for attr in attrs], limit=1
+        )
+        if latest:
+            mark = create_mark(latest[0], attrs)
+        if display_progress:
+            self._progress_view.enable()
+        n_pulled = self._pull(considered._unsettled(), page_size)
+        self._progress_view.disable()
+        marks.store(mark)
+        return n_pulled
+
+    def pull_claimed(self, *, batch_size: int = 100, display_progress: bool = False) -> None:
+        """Pull unsettled entities as one of possibly many workers that pull the same restriction concurrently.
+
+        Unshared entities are first reserved by starting their pull processes. Each worker then repeatedly claims a
+        batch of entities with an unfinished pull process by locking their rows in the outbound table and pulls it while
+        holding the locks. Rows locked by other workers are skipped such that no worker waits for or duplicates the
+        work of another. This method returns once no unclaimed entities with an unfinished pull process are left.
+        Claimed batches are pulled using the connection holding the locks so the link must use a single worker.
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be a positive integer")
+        if not self._processes_sequentially:
+            raise RuntimeError("Claimed pulls require a link that processes chunks sequentially (max_workers=1)")
+        if display_progress:
+            self._progress_view.enable()
+        unshared = (self - self._outbound_table().proj()).proj().fetch(as_dict=True)
+        if unshared:
+            self._controller.reserve(unshared)
+        claims = OutboundClaims(self._outbound_table, self)
+        while True:
+            with claims.claim(batch_size) as batch:
+                if batch:
+                    self._controller.pull(batch)
+            if not batch:
+                break
         self._progress_view.disable()
 
+    def _pull(self, restriction: Table, page_size: Optional[int], *, require_entities: bool = False) -> int:
+        if page_size is None:
+            primary_keys = restriction.proj().fetch(as_dict=True)
+            if primary_keys or require_entities:
+                self._controller.pull(primary_keys)
+            return len(primary_keys)
+        n_pulled = 0
+        for page in self._paginate(restriction, page_size):
+            self._controller.pull(page)
+            n_pulled += len(page)
+        if not n_pulled and require_entities:
+            self._controller.pull([])
+        return n_pulled
+
+    def _paginate(self, restriction: Table, page_size: int) -> Iterator[Sequence[PrimaryKey]]:
+        attrs = list(self.primary_key)
+        columns = ", ".join(f"`{attr}`" for attr in attrs)
+        n_pages = math.ceil(len(restriction) / page_size)
+        last: PrimaryKey | None = None
+        for number in itertools.count(1):
+            page = restriction
+            if last is not None:
+                page = page & f"({columns}) > ({', '.join(to_literal(last[attr]) for attr in attrs)})"
+            primary_keys = page.proj().fetch(as_dict=True, order_by=attrs, limit=page_size)
+            if not primary_keys:
+                return
+            logger.info(f"Pulling page {number} of approximately {max(n_pages, number)}")
+            yield primary_keys
+            last = primary_keys[-1]
+
+    def pull_shards(  # noqa: PLR0913
+        self,
+        *,
+        run: str,
+        n_shards: int,
+        lease_duration: timedelta = timedelta(minutes=10),
+        batch_size: int = 1000,
+        poll_interval: float = 10,
+        display_progress: bool = False,
+    ) -> None:
+        """Pull unshared entities as one of possibly many workers that share the work by splitting it into shards.
+
+        All workers taking part in the same pull must use the same run name and number of shards. Each worker claims
+        shards by leasing them in the lease table and pulls the unsettled entities belonging to them in batches of the
+        given size. While a shard is processed its lease is renewed by a heartbeat on a separate connection every third
+        of the lease duration and the worker stops processing the shard before the next batch once the lease was lost.
+        Leases that are not renewed in time (e.g. because the worker crashed) expire allowing other workers to pick
+        the shard up. This method returns once all shards are done. The leases of finished runs are kept until they
+        are deleted with clear_shards such that pulling a finished run again does nothing.
+        """
+        if display_progress:
+            self._progress_view.enable()
+        worker = create_worker_name()
+        leases = ShardLeases(self._lease_table, run, n_shards, lease_duration, worker)
+        if leases.are_done():
+            logger.warning(f"Sharded pull {run!r} already finished, delete its leases with clear_shards to repeat it")
+        pending = group_by_shard(self._unsettled().proj().fetch(as_dict=True), n_shards)
+        heartbeat_connection = self._heartbeat_connection()
+        heartbeat_leases = ShardLeases(
+            self._lease_table, run, n_shards, lease_duration, worker, connection=heartbeat_connection
+        )
+        try:
+            while not leases.are_done():
+                shard = leases.claim()
+                if shard is None:
+                    time.sleep(poll_interval)
+                    continue
+                with LeaseHeartbeat(heartbeat_leases, shard, lease_duration.total_seconds() / 3) as heartbeat:
+                    for batch in split_into_chunks(pending[shard], batch_size):
+                        if not heartbeat.is_held or not leases.renew(shard):
+                            break
+                        self._controller.pull(batch)
+                    else:
+                        leases.complete(shard)
+        finally:
+            heartbeat_connection.close()
+            self._progress_view.disable()
+
+    def clear_shards(self, *, run: str) -> None:
+        """Delete the leases of the given sharded pull such that its run name can be reused."""
+        (self._lease_table() & {"run": run}).delete_quick()
+
+    def _unsettled(self) -> Table:
+        return self - (self._outbound_table() & "process = 'NONE'").proj()
+
     @property
     def flagged(self) -> Sequence[PrimaryKey]:
         """Return the primary keys of all flagged entities."""
         return (self._outbound_table() & "is_flagged = 'TRUE'").proj().fetch(as_dict=True)
 
+    @property
+    def pending_deletes(self) -> Table:
+        """Return the outbound rows of flagged entities in the restriction that were not yet deleted locally.
+
+        The rows are not fetched such that they can be counted on the server.
+        """
+        return self._outbound_table() & self.proj() & "is_flagged = 'TRUE'" & "is_deprecated = 'FALSE'"
 
-def create_source_endpoint_factory(
+
+def create_source_endpoint_factory(  # noqa: PLR0913
     controller: DJController,
     source_table: Callable[[], Table],
     outbound_table: Callable[[], Table],
+    lease_table: Callable[[], Table],
+    mark_table: Callable[[], Table],
     progress_view: ProgressView,
+    *,
+    heartbeat_connection: Callable[[], Connection],
+    processes_sequentially: bool = True,
 ) -> Callable[[], SourceEndpoint]:
-    """Create a callable that returns the source endpoint when called."""
+    """Create a callable that returns the source endpoint when called.
+
+    Each call of heartbeat_connection must return a new connection to the source server that is not used elsewhere.
+    """
 
     def create_source_endpoint() -> SourceEndpoint:
         source_table_cls = type(source_table())
@@ -52,7 +248,11 @@ def create_source_endpoint_factory(
                 {
                     "_controller": controller,
                     "_outbound_table": staticmethod(outbound_table),
+                    "_lease_table": staticmethod(lease_table),
+                    "_mark_table": staticmethod(mark_table),
+                    "_heartbeat_connection": staticmethod(heartbeat_connection),
                     "_progress_view": progress_view,
+                    "_processes_sequentially": processes_sequentially,
                 },
             )(),
         )
@@ -66,6 +266,7 @@ class LocalEndpoint(Table):
     _controller: DJController
     _source: Callable[[], SourceEndpoint]
     _progress_view: ProgressView
+    _close: Callable[[], None]
 
     def delete(self, *, display_progress: bool = False) -> None:
         """Delete shared entities from the local table."""
@@ -80,9 +281,19 @@ class LocalEndpoint(Table):
         """Return the source endpoint."""
         return self._source()
 
+    def close(self) -> None:
+        """Shut down the worker threads of the link and close their database connections."""
+        self._close()
 
-def create_local_endpoint(
-    controller: DJController, tables: DJTables, progress_view: ProgressView
+
+def create_local_endpoint(  # noqa: PLR0913
+    controller: DJController,
+    tables: DJTables,
+    progress_view: ProgressView,
+    *,
+    heartbeat_connection: Callable[[], Connection],
+    processes_sequentially: bool = True,
+    close: Callable[[], None] = lambda: None,
 ) -> type[LocalEndpoint]:
     """Create the local endpoint."""
     return cast(
@@ -96,9 +307,19 @@ def create_local_endpoint(
             {
                 "_controller": controller,
                 "_source": staticmethod(
-                    create_source_endpoint_factory(controller, tables.source, tables.outbound, progress_view),
+                    create_source_endpoint_factory(
+                        controller,
+                        tables.source,
+                        tables.outbound,
+                        tables.lease,
+                        tables.mark,
+                        progress_view,
+                        heartbeat_connection=heartbeat_connection,
+                        processes_sequentially=processes_sequentially,
+                    ),
                 ),
                 "_progress_view": progress_view,
+                "_close": staticmethod(close),
             },
         ),
     )
@@ -0,0 +1,63 @@
+"""Contains functionality for pulling multiple linked tables in the order of their dependencies."""
+from __future__ import annotations
+
+import threading
+from collections.abc import Iterable
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Optional
+
+from .mixin import SourceEndpoint
+
+
+def pull_tables(
+    sources: Iterable[SourceEndpoint], *, max_pulls_per_server: int = 2, page_size: Optional[int] = None
+) -> None:
+    """Pull the given (restricted) source endpoints concurrently in the order of their foreign keys.
+
+    A table is pulled once all of its ancestors among the given tables are pulled. Independent tables are pulled
+    concurrently with at most max_pulls_per_server tables being pulled from the same source server at once. Tables
+    sharing their connections (e.g. because they were linked together with the same connections) are pulled one after
+    another because DataJoint connections must not be used by multiple threads at once. A pull only takes up one of the
+    slots of its server once its connections are free. If a pull fails no further pulls are started and the error is
+    raised once all running pulls finished. Each table may only be given once.
+    """
+    if max_pulls_per_server < 1:
+        raise ValueError("max_pulls_per_server must be a positive integer")
+    endpoints: dict[str, SourceEndpoint] = {}
+    for source in sources:
+        if source.full_table_name in endpoints:
+            raise ValueError(f"{source.full_table_name} is given more than once, combine its restrictions instead")
+        endpoints[source.full_table_name] = source
+    dependencies = {
+        name: {ancestor for ancestor in source.ancestors() if ancestor in endpoints and ancestor != name}
+        for name, source in endpoints.items()
+    }
+    servers = {
+        source.connection.conn_info["host"]: threading.Semaphore(max_pulls_per_server) for source in endpoints.values()
+    }
+    connections = {id(source.connection): threading.Lock() for source in endpoints.values()}
+
+    def pull(source: SourceEndpoint) -> None:
+        with connections[id(source.connection)], servers[source.connection.conn_info["host"]]:
+            source.pull(page_size=page_size)
+
+    pulled: set[str] = set()
+    running: dict[Future[None], str] = {}
+    error: Optional[BaseException] = None
+    with ThreadPoolExecutor(max_workers=max(len(endpoints), 1), thread_name_prefix="link-pull") as pool:
+        while dependencies or running:
+            for name in [name for name, ancestors in dependencies.items() if ancestors <= pulled]:
+                del dependencies[name]
+                running[pool.submit(pull, endpoints[name])] = name
+            if not running:
+                raise RuntimeError("The dependencies between the tables contain a cycle")
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                if future.exception() is None:
+                    pulled.add(name)
+                elif error is None:
+                    error = future.exception()
+                    dependencies.clear()
+    if error is not None:
+        raise error
@@ -2,8 +2,11 @@
 from __future__ import annotations
 
 import collections
-from collections.abc import MutableSequence
-from typing import TYPE_CHECKING, Callable, Iterable, Iterator, TypeVar
+import threading
+from collections.abc import Generator, MutableSequence
+from contextlib import contextmanager
+from queue import Empty, Queue
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator, Tuple, TypeVar
 
 if TYPE_CHECKING:
     UserList = collections.UserList
@@ -43,3 +46,58 @@ def create_content_replacer(sequence: MutableSequence[_V]) -> Callable[[Iterable
         sequence.extend(new)
 
     return replace_contents
+
+
+_Slot = Tuple[bool, Any]
+
+
+@contextmanager
+def prefetch(
+    iterable: Iterable[_V], *, depth: int, discard: Callable[[_V], None] = lambda item: None
+) -> Iterator[Iterator[_V]]:
+    """Iterate over the given iterable in a background thread while the returned iterator is being consumed.
+
+    At most depth items are buffered between the background thread and the consumer. The background thread blocks
+    while the buffer is full. Exceptions raised while iterating are re-raised by the returned iterator. On exit the
+    background thread is stopped and the discard callback is invoked for all produced items that were not consumed.
+    """
+    buffer: Queue[_Slot] = Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def produce() -> None:
+        try:
+            for item in iterable:
+                buffer.put((True, item))
+                if stop.is_set():
+                    return
+            buffer.put((False, None))
+        except BaseException as exception:
+            buffer.put((False, exception))
+        finally:
+            if isinstance(iterable, Generator):
+                iterable.close()
+
+    def consume() -> Iterator[_V]:
+        while True:
+            is_item, value = buffer.get()
+            if not is_item:
+                if value is not None:
+                    raise value
+                return
+            yield value
+
+    producer = threading.Thread(target=produce, name="link-prefetch", daemon=True)
+    producer.start()
+    try:
+        yield consume()
+    finally:
+        stop.set()
+        while producer.is_alive() or not buffer.empty():
+            try:
+                is_item, value = buffer.get(timeout=0.1)
+            except Empty:
+                pass
+            else:
+                if is_item:
+                    discard(value)
+        producer.join()
@@ -0,0 +1,184 @@
+"""Contains functionality for splitting pulls across multiple worker processes."""
+from __future__ import annotations
+
+import logging
+import os
+import socket
+import threading
+import zlib
+from collections.abc import Callable, Iterable
+from datetime import timedelta
+from types import TracebackType
+from typing import Any, Optional
+from uuid import uuid4
+
+from datajoint import Connection, Table
+
+from link.adapters.custom_types import PrimaryKey
+from link.adapters.identification import derive_identifier
+
+logger = logging.getLogger(__name__)
+
+
+def shard_of(primary_key: PrimaryKey, n_shards: int) -> int:
+    """Return the shard the entity with the given primary key belongs to.
+
+    The shard is derived from the identifier of the primary key and is therefore the same in every process.
+    """
+    return derive_identifier(primary_key) % n_shards
+
+
+def group_by_shard(primary_keys: Iterable[PrimaryKey], n_shards: int) -> dict[int, list[PrimaryKey]]:
+    """Group the given primary keys by their shards."""
+    groups: dict[int, list[PrimaryKey]] = {shard: [] for shard in range(n_shards)}
+    for primary_key in primary_keys:
+        groups[shard_of(primary_key, n_shards)].append(primary_key)
+    return groups
+
+
+def create_worker_name() -> str:
+    """Create a name that uniquely identifies the current worker across hosts."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+
+
+class ShardLeases:
+    """Leases on the shards of a sharded pull recorded in the lease table.
+
+    A worker may only process a shard while it holds a lease on it. Leases expire unless they are renewed such that
+    shards claimed by crashed workers can be picked up by other workers. The database server's clock is used for all
+    expiration times so that workers on different hosts agree on them. Queries are executed on the given connection
+    (if any) instead of the connection of the lease table.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        table: Callable[[], Table],
+        run: str,
+        n_shards: int,
+        duration: timedelta,
+        worker: str,
+        *,
+        connection: Optional[Connection] = None,
+    ) -> None:
+        """Initialize the leases."""
+        self._table = table
+        self._run = run
+        self._n_shards = n_shards
+        self._duration = duration
+        self._worker = worker
+        self._connection = connection
+
+    def claim(self) -> int | None:
+        """Claim an unfinished shard that is not leased by another worker and return it (if one is available)."""
+        start = zlib.crc32(self._worker.encode()) % self._n_shards
+        for offset in range(self._n_shards):
+            shard = (start + offset) % self._n_shards
+            if self.__try_insert(shard) or self.__try_take_over(shard):
+                return shard
+        return None
+
+    def renew(self, shard: int) -> bool:
+        """Extend the lease on the given shard and return whether it is still held by this worker."""
+        self.__query(
+            "UPDATE {table} SET expires = NOW() + INTERVAL %s SECOND WHERE run = %s AND shard = %s AND worker = %s",
+            self._seconds,
+            self._run,
+            shard,
+            self._worker,
+        )
+        # MySQL does not count rows whose values did not change as affected so we have to check the owner explicitly
+        cursor = self.__query(
+            "SELECT COUNT(*) FROM {table} WHERE run = %s AND shard = %s AND worker = %s", self._run, shard, self._worker
+        )
+        return bool(cursor.fetchone()[0] == 1)
+
+    def complete(self, shard: int) -> None:
+        """Mark the given shard as finished."""
+        self.__execute(
+            "UPDATE {table} SET is_done = 'TRUE' WHERE run = %s AND shard = %s AND worker = %s",
+            self._run,
+            shard,
+            self._worker,
+        )
+
+    def are_done(self) -> bool:
+        """Return whether all shards of the run have been finished."""
+        return len(self._table() & {"run": self._run} & "is_done = 'TRUE'") == self._n_shards
+
+    @property
+    def _seconds(self) -> int:
+        return int(self._duration.total_seconds())
+
+    def __try_insert(self, shard: int) -> bool:
+        return self.__execute(
+            "INSERT IGNORE INTO {table} (run, shard, worker, is_done, expires) "
+            "VALUES (%s, %s, %s, 'FALSE', NOW() + INTERVAL %s SECOND)",
+            self._run,
+            shard,
+            self._worker,
+            self._seconds,
+        )
+
+    def __try_take_over(self, shard: int) -> bool:
+        return self.__execute(
+            "UPDATE {table} SET worker = %s, expires = NOW() + INTERVAL %s SECOND "
+            "WHERE run = %s AND shard = %s AND is_done = 'FALSE' AND expires < NOW()",
+            self._worker,
+            self._seconds,
+            self._run,
+            shard,
+        )
+
+    def __execute(self, query: str, *args: object) -> bool:
+        """Execute the query and return whether exactly one row was affected."""
+        return bool(self.__query(query, *args).rowcount == 1)
+
+    def __query(self, query: str, *args: object) -> Any:
+        table = self._table()
+        connection = self._connection if self._connection is not None else table.connection
+        return connection.query(query.format(table=table.full_table_name), args=args)
+
+
+class LeaseHeartbeat:
+    """Renews the lease on a shard from a background thread while the shard is being processed.
+
+    The lease stays alive even if processing a single batch takes longer than the lease duration. The given leases
+    must use their own connection because DataJoint connections must not be used by multiple threads at once. Once a
+    renewal finds that the lease was taken over by another worker the heartbeat stops and the lease is reported as
+    lost.
+    """
+
+    def __init__(self, leases: ShardLeases, shard: int, interval: float) -> None:
+        """Initialize the heartbeat."""
+        self._leases = leases
+        self._shard = shard
+        self._interval = interval
+        self._stopped = threading.Event()
+        self._lost = threading.Event()
+        self._thread = threading.Thread(target=self._beat, name="link-lease-heartbeat", daemon=True)
+
+    @property
+    def is_held(self) -> bool:
+        """Return whether the lease is still held by this worker."""
+        return not self._lost.is_set()
+
+    def __enter__(self) -> LeaseHeartbeat:
+        """Start renewing the lease."""
+        self._thread.start()
+        return self
+
+    def __exit__(
+        self, exc_type: type[BaseException] | None, exc: BaseException | None, traceback: TracebackType | None
+    ) -> None:
+        """Stop renewing the lease."""
+        self._stopped.set()
+        self._thread.join()
+
+    def _beat(self) -> None:
+        while not self._stopped.wait(self._interval):
+            try:
+                if not self._leases.renew(self._shard):
+                    self._lost.set()
+                    return
+            except Exception:
+                logger.exception(f"Renewing the lease on shard {self._shard} failed")
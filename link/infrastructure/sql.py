@@ -0,0 +1,25 @@
+"""Contains helpers for building SQL queries."""
+from __future__ import annotations
+
+from numbers import Integral, Real
+from typing import Any
+from uuid import UUID
+
+
+def to_native(value: Any) -> Any:
+    """Convert numbers (e.g. NumPy scalars) to their native Python equivalents."""
+    if isinstance(value, bool) or not isinstance(value, Real):
+        return value
+    return int(value) if isinstance(value, Integral) else float(value)
+
+
+def to_literal(value: Any) -> str:
+    """Convert the value of a primary key attribute into an escaped SQL literal."""
+    value = to_native(value)
+    if isinstance(value, (int, float)):
+        return repr(value)
+    if isinstance(value, UUID):
+        return f"X'{value.bytes.hex()}'"
+    if isinstance(value, bytes):
+        return f"X'{value.hex()}'"
+    return "'" + str(value).replace("\\", "\\\\").replace("'", "\\'") + "'"
@@ -0,0 +1,49 @@
+"""Contains functionality for restricting tables to large sets of primary keys."""
+from __future__ import annotations
+
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from typing import TYPE_CHECKING
+from uuid import uuid4
+
+from link.adapters import PrimaryKey
+from link.service.executors import split_into_chunks
+
+from .sql import to_native
+
+if TYPE_CHECKING:
+    from .facade import Table
+
+ROWS_PER_INSERT = 1000
+
+
+@contextmanager
+def restrict(table: Table, primary_keys: Sequence[PrimaryKey], *, threshold: int, schema: str) -> Iterator[Table]:
+    """Restrict the table to the given primary keys.
+
+    Up to threshold primary keys are passed to DataJoint directly which renders them into the WHERE clause of the
+    query. Larger sets of primary keys are bulk-inserted into a temporary table in the given schema (on the table's
+    connection) instead and the table is restricted by a sub-query on the temporary table. The temporary table is
+    dropped on exit.
+    """
+    if len(primary_keys) <= threshold:
+        yield table & primary_keys
+        return
+    attrs = list(primary_keys[0])
+    columns = ", ".join(f"`{attr}`" for attr in attrs)
+    staging_table = f"{schema}.`#staged_keys_{uuid4().hex}`"
+    connection = table.connection
+    connection.query(
+        f"CREATE TEMPORARY TABLE {staging_table} (PRIMARY KEY ({columns})) "
+        f"SELECT {columns} FROM {table.full_table_name} LIMIT 0"
+    )
+    try:
+        for chunk in split_into_chunks(primary_keys, ROWS_PER_INSERT):
+            placeholders = ", ".join(["(" + ", ".join(["%s"] * len(attrs)) + ")"] * len(chunk))
+            connection.query(
+                f"INSERT IGNORE INTO {staging_table} ({columns}) VALUES {placeholders}",
+                args=[to_native(key[attr]) for key in chunk for attr in attrs],
+            )
+        yield table & f"({columns}) IN (SELECT {columns} FROM {staging_table})"
+    finally:
+        connection.query(f"DROP TEMPORARY TABLE IF EXISTS {staging_table}")
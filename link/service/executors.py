@@ -0,0 +1,150 @@
+"""Contains executors that control how chunks of entities are processed."""
+from __future__ import annotations
+
+import threading
+from abc import ABC, abstractmethod
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from itertools import islice
+from typing import List, Tuple, TypeVar
+
+from link.domain import events
+from link.domain.batch import EntityBatch
+from link.domain.custom_types import Identifier
+
+from .uow import UnitOfWork
+
+ProcessedChunk = Tuple[List[Identifier], List[events.Event]]
+
+_T = TypeVar("_T")
+
+
+def split_into_chunks(iterable: Iterable[_T], size: int) -> Iterator[list[_T]]:
+    """Split the given iterable into consecutive chunks containing at most the given number of items."""
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def process_chunk(
+    uow: UnitOfWork, chunk: list[Identifier], operation: Callable[[EntityBatch], None]
+) -> list[events.Event]:
+    """Apply the operation to the entities in the chunk as a batch within one unit of work and return its events."""
+    with uow:
+        operation(uow.create_batch(chunk))
+        uow.commit()
+    return list(uow.collect_new_events())
+
+
+class ChunkExecutor(ABC):
+    """Processes chunks of entities."""
+
+    @abstractmethod
+    def execute(
+        self, chunks: Iterable[list[Identifier]], operation: Callable[[EntityBatch], None]
+    ) -> Iterator[ProcessedChunk]:
+        """Process the chunks yielding each chunk together with its events in the order the chunks were given.
+
+        Processing stops with the first chunk that fails and the corresponding exception is raised once all chunks
+        before it (and all other chunks that were committed in the meantime) have been yielded.
+        """
+
+    def close(self) -> None:
+        """Release the resources held by the executor."""
+
+
+class SequentialChunkExecutor(ChunkExecutor):
+    """Processes chunks one after another using a single unit of work."""
+
+    def __init__(self, uow: UnitOfWork) -> None:
+        """Initialize the executor."""
+        self._uow = uow
+
+    def execute(
+        self, chunks: Iterable[list[Identifier]], operation: Callable[[EntityBatch], None]
+    ) -> Iterator[ProcessedChunk]:
+        """Process the chunks one after another."""
+        for chunk in chunks:
+            yield chunk, process_chunk(self._uow, chunk, operation)
+
+
+class ThreadedChunkExecutor(ChunkExecutor):
+    """Processes chunks concurrently using a bounded pool of worker threads.
+
+    Each worker thread lazily creates its own unit of work (and therefore its own database connections) and reuses it
+    for all chunks it processes. At most max_workers chunks are submitted at once. Once a chunk fails no further chunks
+    are submitted but the chunks that are already being processed are finished and yielded if they were committed.
+    Closing the executor shuts the worker threads down and passes each unit of work to the release callback (e.g. to
+    close its database connections).
+    """
+
+    def __init__(
+        self,
+        create_uow: Callable[[], UnitOfWork],
+        max_workers: int,
+        *,
+        release: Callable[[UnitOfWork], None] = lambda uow: None,
+    ) -> None:
+        """Initialize the executor."""
+        self._create_uow = create_uow
+        self._max_workers = max_workers
+        self._release = release
+        self._pool: ThreadPoolExecutor | None = None
+        self._local = threading.local()
+        self._uows: list[UnitOfWork] = []
+        self._lock = threading.Lock()
+
+    def execute(
+        self, chunks: Iterable[list[Identifier]], operation: Callable[[EntityBatch], None]
+    ) -> Iterator[ProcessedChunk]:
+        """Process the chunks concurrently."""
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="link-worker")
+        pool = self._pool
+        remaining = iter(chunks)
+        pending: deque[Future[ProcessedChunk]] = deque()
+
+        def submit_next() -> None:
+            chunk = next(remaining, None)
+            if chunk is not None:
+                pending.append(pool.submit(self._process_chunk, chunk, operation))
+
+        for _ in range(self._max_workers):
+            submit_next()
+        error: Exception | None = None
+        try:
+            while pending:
+                future = pending.popleft()
+                try:
+                    processed = future.result()
+                except Exception as exception:
+                    error = error or exception
+                    continue
+                if error is None:
+                    submit_next()
+                yield processed
+        finally:
+            wait(pending)
+        if error is not None:
+            raise error
+
+    def close(self) -> None:
+        """Shut the worker threads down and release their units of work."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+        with self._lock:
+            uows, self._uows = self._uows, []
+        self._local = threading.local()
+        for uow in uows:
+            self._release(uow)
+
+    def _process_chunk(self, chunk: list[Identifier], operation: Callable[[EntityBatch], None]) -> ProcessedChunk:
+        try:
+            uow = self._local.uow
+        except AttributeError:
+            uow = self._local.uow = self._create_uow()
+            with self._lock:
+                self._uows.append(uow)
+        return chunk, process_chunk(uow, chunk, operation)
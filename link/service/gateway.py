@@ -16,6 +16,10 @@ class LinkGateway(ABC):
     def create_entity(self, identifier: Identifier) -> Entity:
         """Create a entity instance from persistent data."""
 
+    @abstractmethod
+    def create_entities(self, identifiers: Iterable[Identifier]) -> list[Entity]:
+        """Create entity instances from persistent data in bulk."""
+
     @abstractmethod
     def apply(self, updates: Iterable[events.StateChanged]) -> None:
         """Apply updates to the link's persistent data."""
@@ -4,9 +4,11 @@ from __future__ import annotations
 from collections.abc import Callable
 
 from link.domain import commands, events
+from link.domain.batch import EntityBatch
 from link.domain.state import Processes
 
 from . import ensure
+from .executors import ChunkExecutor, split_into_chunks
 from .messagebus import MessageBus
 from .progress import ProgessDisplay
 from .uow import UnitOfWork
@@ -30,24 +32,57 @@ def delete_entity(command: commands.DeleteEntity, *, uow: UnitOfWork, message_bu
     message_bus.handle(events.ProcessFinished(Processes.DELETE, command.requested))
 
 
-def pull(command: commands.PullEntities, *, message_bus: MessageBus) -> None:
-    """Pull entities across the link."""
+def pull(command: commands.PullEntities, *, executor: ChunkExecutor, message_bus: MessageBus, chunk_size: int) -> None:
+    """Pull entities across the link in chunks of the given size."""
     ensure.requests_entities(command)
     message_bus.handle(events.BatchProcessingStarted(Processes.PULL, command.requested))
-    for identifier in command.requested:
-        message_bus.handle(commands.PullEntity(identifier))
+    _process_in_chunks(
+        command, Processes.PULL, EntityBatch.pull, executor=executor, message_bus=message_bus, size=chunk_size
+    )
     message_bus.handle(events.BatchProcessingFinished(Processes.PULL, command.requested))
 
 
-def delete(command: commands.DeleteEntities, *, message_bus: MessageBus) -> None:
-    """Delete shared entities."""
+def delete(
+    command: commands.DeleteEntities, *, executor: ChunkExecutor, message_bus: MessageBus, chunk_size: int
+) -> None:
+    """Delete shared entities in chunks of the given size."""
     ensure.requests_entities(command)
     message_bus.handle(events.BatchProcessingStarted(Processes.DELETE, command.requested))
-    for identifier in command.requested:
-        message_bus.handle(commands.DeleteEntity(identifier))
+    _process_in_chunks(
+        command, Processes.DELETE, EntityBatch.delete, executor=executor, message_bus=message_bus, size=chunk_size
+    )
     message_bus.handle(events.BatchProcessingFinished(Processes.DELETE, command.requested))
 
 
+def reserve(
+    command: commands.ReserveEntities, *, executor: ChunkExecutor, message_bus: MessageBus, chunk_size: int
+) -> None:
+    """Start the pull processes of entities in chunks of the given size such that they can be pulled later."""
+    ensure.requests_entities(command)
+    message_bus.handle(events.BatchProcessingStarted(Processes.PULL, command.requested))
+    _process_in_chunks(
+        command, Processes.PULL, EntityBatch.start_pull, executor=executor, message_bus=message_bus, size=chunk_size
+    )
+    message_bus.handle(events.BatchProcessingFinished(Processes.PULL, command.requested))
+
+
+def _process_in_chunks(  # noqa: PLR0913
+    command: commands.BatchCommand,
+    process: Processes,
+    operation: Callable[[EntityBatch], None],
+    *,
+    executor: ChunkExecutor,
+    message_bus: MessageBus,
+    size: int,
+) -> None:
+    for chunk, chunk_events in executor.execute(split_into_chunks(command.requested, size), operation):
+        for event in chunk_events:
+            message_bus.handle(event)
+        for identifier in chunk:
+            message_bus.handle(events.ProcessStarted(process, identifier))
+            message_bus.handle(events.ProcessFinished(process, identifier))
+
+
 def log_state_change(event: events.StateChanged, log: Callable[[events.StateChanged], None]) -> None:
     """Log the state change of an entity."""
     log(event)
@@ -2,11 +2,12 @@
 from __future__ import annotations
 
 from abc import ABC
-from collections import deque
+from collections import defaultdict, deque
 from types import TracebackType
-from typing import Callable, Iterator
+from typing import Callable, Iterable, Iterator
 
 from link.domain import events
+from link.domain.batch import EntityBatch
 from link.domain.custom_types import Identifier
 from link.domain.state import TRANSITION_MAP, Entity, Operations, Transition
 
@@ -22,24 +23,41 @@ class UnitOfWork(ABC):
         self._entities: LinkGateway | None = None
         self._updates: deque[events.StateChanged] = deque()
         self._events: deque[events.Event] = deque()
-        self._seen: list[Entity] = []
+        self._seen: dict[Identifier, Entity] = {}
+        self._batches: list[EntityBatch] = []
 
     def _augment_gateway(self, gateway: LinkGateway) -> LinkGateway:
+        self._create_untracked_entities = getattr(gateway, "create_entities")
+
         def augment_create_entity(original: Callable[[Identifier], Entity]) -> Callable[[Identifier], Entity]:
             def augmented(identifier: Identifier) -> Entity:
                 entity = original(identifier)
-                if entity not in self._seen:
-                    self._seen.append(entity)
-                self._augment_entity(entity)
+                self._track_entity(entity)
                 return entity
 
             return augmented
 
-        original = getattr(gateway, "create_entity")
-        augmented = augment_create_entity(original)
-        setattr(gateway, "create_entity", augmented)
+        def augment_create_entities(
+            original: Callable[[Iterable[Identifier]], list[Entity]]
+        ) -> Callable[[Iterable[Identifier]], list[Entity]]:
+            def augmented(identifiers: Iterable[Identifier]) -> list[Entity]:
+                entities = original(identifiers)
+                for entity in entities:
+                    self._track_entity(entity)
+                return entities
+
+            return augmented
+
+        setattr(gateway, "create_entity", augment_create_entity(getattr(gateway, "create_entity")))
+        setattr(gateway, "create_entities", augment_create_entities(getattr(gateway, "create_entities")))
         return gateway
 
+    def _track_entity(self, entity: Entity) -> None:
+        if self._seen.get(entity.identifier) is entity:
+            return
+        self._seen.setdefault(entity.identifier, entity)
+        self._augment_entity(entity)
+
     def _augment_entity(self, entity: Entity) -> None:
         def augment_entity_apply(
             entity: Entity, original: Callable[[Operations], None]
@@ -83,25 +101,56 @@ class UnitOfWork(ABC):
             raise RuntimeError("Not available outside of context")
         return self._entities
 
+    def create_batch(self, identifiers: Iterable[Identifier]) -> EntityBatch:
+        """Create a batch of the entities with the given identifiers whose updates are persisted on commit."""
+        if self._entities is None:
+            raise RuntimeError("Not available outside of context")
+        batch = EntityBatch.from_entities(self._create_untracked_entities(identifiers))
+        self._batches.append(batch)
+        return batch
+
     def commit(self) -> None:
         """Persist updates made to the link."""
         if self._entities is None:
             raise RuntimeError("Not available outside of context")
-        while self._updates:
-            self._gateway.apply([self._updates.popleft()])
-        for entity in self._seen:
+        for batch in self._batches:
+            self._updates.extend(event for event in batch.events if isinstance(event, events.StateChanged))
+        for wave in self._group_updates_into_waves():
+            self._gateway.apply(wave)
+        for entity in self._seen.values():
             while entity.events:
                 self._events.append(entity.events.popleft())
+        for batch in self._batches:
+            while batch.events:
+                self._events.append(batch.events.popleft())
         self.rollback()
 
+    def _group_updates_into_waves(self) -> list[list[events.StateChanged]]:
+        """Group the pending updates such that the n-th wave contains the n-th update of each entity.
+
+        Applying the waves in order preserves the order of updates per entity while allowing the gateway to persist
+        all updates that share a command with a single operation.
+        """
+        waves: list[list[events.StateChanged]] = []
+        counts: dict[Identifier, int] = defaultdict(int)
+        while self._updates:
+            update = self._updates.popleft()
+            index = counts[update.identifier]
+            counts[update.identifier] += 1
+            if index == len(waves):
+                waves.append([])
+            waves[index].append(update)
+        return waves
+
     def rollback(self) -> None:
         """Throw away any not yet persisted updates."""
         if self._entities is None:
             raise RuntimeError("Not available outside of context")
-        for entity in self._seen:
+        for entity in self._seen.values():
             setattr(entity, "_is_expired", True)
         self._updates.clear()
         self._seen.clear()
+        self._batches.clear()
 
     def collect_new_events(self) -> Iterator[events.Event]:
         """Collect new events from entities."""
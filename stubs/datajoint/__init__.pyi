@@ -1,8 +1,10 @@
 from collections import UserList
-from collections.abc import Mapping, MutableMapping
+from collections.abc import Mapping, MutableMapping, Sequence
+from pathlib import Path
 from typing import Any, ContextManager, Iterable, Literal, Optional, TypedDict, TypeVar
+from uuid import UUID
 
-PrimaryKey = Mapping[str, str | int | float]
+PrimaryKey = Mapping[str, str | int | float | UUID]
 
 class Table:
     @property
@@ -13,43 +15,95 @@ class Table:
     def connection(self) -> Connection: ...
     @property
     def heading(self) -> Heading: ...
+    @property
+    def primary_key(self) -> list[str]: ...
+    @property
+    def external(self) -> Mapping[str, ExternalTable]: ...
     def children(self, *, as_objects: Literal[True]) -> list[Table]: ...
+    def ancestors(self) -> list[str]: ...
     def describe(self, *, printout: bool = ...) -> str: ...
-    def insert(self, rows: Iterable[Mapping[str, Any]]) -> None: ...
-    def fetch(self, *, as_dict: Literal[True], download_path: str = ...) -> list[dict[str, Any]]: ...
+    def insert(self, rows: Iterable[Mapping[str, Any]], *, skip_duplicates: bool = ...) -> None: ...
+    def fetch(
+        self,
+        *,
+        as_dict: Literal[True],
+        download_path: str = ...,
+        order_by: str | Sequence[str] = ...,
+        limit: int = ...,
+    ) -> list[dict[str, Any]]: ...
     def fetch1(self, *attrs: str) -> tuple[Any, ...]: ...
     def delete(self) -> None: ...
     def delete_quick(self) -> None: ...
     def proj(self, *attributes: str) -> Table: ...
+    def join(self, other: Table, *, left: bool = ...) -> Table: ...
+    def where_clause(self) -> str: ...
     def __and__(self: _T, condition: str | PrimaryKey | Iterable[PrimaryKey] | Table) -> _T: ...
+    def __sub__(self: _T, condition: str | PrimaryKey | Iterable[PrimaryKey] | Table) -> _T: ...
     def __contains__(self, primary_key: PrimaryKey) -> bool: ...
+    def __len__(self) -> int: ...
 
-class Heading: ...
+class Heading:
+    @property
+    def names(self) -> list[str]: ...
+    @property
+    def attributes(self) -> dict[str, Attribute]: ...
+    @property
+    def secondary_attributes(self) -> list[str]: ...
+
+class Attribute:
+    @property
+    def is_external(self) -> bool: ...
+    @property
+    def is_attachment(self) -> bool: ...
+    @property
+    def store(self) -> str: ...
+
+class ExternalTable(Table):
+    def download_attachment(self, uuid: UUID, attachment_name: str, download_path: Path) -> None: ...
+    def upload_attachment(self, local_path: Path) -> UUID: ...
 
 _T = TypeVar("_T", bound=Table)
 
-class Part: ...
-class Computed: ...
-class Imported: ...
-class Lookup: ...
-class Manual: ...
+class Part:
+    tier_regexp: str
+
+class Computed:
+    tier_regexp: str
+
+class Imported:
+    tier_regexp: str
+
+class Lookup:
+    tier_regexp: str
+
+class Manual:
+    tier_regexp: str
 
 class ConnectionInfo(TypedDict):
     host: str
     user: str
     passwd: str
 
+class Dependencies:
+    def load(self, force: bool = ...) -> None: ...
+
 class Connection:
     conn_info: ConnectionInfo
+    dependencies: Dependencies
     def __init__(self, host: str, user: str, password: str) -> None: ...
     @property
     def transaction(self) -> ContextManager[Connection]: ...
+    def query(self, query: str, args: Sequence[Any] = ..., *, as_dict: bool = ...) -> Any: ...
+    def close(self) -> None: ...
 
 class Schema:
     database: str
     connection: Connection
-    def __init__(self, schema_name: str, *, connection: Optional[Connection] = ...) -> None: ...
+    def __init__(
+        self, schema_name: str, *, connection: Optional[Connection] = ..., create_schema: bool = ...
+    ) -> None: ...
     def __call__(self, cls: type[Table], *, context: Optional[Mapping[str, Table]]) -> type[Table]: ...
+    def list_tables(self) -> list[str]: ...
     def spawn_missing_classes(self, context: Optional[MutableMapping[str, type[Table]]] = ...) -> None: ...
 
 class AndList(UserList[Any]): ...
@@ -1,17 +1,20 @@
 """Contains function for creating assignments."""
 from __future__ import annotations
 
+from itertools import count
 from typing import Iterable, Mapping, Optional
-from uuid import UUID, uuid4
 
 from link.domain.custom_types import Identifier
 from link.domain.state import Components
 
-__UUIDS: dict[str, UUID] = {}
+__IDENTIFIERS: dict[str, Identifier] = {}
+__COUNTER = count()
 
 
 def create_identifier(name: str) -> Identifier:
-    return Identifier(__UUIDS.setdefault(name, uuid4()))
+    if name not in __IDENTIFIERS:
+        __IDENTIFIERS[name] = Identifier(next(__COUNTER))
+    return __IDENTIFIERS[name]
 
 
 def create_identifiers(*names: str) -> set[Identifier]:
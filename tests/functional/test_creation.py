@@ -1,6 +1,6 @@
 import datajoint as dj
 
-from link import link
+from link import link, link_schema
 
 
 def test_local_table_creation_from_source_table_that_has_parent_raises_no_error(
@@ -60,3 +60,52 @@ def test_part_tables_of_computed_source_gets_created_with_correct_name(
             schema_names["local"],
         )(type(source_table_name, tuple(), {}))
         assert hasattr(local_table, "Bar")
+
+
+def test_linking_with_schema_cache_spawns_parts_of_linked_table(
+    prepare_link, create_table, prepare_table, act_as, tmpdir
+):
+    schema_names, actors = prepare_link()
+    with act_as(actors["source"]):
+        source_table_name = "Foo"
+        source_table = create_table(
+            source_table_name, dj.Manual, "foo: int", parts=[create_table("Bar", dj.Part, "-> master")]
+        )
+        prepare_table(schema_names["source"], source_table, data=[{"foo": 1}], parts={"Bar": [{"foo": 1}]})
+    with act_as(actors["local"]):
+        for _ in range(2):
+            local_table_cls = link(
+                actors["source"].credentials.host,
+                schema_names["source"],
+                schema_names["outbound"],
+                "Outbound",
+                schema_names["local"],
+                schema_cache_dir=str(tmpdir),
+            )(type(source_table_name, tuple(), {}))
+        local_table_cls().source.pull()
+        assert local_table_cls().Bar().fetch(as_dict=True) == [{"foo": 1}]
+
+
+def test_linking_schema_creates_local_tables_of_all_source_tables(prepare_link, create_table, prepare_table, act_as):
+    schema_names, actors = prepare_link()
+    with act_as(actors["source"]):
+        source_table_parent = create_table("Foo", dj.Manual, "foo: int")
+        prepare_table(schema_names["source"], source_table_parent, data=[{"foo": 1}])
+        source_table = create_table("Bar", dj.Manual, "-> source_table_parent\nbar: int")
+        prepare_table(
+            schema_names["source"],
+            source_table,
+            data=[{"foo": 1, "bar": 2}],
+            context={"source_table_parent": source_table_parent},
+        )
+    with act_as(actors["local"]):
+        tables = link_schema(
+            actors["source"].credentials.host,
+            schema_names["source"],
+            schema_names["outbound"],
+            schema_names["local"],
+        )
+        tables.Foo().source.pull()
+        tables.Bar().source.pull()
+        assert tables.Foo().fetch(as_dict=True) == [{"foo": 1}]
+        assert tables.Bar().fetch(as_dict=True) == [{"foo": 1, "bar": 2}]
@@ -1,9 +1,12 @@
 import functools
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 import datajoint as dj
+import pytest
 
 from link import link
+from link.service.ensure import NoEntitiesRequested
 
 
 def test_pulling(
@@ -104,3 +107,215 @@ def test_tier_prefix_is_ignored_when_matching_parts(prepare_link, act_as, create
             schema_names["local"],
         )(type(source_table_name, tuple(), {}))
         local_table_cls().source.pull()
+
+
+def test_pulling_again_only_pulls_new_rows(prepare_link, act_as, create_table, prepare_table, dj_connection):
+    schema_names, actors = prepare_link()
+    source_table_name = "Foo"
+    with act_as(actors["source"]):
+        source_table_cls = create_table(source_table_name, dj.Manual, "foo: int")
+        prepare_table(schema_names["source"], source_table_cls, data=[{"foo": 1}, {"foo": 2}])
+    with act_as(actors["local"]):
+        local_table_cls = link(
+            actors["source"].credentials.host,
+            schema_names["source"],
+            schema_names["outbound"],
+            "Outbound",
+            schema_names["local"],
+        )(type(source_table_name, tuple(), {}))
+        local_table_cls().source.pull()
+    with act_as(actors["source"]), dj_connection() as connection:
+        dj.schema(schema_names["source"], connection=connection)(source_table_cls)
+        source_table_cls().insert1({"foo": 3})
+    with act_as(actors["local"]):
+        assert local_table_cls().source._unsettled().fetch(as_dict=True) == [{"foo": 3}]
+        local_table_cls().source.pull()
+        assert local_table_cls().fetch(as_dict=True) == [{"foo": 1}, {"foo": 2}, {"foo": 3}]
+        assert len(local_table_cls().source._unsettled()) == 0
+        local_table_cls().source.pull()
+
+
+def test_pulling_without_unsettled_entities(prepare_link, act_as, create_table, prepare_table):
+    schema_names, actors = prepare_link()
+    source_table_name = "Foo"
+    with act_as(actors["source"]):
+        source_table_cls = create_table(source_table_name, dj.Manual, "foo: int")
+        prepare_table(schema_names["source"], source_table_cls, data=[{"foo": 1}])
+    with act_as(actors["local"]):
+        local_table_cls = link(
+            actors["source"].credentials.host,
+            schema_names["source"],
+            schema_names["outbound"],
+            "Outbound",
+            schema_names["local"],
+        )(type(source_table_name, tuple(), {}))
+        (local_table_cls().source & "foo = 2").pull()
+        with pytest.raises(NoEntitiesRequested):
+            (local_table_cls().source & "foo = 2").pull(exclude_settled=False)
+
+
+def test_pulling_in_shards(prepare_link, act_as, create_table, prepare_table):
+    schema_names, actors = prepare_link()
+    source_table_name = "Foo"
+    data = [{"foo": i} for i in range(20)]
+    with act_as(actors["source"]):
+        source_table_cls = create_table(source_table_name, dj.Manual, "foo: int")
+        prepare_table(schema_names["source"], source_table_cls, data=data)
+    with act_as(actors["local"]):
+        local_table_cls = link(
+            actors["source"].credentials.host,
+            schema_names["source"],
+            schema_names["outbound"],
+            "Outbound",
+            schema_names["local"],
+        )(type(source_table_name, tuple(), {}))
+        local_table_cls().source.pull_shards(run="test", n_shards=4, batch_size=3)
+        assert local_table_cls().fetch(as_dict=True, order_by="foo") == data
+    with act_as(actors["admin"]):
+        table_classes = {}
+        dj.schema(schema_names["outbound"]).spawn_missing_classes(context=table_classes)
+        assert len(table_classes["OutboundLease"] & "is_done = 'TRUE'") == 4
+
+
+def test_pulling_claimed_batches_concurrently(prepare_link, act_as, create_table, prepare_table):
+    schema_names, actors = prepare_link()
+    source_table_name = "Foo"
+    data = [{"foo": i} for i in range(50)]
+    with act_as(actors["source"]):
+        source_table_cls = create_table(source_table_name, dj.Manual, "foo: int")
+        prepare_table(schema_names["source"], source_table_cls, data=data)
+    with act_as(actors["local"]):
+        local_table_classes = [
+            link(
+                actors["source"].credentials.host,
+                schema_names["source"],
+                schema_names["outbound"],
+                "Outbound",
+                schema_names["local"],
+            )(type(source_table_name, tuple(), {}))
+            for _ in range(3)
+        ]
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            list(pool.map(lambda table_cls: table_cls().source.pull_claimed(batch_size=4), local_table_classes))
+        assert local_table_classes[0]().fetch(as_dict=True, order_by="foo") == data
+        assert len(local_table_classes[0]().source._unsettled()) == 0
+
+
+def test_pulling_in_pages(prepare_link, act_as, create_table, prepare_table):
+    schema_names, actors = prepare_link()
+    source_table_name = "Foo"
+    data = [{"foo": i, "bar": j} for i in range(5) for j in range(3)]
+    with act_as(actors["source"]):
+        source_table_cls = create_table(source_table_name, dj.Manual, "foo: int\nbar: int")
+        prepare_table(schema_names["source"], source_table_cls, data=data)
+    with act_as(actors["local"]):
+        local_table_cls = link(
+            actors["source"].credentials.host,
+            schema_names["source"],
+            schema_names["outbound"],
+            "Outbound",
+            schema_names["local"],
+        )(type(source_table_name, tuple(), {}))
+        local_table_cls().source.pull(page_size=4)
+        assert local_table_cls().fetch(as_dict=True, order_by=("foo", "bar")) == data
+
+
+def test_syncing_only_considers_new_entities(prepare_link, act_as, create_table, prepare_table, dj_connection):
+    schema_names, actors = prepare_link()
+    source_table_name = "Foo"
+    with act_as(actors["source"]):
+        source_table_cls = create_table(source_table_name, dj.Manual, "foo: int")
+        prepare_table(schema_names["source"], source_table_cls, data=[{"foo": 1}, {"foo": 2}])
+    with act_as(actors["local"]):
+        local_table_cls = link(
+            actors["source"].credentials.host,
+            schema_names["source"],
+            schema_names["outbound"],
+            "Outbound",
+            schema_names["local"],
+        )(type(source_table_name, tuple(), {}))
+        local_table_cls().source.sync(reconcile_every=3)
+        assert local_table_cls().fetch(as_dict=True, order_by="foo") == [{"foo": 1}, {"foo": 2}]
+    with act_as(actors["source"]), dj_connection() as connection:
+        dj.schema(schema_names["source"], connection=connection)(source_table_cls)
+        source_table_cls().insert([{"foo": 0}, {"foo": 3}])
+    with act_as(actors["local"]):
+        local_table_cls().source.sync(reconcile_every=3)
+        assert local_table_cls().fetch(as_dict=True, order_by="foo") == [{"foo": 1}, {"foo": 2}, {"foo": 3}]
+        local_table_cls().source.sync(reconcile_every=3)
+        assert local_table_cls().fetch(as_dict=True, order_by="foo") == [{"foo": 1}, {"foo": 2}, {"foo": 3}]
+        local_table_cls().source.sync(reconcile_every=3)
+        assert local_table_cls().fetch(as_dict=True, order_by="foo") == [{"foo": 0}, {"foo": 1}, {"foo": 2}, {"foo": 3}]
+
+
+@pytest.mark.parametrize("max_attachment_workers", [0, 2])
+def test_pulling_again_after_deleting_restores_attachments(
+    max_attachment_workers,
+    create_random_string,
+    prepare_link,
+    prepare_table,
+    tmpdir,
+    create_table,
+    temp_dj_store_config,
+    temp_store,
+    minios,
+    act_as,
+):
+    filepath = tmpdir / create_random_string()
+    with open(filepath, "wb") as file:
+        file.write(os.urandom(1024))
+    data = [{"foo": 1, "bar": filepath}]
+
+    schema_names, actors = prepare_link()
+    with temp_store(minios["source"]) as source_store_spec, temp_store(minios["local"]) as local_store_spec:
+        with temp_dj_store_config([source_store_spec]):
+            source_table_name = create_random_string().title()
+            table_cls = create_table(
+                source_table_name, dj.Manual, f"foo: int\n---\nbar: attach@{source_store_spec.name}"
+            )
+            with act_as(actors["source"]):
+                prepare_table(schema_names["source"], table_cls, data=data)
+
+        with act_as(actors["local"]), temp_dj_store_config([source_store_spec, local_store_spec]):
+            local_table_cls = link(
+                actors["source"].credentials.host,
+                schema_names["source"],
+                schema_names["outbound"],
+                "Outbound",
+                schema_names["local"],
+                stores={source_store_spec.name: local_store_spec.name},
+                max_attachment_workers=max_attachment_workers,
+            )(type(source_table_name, (dj.Manual,), {}))
+            local_table_cls().source.pull()
+            local_table_cls().delete()
+            local_table_cls().source.pull()
+            assert local_table_cls().fetch(as_dict=True, download_path=tmpdir) == data
+
+
+def test_repeating_sharded_pull_after_clearing_its_leases(
+    prepare_link, act_as, create_table, prepare_table, dj_connection
+):
+    schema_names, actors = prepare_link()
+    source_table_name = "Foo"
+    data = [{"foo": i} for i in range(10)]
+    with act_as(actors["source"]):
+        source_table_cls = create_table(source_table_name, dj.Manual, "foo: int")
+        prepare_table(schema_names["source"], source_table_cls, data=data)
+    with act_as(actors["local"]):
+        local_table_cls = link(
+            actors["source"].credentials.host,
+            schema_names["source"],
+            schema_names["outbound"],
+            "Outbound",
+            schema_names["local"],
+        )(type(source_table_name, tuple(), {}))
+        (local_table_cls().source & "foo < 5").pull_shards(run="test", n_shards=2)
+    with act_as(actors["source"]), dj_connection() as connection:
+        dj.schema(schema_names["source"], connection=connection)(source_table_cls)
+        source_table_cls().insert({"foo": i} for i in range(10, 15))
+    with act_as(actors["local"]):
+        local_table_cls().source.pull_shards(run="test", n_shards=2)
+        assert len(local_table_cls()) == 5
+        local_table_cls().source.clear_shards(run="test")
+        local_table_cls().source.pull_shards(run="test", n_shards=2)
+        assert len(local_table_cls()) == 15
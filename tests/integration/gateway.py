@@ -38,6 +38,9 @@ class FakeLinkGateway(LinkGateway):
             process=process,
         )
 
+    def create_entities(self, identifiers: Iterable[Identifier]) -> list[Entity]:
+        return [self.create_entity(identifier) for identifier in identifiers]
+
     def apply(self, updates: Iterable[events.StateChanged]) -> None:
         for update in updates:
             if update.command is Commands.START_PULL_PROCESS:
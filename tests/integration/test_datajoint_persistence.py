@@ -8,6 +8,7 @@ from contextlib import contextmanager
 from copy import deepcopy
 from dataclasses import dataclass, field
 from io import StringIO
+from itertools import zip_longest
 from pathlib import Path
 from types import TracebackType
 from typing import Any, Literal, Optional, TextIO, Type, TypedDict, Union
@@ -18,19 +19,71 @@ from link.adapters import PrimaryKey
 from link.adapters.gateway import DJLinkGateway
 from link.adapters.identification import IdentificationTranslator
 from link.domain import events
+from link.domain.custom_types import Identifier
 from link.domain.link import create_entity
-from link.domain.state import Components, Operations, Processes
-from link.infrastructure.facade import DJLinkFacade, Table
+from link.domain.state import Components, Entity, Operations, Processes, states
+from link.infrastructure.facade import AttachmentTransfer, DJLinkFacade, Table, joining_transaction
 
 
 class FakeConnection:
     def __init__(self, rows: list[dict[str, Any]]) -> None:
         self.__rows = rows
         self.__backup: Optional[list[dict[str, Any]]] = None
+        self.restrictions: dict[str, list[PrimaryKey]] = {}
+        self.error_on_query: Optional[type[Exception]] = None
+        self.queries: list[str] = []
+        self.temporary_tables: dict[str, list[dict[str, Any]]] = {}
+        self.server: dict[str, FakeConnection] = {}
+
+    def query(self, query: str, args: Sequence[Any] = ()) -> None:
+        if self.error_on_query:
+            raise self.error_on_query
+        self.queries.append(query)
+        if query.startswith(("CREATE TEMPORARY TABLE", "INSERT IGNORE INTO", "DROP TEMPORARY TABLE")):
+            return self.__query_temporary_table(query, args)
+        if query.startswith("INSERT INTO"):
+            return self.__insert_select(query)
+        match = re.compile(r"^UPDATE (?P<table>\S+) SET (?P<assignments>.+?)(?: WHERE (?P<token>\S+))?$").match(query)
+        assert match
+        attrs = re.findall(r"`(\w+)` = %s", match.group("assignments"))
+        assert len(attrs) == len(args)
+        restriction = self.restrictions[match.group("token")] if match.group("token") else None
+        for row in self.__rows:
+            if restriction is None or {k: row[k] for k in restriction[0]} in restriction:
+                row.update(zip(attrs, args))
+
+    def __insert_select(self, query: str) -> None:
+        match = re.compile(
+            r"^INSERT INTO \S+ \((?P<columns>[^)]+)\) SELECT (?P=columns) FROM (?P<source>\S+) WHERE (?P<token>\S+)$"
+        ).match(query)
+        assert match
+        source = self.server[match.group("source")]
+        restriction = source.restrictions[match.group("token")]
+        attrs = re.findall(r"`(\w+)`", match.group("columns"))
+        for row in source.__rows:
+            if {k: row[k] for k in restriction[0]} in restriction:
+                self.__rows.append({attr: row[attr] for attr in attrs})
+
+    def __query_temporary_table(self, query: str, args: Sequence[Any]) -> None:
+        if match := re.compile(r"^CREATE TEMPORARY TABLE (?P<name>\S+) ").match(query):
+            assert match.group("name") not in self.temporary_tables
+            self.temporary_tables[match.group("name")] = []
+        elif match := re.compile(r"^INSERT IGNORE INTO (?P<name>\S+) \((?P<columns>[^)]+)\) VALUES ").match(query):
+            attrs = re.findall(r"`(\w+)`", match.group("columns"))
+            rows = self.temporary_tables[match.group("name")]
+            for index in range(0, len(args), len(attrs)):
+                row = dict(zip(attrs, args[index : index + len(attrs)]))
+                if row not in rows:
+                    rows.append(row)
+        elif match := re.compile(r"^DROP TEMPORARY TABLE IF EXISTS (?P<name>\S+)$").match(query):
+            self.temporary_tables.pop(match.group("name"), None)
+        else:
+            raise AssertionError(f"Unexpected query: {query}")
 
     @property
     @contextmanager
     def transaction(self) -> Iterator[FakeConnection]:
+        assert self.__backup is None, "Nested transactions are not supported"
         self.__backup = deepcopy(self.__rows)
         try:
             yield self
@@ -51,8 +104,10 @@ class FakeTable:
         attrs: Optional[Iterable[str]] = None,
         children: Optional[Iterable[FakeTable]] = None,
         external_attrs: Optional[Iterable[str]] = None,
+        schema: str = "schema",
     ) -> None:
         self.__name = name
+        self.__schema = schema
         self.__primary = set(primary)
         self.__attrs = set(attrs) if attrs is not None else set()
         self.__children = list(children) if children is not None else list()
@@ -60,18 +115,23 @@ class FakeTable:
         self.__rows: list[dict[str, Any]] = []
         self.__projected_attrs: set[str] = self.__primary | self.__attrs
         self.__restriction: Optional[list[PrimaryKey]] = None
+        self.__joined: Optional[FakeTable] = None
         self.__connection = FakeConnection(self.__rows)
         self.error_on_insert: Optional[type[Exception]] = None
+        self.fetched_row_counts: list[int] = []
+        self.fetches: list[str] = []
         assert self.__primary.isdisjoint(self.__attrs)
         assert self.__external_attrs <= self.__attrs
 
-    def insert(self, rows: Iterable[Mapping[str, Any]]) -> None:
+    def insert(self, rows: Iterable[Mapping[str, Any]], *, skip_duplicates: bool = False) -> None:
         if self.error_on_insert:
             raise self.error_on_insert
         for row in rows:
             row = dict(row)
             assert set(row) == self.__primary | self.__attrs
-            assert {k: v for k, v in row.items() if k in self.__primary} not in self.proj().fetch(as_dict=True)
+            if {k: v for k, v in row.items() if k in self.__primary} in self.proj().fetch(as_dict=True):
+                assert skip_duplicates
+                continue
             for attr in self.__external_attrs:
                 filepath = Path(row[attr])
                 with filepath.open(mode="rb") as file:
@@ -96,7 +156,13 @@ class FakeTable:
                 file.write(data)
             return str(filepath)
 
-        return convert_external_attrs(project_rows(self.__rows_in_restriction()))
+        self.fetches.append(self.__name)
+        rows = convert_external_attrs(project_rows(self.__rows_in_restriction()))
+        if self.__joined is not None:
+            rows = [self.__joined.__join_row(row) for row in rows]
+        if self.__projected_attrs != self.__primary:
+            self.fetched_row_counts.append(len(rows))
+        return rows
 
     def fetch1(self, *attrs: str, download_path: str = ".") -> Any | tuple[Any, ...]:
         def project_row(row: Mapping[str, Any]) -> dict[str, Any]:
@@ -145,8 +211,26 @@ class FakeTable:
         table.__projected_attrs = self.__primary | attrs
         return table
 
+    def join(self, other: Any, *, left: bool = False) -> FakeTable:
+        assert isinstance(other, FakeTable)
+        assert left
+        assert other.__primary == self.__primary
+        table = self.__create_copy()
+        table.__joined = other
+        return table
+
+    def __join_row(self, row: dict[str, Any]) -> dict[str, Any]:
+        matches = [match for match in self.__rows if all(match[k] == row[k] for k in self.__primary)]
+        for attr in self.__projected_attrs - self.__primary:
+            row[attr] = matches[0][attr] if matches else None
+        return row
+
     def __and__(self, condition: Union[str, PrimaryKey, Iterable[PrimaryKey]]) -> FakeTable:
-        if isinstance(condition, str):
+        if isinstance(condition, str) and (
+            match := re.compile(r"^\(.+\) IN \(SELECT .+ FROM (\S+)\)$").match(condition)
+        ):
+            condition = list(self.__connection.temporary_tables[match.group(1)])
+        elif isinstance(condition, str):
             match = re.compile(r'(^[\w_]+) = "(\w+)"$').match(condition)
             assert match
             attr, value = match.groups()
@@ -160,6 +244,13 @@ class FakeTable:
         table.__restriction = condition
         return table
 
+    def where_clause(self) -> str:
+        if self.__restriction is None:
+            return ""
+        token = f"restriction{len(self.__connection.restrictions)}"
+        self.__connection.restrictions[token] = self.__restriction
+        return f" WHERE {token}"
+
     def __contains__(self, primary_key: PrimaryKey) -> bool:
         return bool(list((self & primary_key).__rows_in_restriction()))
 
@@ -170,10 +261,24 @@ class FakeTable:
     def table_name(self) -> str:
         return self.__name
 
+    @property
+    def full_table_name(self) -> str:
+        return f"`{self.__schema}`.`{self.__name}`"
+
     @property
     def connection(self) -> FakeConnection:
         return self.__connection
 
+    @property
+    def heading(self) -> FakeHeading:
+        return FakeHeading(
+            sorted(self.__primary) + sorted(self.__attrs),
+            {
+                attr: FakeAttribute(attr in self.__external_attrs, attr in self.__external_attrs)
+                for attr in self.__primary | self.__attrs
+            },
+        )
+
     def __rows_in_restriction(self) -> Iterator[dict[str, Any]]:
         if self.__restriction is not None:
             return (row for row in self.__rows if {k: row[k] for k in self.__primary} in self.__restriction)
@@ -183,13 +288,30 @@ class FakeTable:
     def __create_copy(self) -> FakeTable:
         table = type(self)(self.__name, primary=self.__primary, attrs=self.__attrs)
         table.__rows = self.__rows
+        table.__connection = self.__connection
+        table.fetched_row_counts = self.fetched_row_counts
+        table.fetches = self.fetches
+        table.__joined = self.__joined
         table.__projected_attrs = self.__projected_attrs
         table.__restriction = self.__restriction
         table.__children = self.__children
         table.__external_attrs = self.__external_attrs
+        table.__schema = self.__schema
         return table
 
 
+@dataclass(frozen=True)
+class FakeAttribute:
+    is_external: bool
+    is_attachment: bool
+
+
+@dataclass(frozen=True)
+class FakeHeading:
+    names: list[str]
+    attributes: dict[str, FakeAttribute]
+
+
 def initialize(
     name: str, primary: Iterable[str], non_primary: Iterable[str], initial: State
 ) -> tuple[Tables, DJLinkGateway]:
@@ -214,10 +336,16 @@ def create_tables(
     children_external: Optional[Mapping[str, Iterable[str]]] = None,
 ) -> Tables:
     def create_child_tables(
-        children_non_primary: Mapping[str, Iterable[str]], external_attrs: Mapping[str, Iterable[str]]
+        children_non_primary: Mapping[str, Iterable[str]], external_attrs: Mapping[str, Iterable[str]], schema: str
     ) -> list[FakeTable]:
         return [
-            FakeTable(name, set(primary), set(child_non_primary), external_attrs=external_attrs.get(name, set()))
+            FakeTable(
+                name,
+                set(primary),
+                set(child_non_primary),
+                external_attrs=external_attrs.get(name, set()),
+                schema=schema,
+            )
             for name, child_non_primary in children_non_primary.items()
         ]
 
@@ -230,31 +358,53 @@ def create_tables(
             name,
             set(primary),
             set(non_primary),
-            children=create_child_tables(children, children_external),
+            children=create_child_tables(children, children_external, "source"),
             external_attrs=external,
+            schema="source",
+        ),
+        "outbound": FakeTable(
+            name + "_outbound", set(primary), {"process", "is_flagged", "is_deprecated"}, schema="outbound"
         ),
-        "outbound": FakeTable(name + "_outbound", set(primary), {"process", "is_flagged", "is_deprecated"}),
         "local": FakeTable(
             name,
             set(primary),
             set(non_primary),
-            children=create_child_tables(children, children_external),
+            children=create_child_tables(children, children_external, "local"),
             external_attrs=external,
+            schema="local",
         ),
     }
 
 
-def create_gateway(tables: Tables) -> DJLinkGateway:
+def create_gateway(
+    tables: Tables,
+    *,
+    max_rows_per_fetch: int = 100,
+    staging_threshold: int = 1000,
+    copy_server_side: bool = False,
+    attachment_transfer: Optional[AttachmentTransfer] = None,
+) -> DJLinkGateway:
     def create_table_factory(table: FakeTable) -> Callable[[], FakeTable]:
         def create_table() -> FakeTable:
             return table
 
         return create_table
 
+    if copy_server_side:
+        all_tables = [tables["source"], tables["outbound"], tables["local"]]
+        all_tables.extend(child for table in list(all_tables) for child in table.children(as_objects=True))
+        server = {table.full_table_name: table.connection for table in all_tables}
+        for table in all_tables:
+            table.connection.server = server
+
     facade = DJLinkFacade(
         source=create_table_factory(tables["source"]),
         outbound=create_table_factory(tables["outbound"]),
         local=create_table_factory(tables["local"]),
+        max_rows_per_fetch=max_rows_per_fetch,
+        staging_threshold=staging_threshold,
+        copy_server_side=copy_server_side,
+        attachment_transfer=attachment_transfer,
     )
     translator = IdentificationTranslator()
     return DJLinkGateway(facade, translator)
@@ -383,6 +533,60 @@ def test_entity_creation() -> None:
     assert actual == expected
 
 
+def test_bulk_entity_creation_preserves_order_of_identifiers() -> None:
+    tables, gateway = initialize(
+        "link",
+        primary={"a"},
+        non_primary={"b"},
+        initial=State(
+            source=TableState([{"a": 0, "b": 1}, {"a": 1, "b": 2}, {"a": 2, "b": 3}]),
+            outbound=TableState(
+                [
+                    {"a": 1, "process": "DELETE", "is_flagged": "TRUE", "is_deprecated": "FALSE"},
+                    {"a": 2, "process": "NONE", "is_flagged": "FALSE", "is_deprecated": "FALSE"},
+                ]
+            ),
+            local=TableState([{"a": 2, "b": 3}]),
+        ),
+    )
+
+    identifiers = [gateway.translator.to_identifier(primary_key) for primary_key in [{"a": 2}, {"a": 0}, {"a": 1}]]
+    actual = [
+        (entity.identifier, entity.state, entity.is_tainted, entity.current_process)
+        for entity in gateway.create_entities(identifiers)
+    ]
+    expected = [
+        (identifiers[0], states.Shared, False, Processes.NONE),
+        (identifiers[1], states.Unshared, False, Processes.NONE),
+        (identifiers[2], states.Activated, True, Processes.DELETE),
+    ]
+    assert actual == expected
+
+
+@pytest.mark.parametrize("n_entities", [1, 10, 100])
+def test_bulk_entity_creation_issues_constant_number_of_queries(n_entities: int) -> None:
+    tables, gateway = initialize(
+        "link",
+        primary={"a"},
+        non_primary={"b"},
+        initial=State(
+            source=TableState([{"a": i, "b": i} for i in range(n_entities)]),
+            outbound=TableState(
+                [
+                    {"a": i, "process": "PULL", "is_flagged": "FALSE", "is_deprecated": "FALSE"}
+                    for i in range(0, n_entities, 2)
+                ]
+            ),
+        ),
+    )
+    for table in (tables["source"], tables["outbound"], tables["local"]):
+        table.fetches.clear()
+
+    gateway.create_entities(gateway.translator.to_identifier({"a": i}) for i in range(n_entities))
+
+    assert [*tables["source"].fetches, *tables["outbound"].fetches, *tables["local"].fetches] == ["link", "link"]
+
+
 def apply_update(gateway: DJLinkGateway, operation: Operations, requested: Iterable[PrimaryKey]) -> None:
     for primary_key in requested:
         identifier = gateway.translator.to_identifier(primary_key)
@@ -395,6 +599,17 @@ def apply_update(gateway: DJLinkGateway, operation: Operations, requested: Itera
             gateway.apply([event])
 
 
+def apply_to_all(
+    gateway: DJLinkGateway, identifiers: Iterable[Identifier], operation: Callable[[Entity], None]
+) -> None:
+    entities = gateway.create_entities(identifiers)
+    for entity in entities:
+        operation(entity)
+    updates = [[event for event in entity.events if isinstance(event, events.StateChanged)] for entity in entities]
+    for step in zip_longest(*updates):
+        gateway.apply(update for update in step if update is not None)
+
+
 def test_add_to_local_command() -> None:
     tables = create_tables(
         "link",
@@ -451,6 +666,30 @@ def test_add_to_local_command() -> None:
     )
 
 
+def test_add_to_local_command_copies_rows_in_chunks() -> None:
+    tables = create_tables("link", primary={"a"}, non_primary={"b"}, children={"link__part": ["c"]})
+    gateway = create_gateway(tables, max_rows_per_fetch=2)
+    source = TableState(
+        [{"a": i, "b": i + 1} for i in range(5)], children={"link__part": [{"a": i, "c": i + 2} for i in range(5)]}
+    )
+    outbound = TableState(
+        [{"a": i, "process": "PULL", "is_flagged": "FALSE", "is_deprecated": "FALSE"} for i in range(5)]
+    )
+    set_state(tables, State(source=source, outbound=outbound, local=TableState(children={"link__part": []})))
+
+    updates: list[events.StateChanged] = []
+    identifiers = [gateway.translator.to_identifier({"a": i}) for i in range(5)]
+    for entity in gateway.create_entities(identifiers):
+        entity.apply(Operations.PROCESS)
+        updates.extend(event for event in entity.events if isinstance(event, events.StateChanged))
+    gateway.apply(updates)
+
+    source_part = tables["source"].children(as_objects=True)[0]
+    assert tables["source"].fetched_row_counts == [2, 2, 1]
+    assert source_part.fetched_row_counts == [2, 2, 1]
+    assert has_state(tables, State(source=source, outbound=outbound, local=source))
+
+
 def test_add_to_local_command_with_error() -> None:
     tables = create_tables("link", primary={"a"}, non_primary={"b"}, children={"link__part": {"c"}})
     gateway = create_gateway(tables)
@@ -486,6 +725,100 @@ def test_add_to_local_command_with_external_file(tmpdir: Path) -> None:
         assert file.read() == data
 
 
+def test_add_to_local_command_copies_rows_on_server() -> None:
+    tables = create_tables("link", primary={"a"}, non_primary={"b"}, children={"link__part": ["c"]})
+    gateway = create_gateway(tables, staging_threshold=2, copy_server_side=True)
+    source = TableState(
+        [{"a": i, "b": i + 1} for i in range(5)], children={"link__part": [{"a": i, "c": i + 2} for i in range(4)]}
+    )
+    outbound = TableState(
+        [{"a": i, "process": "PULL", "is_flagged": "FALSE", "is_deprecated": "FALSE"} for i in range(5)]
+    )
+    set_state(tables, State(source=source, outbound=outbound, local=TableState(children={"link__part": []})))
+
+    updates: list[events.StateChanged] = []
+    identifiers = [gateway.translator.to_identifier({"a": i}) for i in range(5)]
+    for entity in gateway.create_entities(identifiers):
+        entity.apply(Operations.PROCESS)
+        updates.extend(event for event in entity.events if isinstance(event, events.StateChanged))
+    gateway.apply(updates)
+
+    source_part = tables["source"].children(as_objects=True)[0]
+    local_part = tables["local"].children(as_objects=True)[0]
+    assert tables["source"].fetched_row_counts == []
+    assert source_part.fetched_row_counts == []
+    copies = [query for query in tables["local"].connection.queries if query.startswith("INSERT INTO")]
+    assert [query.split(" SELECT ")[0] for query in copies] == ["INSERT INTO `local`.`link` (`a`, `b`)"] * 3
+    assert len(local_part.connection.queries) == 3
+    assert has_state(tables, State(source=source, outbound=outbound, local=source))
+
+
+def test_add_to_local_command_does_not_copy_rows_with_external_attributes_on_server(tmpdir: Path) -> None:
+    tables = create_tables(
+        "link", primary={"a"}, non_primary={"external"}, external={"external"}, children={"link__part": ["c"]}
+    )
+    gateway = create_gateway(tables, copy_server_side=True)
+    insert_filepath = tmpdir / "file"
+    data = os.urandom(1024)
+    with insert_filepath.open(mode="wb") as file:
+        file.write(data)
+    tables["source"].insert([{"a": 0, "external": insert_filepath}])
+    tables["source"].children(as_objects=True)[0].insert([{"a": 0, "c": 1}])
+    os.remove(insert_filepath)
+    tables["outbound"].insert([{"a": 0, "process": "PULL", "is_flagged": "FALSE", "is_deprecated": "FALSE"}])
+
+    apply_update(gateway, Operations.PROCESS, [{"a": 0}])
+
+    assert tables["source"].fetched_row_counts == [1]
+    assert tables["local"].connection.queries == []
+    assert tables["local"].children(as_objects=True)[0].fetch(as_dict=True) == [{"a": 0, "c": 1}]
+    fetch_filepath = Path(tables["local"].fetch(as_dict=True, download_path=str(tmpdir))[0]["external"])
+    with fetch_filepath.open(mode="rb") as file:
+        assert file.read() == data
+
+
+class FakeAttachmentTransfer:
+    def __init__(self) -> None:
+        self.copied: list[list[dict[str, Any]]] = []
+
+    def copy(self, source: FakeTable, local: FakeTable, download_path: str) -> None:
+        rows = source.fetch(as_dict=True, download_path=download_path)
+        self.copied.append(rows)
+        local.insert(rows)
+
+
+def test_add_to_local_command_copies_rows_with_external_attributes_using_attachment_transfer(tmpdir: Path) -> None:
+    tables = create_tables(
+        "link", primary={"a"}, non_primary={"external"}, external={"external"}, children={"link__part": ["c"]}
+    )
+    transfer = FakeAttachmentTransfer()
+    gateway = create_gateway(tables, max_rows_per_fetch=2, attachment_transfer=transfer)
+    data = {}
+    for a in range(3):
+        insert_filepath = tmpdir / f"file{a}"
+        data[a] = os.urandom(1024)
+        with insert_filepath.open(mode="wb") as file:
+            file.write(data[a])
+        tables["source"].insert([{"a": a, "external": insert_filepath}])
+        os.remove(insert_filepath)
+    tables["source"].children(as_objects=True)[0].insert([{"a": 0, "c": 1}])
+    tables["outbound"].insert(
+        [{"a": a, "process": "PULL", "is_flagged": "FALSE", "is_deprecated": "FALSE"} for a in range(3)]
+    )
+
+    updates: list[events.StateChanged] = []
+    for entity in gateway.create_entities([gateway.translator.to_identifier({"a": a}) for a in range(3)]):
+        entity.apply(Operations.PROCESS)
+        updates.extend(event for event in entity.events if isinstance(event, events.StateChanged))
+    gateway.apply(updates)
+
+    assert [len(rows) for rows in transfer.copied] == [2, 1]
+    assert tables["local"].children(as_objects=True)[0].fetch(as_dict=True) == [{"a": 0, "c": 1}]
+    for row in tables["local"].fetch(as_dict=True, download_path=str(tmpdir)):
+        with Path(row["external"]).open(mode="rb") as file:
+            assert file.read() == data[row["a"]]
+
+
 def test_remove_from_local_command() -> None:
     tables, gateway = initialize(
         "link",
@@ -555,7 +888,7 @@ class TestFinishPullProcessCommand:
     def test_rollback_on_error(initial_state: State) -> None:
         tables, gateway = initialize("link", primary={"a"}, non_primary={"b"}, initial=initial_state)
 
-        tables["outbound"].error_on_insert = RuntimeError
+        tables["outbound"].connection.error_on_query = RuntimeError
         try:
             apply_update(gateway, Operations.PROCESS, [{"a": 0}])
         except RuntimeError:
@@ -564,6 +897,47 @@ class TestFinishPullProcessCommand:
         assert has_state(tables, initial_state)
 
 
+def test_finishing_pull_process_updates_rows_in_place_with_single_statement() -> None:
+    tables, gateway = initialize(
+        "link",
+        primary={"a"},
+        non_primary={"b"},
+        initial=State(
+            source=TableState([{"a": 0, "b": 1}, {"a": 1, "b": 2}, {"a": 2, "b": 3}]),
+            outbound=TableState(
+                [
+                    {"a": 0, "process": "PULL", "is_flagged": "FALSE", "is_deprecated": "FALSE"},
+                    {"a": 1, "process": "NONE", "is_flagged": "FALSE", "is_deprecated": "FALSE"},
+                    {"a": 2, "process": "PULL", "is_flagged": "TRUE", "is_deprecated": "FALSE"},
+                ]
+            ),
+            local=TableState([{"a": 0, "b": 1}, {"a": 1, "b": 2}, {"a": 2, "b": 3}]),
+        ),
+    )
+
+    updates: list[events.StateChanged] = []
+    for entity in gateway.create_entities(gateway.translator.to_identifiers([{"a": 0}, {"a": 2}])):
+        entity.apply(Operations.PROCESS)
+        updates.extend(event for event in entity.events if isinstance(event, events.StateChanged))
+    gateway.apply(updates)
+
+    assert len(tables["outbound"].connection.queries) == 1
+    assert has_state(
+        tables,
+        State(
+            source=TableState([{"a": 0, "b": 1}, {"a": 1, "b": 2}, {"a": 2, "b": 3}]),
+            outbound=TableState(
+                [
+                    {"a": 0, "process": "NONE", "is_flagged": "FALSE", "is_deprecated": "FALSE"},
+                    {"a": 1, "process": "NONE", "is_flagged": "FALSE", "is_deprecated": "FALSE"},
+                    {"a": 2, "process": "NONE", "is_flagged": "TRUE", "is_deprecated": "FALSE"},
+                ]
+            ),
+            local=TableState([{"a": 0, "b": 1}, {"a": 1, "b": 2}, {"a": 2, "b": 3}]),
+        ),
+    )
+
+
 class TestStartDeleteProcessCommand:
     @staticmethod
     @pytest.fixture()
@@ -593,7 +967,7 @@ class TestStartDeleteProcessCommand:
     def test_rollback_on_error(initial_state: State) -> None:
         tables, gateway = initialize("link", primary={"a"}, non_primary={"b"}, initial=initial_state)
 
-        tables["outbound"].error_on_insert = RuntimeError
+        tables["outbound"].connection.error_on_query = RuntimeError
         try:
             apply_update(gateway, Operations.START_DELETE, [{"a": 0}])
         except RuntimeError:
@@ -645,7 +1019,7 @@ class TestDeprecateProcessCommand:
     def test_rollback_on_error(initial_state: State) -> None:
         tables, gateway = initialize("link", primary={"a"}, non_primary={"b"}, initial=initial_state)
 
-        tables["outbound"].error_on_insert = RuntimeError
+        tables["outbound"].connection.error_on_query = RuntimeError
         try:
             apply_update(gateway, Operations.PROCESS, [{"a": 0}])
         except RuntimeError:
@@ -654,6 +1028,39 @@ class TestDeprecateProcessCommand:
         assert has_state(tables, initial_state)
 
 
+def test_updates_join_an_open_transaction() -> None:
+    initial_state = State(
+        source=TableState([{"a": 0, "b": 1}]),
+        outbound=TableState([{"a": 0, "process": "PULL", "is_flagged": "FALSE", "is_deprecated": "FALSE"}]),
+        local=TableState([{"a": 0, "b": 1}]),
+    )
+    tables, gateway = initialize("link", primary={"a"}, non_primary={"b"}, initial=initial_state)
+
+    def update_and_fail() -> None:
+        connection = tables["outbound"].connection
+        with connection.transaction, joining_transaction(connection):
+            apply_update(gateway, Operations.PROCESS, [{"a": 0}])
+            raise RuntimeError
+
+    with pytest.raises(RuntimeError):
+        update_and_fail()
+
+    assert has_state(tables, initial_state)
+
+
+def test_updates_use_their_own_transaction_unless_joining() -> None:
+    initial_state = State(
+        source=TableState([{"a": 0, "b": 1}]),
+        outbound=TableState([{"a": 0, "process": "PULL", "is_flagged": "FALSE", "is_deprecated": "FALSE"}]),
+        local=TableState([{"a": 0, "b": 1}]),
+    )
+    tables, gateway = initialize("link", primary={"a"}, non_primary={"b"}, initial=initial_state)
+
+    with tables["outbound"].connection.transaction:
+        with pytest.raises(AssertionError, match="Nested transactions"):
+            apply_update(gateway, Operations.PROCESS, [{"a": 0}])
+
+
 def test_applying_multiple_commands() -> None:
     tables = create_tables("link", primary={"a"}, non_primary={"b"})
     gateway = create_gateway(tables)
@@ -687,3 +1094,46 @@ def test_applying_multiple_commands() -> None:
             local=TableState([{"a": 0, "b": 1}]),
         ),
     )
+
+
+def test_large_sets_of_primary_keys_are_staged_in_temporary_tables() -> None:
+    tables = create_tables("link", primary={"a"}, non_primary={"b"}, children={"link__part": ["c"]})
+    gateway = create_gateway(tables, staging_threshold=1)
+    set_state(
+        tables,
+        State(
+            source=TableState(
+                [{"a": 0, "b": 1}, {"a": 1, "b": 2}, {"a": 2, "b": 3}],
+                children={"link__part": [{"a": 0, "c": 4}, {"a": 2, "c": 5}]},
+            ),
+            local=TableState(children={"link__part": []}),
+        ),
+    )
+    identifiers = [gateway.translator.to_identifier({"a": a}) for a in range(3)]
+
+    apply_to_all(gateway, identifiers, Entity.pull)
+    pulled = has_state(
+        tables,
+        State(
+            source=TableState(
+                [{"a": 0, "b": 1}, {"a": 1, "b": 2}, {"a": 2, "b": 3}],
+                children={"link__part": [{"a": 0, "c": 4}, {"a": 2, "c": 5}]},
+            ),
+            outbound=TableState(
+                [{"a": a, "process": "NONE", "is_flagged": "FALSE", "is_deprecated": "FALSE"} for a in range(3)]
+            ),
+            local=TableState(
+                [{"a": 0, "b": 1}, {"a": 1, "b": 2}, {"a": 2, "b": 3}],
+                children={"link__part": [{"a": 0, "c": 4}, {"a": 2, "c": 5}]},
+            ),
+        ),
+    )
+    with as_stdin(StringIO("y")):
+        apply_to_all(gateway, identifiers, Entity.delete)
+
+    assert pulled
+    assert tables["outbound"].fetch(as_dict=True) == []
+    assert tables["local"].fetch(as_dict=True) == []
+    connections = [tables["source"].connection, tables["outbound"].connection, tables["local"].connection]
+    assert any(query.startswith("CREATE TEMPORARY TABLE") for connection in connections for query in connection.queries)
+    assert all(not connection.temporary_tables for connection in connections)
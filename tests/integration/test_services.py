@@ -1,14 +1,17 @@
 from __future__ import annotations
 
 from functools import partial
-from typing import Callable, Generic, TypedDict, TypeVar, cast
+from typing import Any, Callable, Generic, Iterable, TypedDict, TypeVar, cast
 
 import pytest
 
 from link.domain import commands, events
-from link.domain.state import Components, Processes, State, states
+from link.domain.batch import EntityBatch
+from link.domain.custom_types import Identifier
+from link.domain.state import Components, Entity, Processes, State, states
 from link.service.ensure import NoEntitiesRequested
-from link.service.handlers import delete, delete_entity, pull, pull_entity
+from link.service.executors import ChunkExecutor, SequentialChunkExecutor, ThreadedChunkExecutor
+from link.service.handlers import delete, delete_entity, pull, pull_entity, reserve
 from link.service.messagebus import CommandHandlers, EventHandlers, MessageBus
 from link.service.uow import UnitOfWork
 from tests.assignments import create_assignments, create_identifier, create_identifiers
@@ -74,7 +77,11 @@ _Event_co = TypeVar("_Event_co", bound=events.Event, covariant=True)
 _Command_contra = TypeVar("_Command_contra", bound=commands.Command, contravariant=True)
 
 
-def create_pull_service(uow: UnitOfWork) -> Callable[[commands.PullEntities], None]:
+def create_pull_service(
+    uow: UnitOfWork, chunk_size: int = 1, executor: ChunkExecutor | None = None
+) -> Callable[[commands.PullEntities], None]:
+    if executor is None:
+        executor = SequentialChunkExecutor(uow)
     command_handlers = cast(CommandHandlers, {})
     event_handlers = cast(EventHandlers, {})
     bus = MessageBus(uow, command_handlers, event_handlers)
@@ -85,10 +92,14 @@ def create_pull_service(uow: UnitOfWork) -> Callable[[commands.PullEntities], No
     event_handlers[events.ProcessFinished] = [lambda event: None]
     event_handlers[events.BatchProcessingStarted] = [lambda event: None]
     event_handlers[events.BatchProcessingFinished] = [lambda event: None]
-    return partial(pull, message_bus=bus)
+    return partial(pull, executor=executor, message_bus=bus, chunk_size=chunk_size)
 
 
-def create_delete_service(uow: UnitOfWork) -> Callable[[commands.DeleteEntities], None]:
+def create_delete_service(
+    uow: UnitOfWork, chunk_size: int = 1, executor: ChunkExecutor | None = None
+) -> Callable[[commands.DeleteEntities], None]:
+    if executor is None:
+        executor = SequentialChunkExecutor(uow)
     command_handlers = cast(CommandHandlers, {})
     event_handlers = cast(EventHandlers, {})
     bus = MessageBus(uow, command_handlers, event_handlers)
@@ -99,7 +110,7 @@ def create_delete_service(uow: UnitOfWork) -> Callable[[commands.DeleteEntities]
     event_handlers[events.ProcessFinished] = [lambda event: None]
     event_handlers[events.BatchProcessingStarted] = [lambda event: None]
     event_handlers[events.BatchProcessingFinished] = [lambda event: None]
-    return partial(delete, message_bus=bus)
+    return partial(delete, executor=executor, message_bus=bus, chunk_size=chunk_size)
 
 
 class EntityConfig(TypedDict):
@@ -186,3 +197,191 @@ def test_requesting_no_entities_raises_error(
     service = create_service(uow)
     with pytest.raises(NoEntitiesRequested):
         service(command_cls(frozenset()))
+
+
+class RoundTripCountingLinkGateway(FakeLinkGateway):
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.round_trips = 0
+
+    def create_entities(self, identifiers: Iterable[Identifier]) -> list[Entity]:
+        self.round_trips += 1
+        return super().create_entities(identifiers)
+
+    def apply(self, updates: Iterable[events.StateChanged]) -> None:
+        self.round_trips += 1
+        super().apply(updates)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 100, 1000])
+@pytest.mark.parametrize("n_entities", [1000, 10000, pytest.param(100000, marks=pytest.mark.slow)])
+def test_round_trips_scale_with_number_of_chunks(n_entities: int, chunk_size: int) -> None:
+    names = [str(i) for i in range(n_entities)]
+    gateway = RoundTripCountingLinkGateway(create_assignments({Components.SOURCE: names}))
+    pull_service = create_pull_service(UnitOfWork(gateway), chunk_size=chunk_size)
+    pull_service(commands.PullEntities(frozenset(create_identifiers(*names))))
+    n_chunks = -(-n_entities // chunk_size)
+    n_commands_per_pull = 3
+    assert gateway.round_trips == n_chunks * (1 + n_commands_per_pull)
+    assert gateway.assignments[Components.LOCAL] == create_identifiers(*names)
+
+
+def test_entities_in_chunk_are_committed_together() -> None:
+    gateway = RoundTripCountingLinkGateway(create_assignments({Components.SOURCE: {"1", "2", "3"}}))
+    pull_service = create_pull_service(UnitOfWork(gateway), chunk_size=2)
+    pull_service(commands.PullEntities(frozenset(create_identifiers("1", "2", "3"))))
+    assert gateway.round_trips == 2 * 4
+
+
+def create_worker_uow_factory(gateway: FakeLinkGateway) -> Callable[[], UnitOfWork]:
+    def create_worker_uow() -> UnitOfWork:
+        worker_gateway = FakeLinkGateway({})
+        worker_gateway.assignments = gateway.assignments
+        worker_gateway.tainted_identifiers = gateway.tainted_identifiers
+        worker_gateway.processes = gateway.processes
+        return UnitOfWork(worker_gateway)
+
+    return create_worker_uow
+
+
+def test_pulling_entities_with_multiple_workers() -> None:
+    names = [str(i) for i in range(100)]
+    gateway = FakeLinkGateway(create_assignments({Components.SOURCE: names}))
+    executor = ThreadedChunkExecutor(create_worker_uow_factory(gateway), max_workers=4)
+    uow = UnitOfWork(gateway)
+    command_handlers = cast(CommandHandlers, {})
+    event_handlers = cast(EventHandlers, {})
+    bus = MessageBus(uow, command_handlers, event_handlers)
+    command_handlers[commands.PullEntities] = partial(pull, executor=executor, message_bus=bus, chunk_size=7)
+    state_changes: list[events.StateChanged] = []
+    finished: list[Identifier] = []
+    event_handlers[events.StateChanged] = [state_changes.append]
+    event_handlers[events.ProcessStarted] = [lambda event: None]
+    event_handlers[events.ProcessFinished] = [lambda event: finished.append(event.identifier)]
+    event_handlers[events.BatchProcessingStarted] = [lambda event: None]
+    event_handlers[events.BatchProcessingFinished] = [lambda event: None]
+
+    bus.handle(commands.PullEntities(frozenset(create_identifiers(*names))))
+
+    assert gateway.assignments[Components.LOCAL] == create_identifiers(*names)
+    assert not gateway.processes[Processes.PULL]
+    assert sorted(finished) == sorted(create_identifiers(*names))
+    for identifier in create_identifiers(*names):
+        transitions = [
+            (event.transition.current, event.transition.new)
+            for event in state_changes
+            if event.identifier == identifier
+        ]
+        assert transitions == [
+            (states.Unshared, states.Activated),
+            (states.Activated, states.Received),
+            (states.Received, states.Shared),
+        ]
+
+
+def test_reserving_entities_starts_their_pull_processes() -> None:
+    names = [str(i) for i in range(10)]
+    gateway = FakeLinkGateway(create_assignments({Components.SOURCE: names}))
+    uow = UnitOfWork(gateway)
+    command_handlers = cast(CommandHandlers, {})
+    event_handlers = cast(EventHandlers, {})
+    bus = MessageBus(uow, command_handlers, event_handlers)
+    command_handlers[commands.ReserveEntities] = partial(
+        reserve, executor=SequentialChunkExecutor(uow), message_bus=bus, chunk_size=3
+    )
+    state_changes: list[events.StateChanged] = []
+    event_handlers[events.StateChanged] = [state_changes.append]
+    event_handlers[events.ProcessStarted] = [lambda event: None]
+    event_handlers[events.ProcessFinished] = [lambda event: None]
+    event_handlers[events.BatchProcessingStarted] = [lambda event: None]
+    event_handlers[events.BatchProcessingFinished] = [lambda event: None]
+
+    bus.handle(commands.ReserveEntities(frozenset(create_identifiers(*names))))
+
+    assert gateway.processes[Processes.PULL] == create_identifiers(*names)
+    assert not gateway.assignments[Components.LOCAL]
+    assert sorted(event.identifier for event in state_changes) == sorted(create_identifiers(*names))
+    assert {(event.transition.current, event.transition.new) for event in state_changes} == {
+        (states.Unshared, states.Activated)
+    }
+
+
+def test_error_in_worker_is_raised_after_preceding_chunks_are_handled() -> None:
+    class FailingLinkGateway(FakeLinkGateway):
+        def create_entities(self, identifiers: Iterable[Identifier]) -> list[Entity]:
+            identifiers = list(identifiers)
+            if create_identifier("failing") in identifiers:
+                raise RuntimeError
+            return super().create_entities(identifiers)
+
+    gateway = FakeLinkGateway(create_assignments({Components.SOURCE: {"1", "failing"}}))
+
+    def create_worker_uow() -> UnitOfWork:
+        worker_gateway = FailingLinkGateway({})
+        worker_gateway.assignments = gateway.assignments
+        return UnitOfWork(worker_gateway)
+
+    executor = ThreadedChunkExecutor(create_worker_uow, max_workers=2)
+    chunks = [[create_identifier("1")], [create_identifier("failing")]]
+    processed = executor.execute(chunks, EntityBatch.pull)
+    assert next(processed)[0] == [create_identifier("1")]
+    with pytest.raises(RuntimeError):
+        next(processed)
+
+
+def test_chunks_committed_after_error_in_worker_are_handled_before_error_is_raised() -> None:
+    class FailingLinkGateway(FakeLinkGateway):
+        def create_entities(self, identifiers: Iterable[Identifier]) -> list[Entity]:
+            identifiers = list(identifiers)
+            if create_identifier("failing") in identifiers:
+                raise RuntimeError
+            return super().create_entities(identifiers)
+
+    gateway = FakeLinkGateway(create_assignments({Components.SOURCE: {"1", "failing"}}))
+
+    def create_worker_uow() -> UnitOfWork:
+        worker_gateway = FailingLinkGateway({})
+        worker_gateway.assignments = gateway.assignments
+        return UnitOfWork(worker_gateway)
+
+    executor = ThreadedChunkExecutor(create_worker_uow, max_workers=2)
+    chunks = [[create_identifier("failing")], [create_identifier("1")]]
+    processed = executor.execute(chunks, EntityBatch.pull)
+    assert next(processed)[0] == [create_identifier("1")]
+    with pytest.raises(RuntimeError):
+        next(processed)
+
+
+def test_chunks_are_submitted_to_workers_on_demand() -> None:
+    names = [str(i) for i in range(10)]
+    gateway = FakeLinkGateway(create_assignments({Components.SOURCE: names}))
+    executor = ThreadedChunkExecutor(create_worker_uow_factory(gateway), max_workers=2)
+    consumed: list[str] = []
+
+    def create_chunks() -> Iterable[list[Identifier]]:
+        for name in names:
+            consumed.append(name)
+            yield [create_identifier(name)]
+
+    processed = executor.execute(create_chunks(), EntityBatch.pull)
+    next(processed)
+    assert len(consumed) <= 3
+    assert len(list(processed)) == 9
+
+
+def test_closing_executor_releases_units_of_work() -> None:
+    names = [str(i) for i in range(10)]
+    gateway = FakeLinkGateway(create_assignments({Components.SOURCE: names}))
+    created: list[UnitOfWork] = []
+    released: list[UnitOfWork] = []
+
+    def create_worker_uow() -> UnitOfWork:
+        uow = create_worker_uow_factory(gateway)()
+        created.append(uow)
+        return uow
+
+    executor = ThreadedChunkExecutor(create_worker_uow, max_workers=2, release=released.append)
+    list(executor.execute([[identifier] for identifier in create_identifiers(*names)], EntityBatch.pull))
+    executor.close()
+    assert created
+    assert sorted(map(id, released)) == sorted(map(id, created))
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Iterable, Mapping
+from typing import Any, Iterable, Mapping
 
 import pytest
 
@@ -38,6 +38,18 @@ def test_updates_are_applied_to_gateway_on_commit() -> None:
     assert actual == expected
 
 
+def test_updates_to_entities_created_in_bulk_are_applied_to_gateway_on_commit() -> None:
+    gateway, uow = initialize({Components.SOURCE: {"1", "2"}, Components.OUTBOUND: {"2"}, Components.LOCAL: {"2"}})
+    with uow:
+        entity1, entity2 = uow.entities.create_entities([create_identifier("1"), create_identifier("2")])
+        entity1.pull()
+        entity2.delete()
+        uow.commit()
+    actual = get_entity_states(gateway, create_identifiers("1", "2"))
+    expected = {(create_identifier("1"), states.Shared), (create_identifier("2"), states.Unshared)}
+    assert actual == expected
+
+
 def test_updates_are_discarded_on_context_exit() -> None:
     gateway, uow = initialize({Components.SOURCE: {"1", "2"}, Components.OUTBOUND: {"2"}, Components.LOCAL: {"2"}})
     with uow:
@@ -176,3 +188,69 @@ def test_events_can_only_be_collected_outside_of_context() -> None:
         uow.commit()
         with pytest.raises(RuntimeError, match="inside context"):
             list(uow.collect_new_events())
+
+
+class RecordingLinkGateway(FakeLinkGateway):
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.applied: list[list[Commands | None]] = []
+
+    def apply(self, updates: Iterable[events.StateChanged]) -> None:
+        updates = list(updates)
+        self.applied.append([update.command for update in updates])
+        super().apply(updates)
+
+
+def test_updates_are_applied_in_waves_preserving_order_per_entity() -> None:
+    gateway = RecordingLinkGateway(
+        create_assignments({Components.SOURCE: {"1", "2", "3"}, Components.OUTBOUND: {"3"}, Components.LOCAL: {"3"}})
+    )
+    uow = UnitOfWork(gateway)
+    with uow:
+        entity1, entity2, entity3 = uow.entities.create_entities(create_identifiers_in_order("1", "2", "3"))
+        entity1.pull()
+        entity2.pull()
+        entity3.delete()
+        uow.commit()
+    assert gateway.applied == [
+        [Commands.START_PULL_PROCESS, Commands.START_PULL_PROCESS, Commands.START_DELETE_PROCESS],
+        [Commands.ADD_TO_LOCAL, Commands.ADD_TO_LOCAL, Commands.REMOVE_FROM_LOCAL],
+        [Commands.FINISH_PULL_PROCESS, Commands.FINISH_PULL_PROCESS, Commands.FINISH_DELETE_PROCESS],
+    ]
+
+
+def create_identifiers_in_order(*names: str) -> list[Identifier]:
+    return [create_identifier(name) for name in names]
+
+
+def test_updates_of_batches_are_applied_in_waves_on_commit() -> None:
+    gateway = RecordingLinkGateway(create_assignments({Components.SOURCE: {"1", "2"}}))
+    uow = UnitOfWork(gateway)
+    with uow:
+        uow.create_batch(create_identifiers_in_order("1", "2")).pull()
+        uow.commit()
+    assert gateway.applied == [
+        [Commands.START_PULL_PROCESS, Commands.START_PULL_PROCESS],
+        [Commands.ADD_TO_LOCAL, Commands.ADD_TO_LOCAL],
+        [Commands.FINISH_PULL_PROCESS, Commands.FINISH_PULL_PROCESS],
+    ]
+    assert get_entity_states(gateway, create_identifiers("1", "2")) == {
+        (create_identifier("1"), states.Shared),
+        (create_identifier("2"), states.Shared),
+    }
+    assert len([event for event in uow.collect_new_events() if isinstance(event, events.StateChanged)]) == 6
+
+
+def test_updates_of_batches_are_discarded_on_rollback() -> None:
+    gateway, uow = initialize({Components.SOURCE: {"1"}})
+    with uow:
+        uow.create_batch(create_identifiers("1")).pull()
+        uow.rollback()
+    assert get_entity_states(gateway, create_identifiers("1")) == {(create_identifier("1"), states.Unshared)}
+    assert list(uow.collect_new_events()) == []
+
+
+def test_batches_can_not_be_created_outside_of_context() -> None:
+    _, uow = initialize({Components.SOURCE: {"1"}})
+    with pytest.raises(RuntimeError, match="outside"):
+        uow.create_batch(create_identifiers("1"))
@@ -1,7 +1,15 @@
 from __future__ import annotations
 
+from decimal import Decimal
+from typing import Any
+
+import numpy as np
+import pytest
+
+from link.adapters import identification
 from link.adapters.custom_types import PrimaryKey
-from link.adapters.identification import IdentificationTranslator
+from link.adapters.identification import IdentificationTranslator, IdentifierCollision, derive_identifier
+from link.domain.custom_types import Identifier
 
 
 def test_primary_key_translated_to_identifier_and_back_is_identical_to_original() -> None:
@@ -28,3 +36,123 @@ def test_translating_multiple_primary_keys_to_identifiers() -> None:
     translator = IdentificationTranslator()
     primary_keys = [{"a": 5, "b": 4}, {"a": 12, "b": 8}, {"a": 7, "b": 0}]
     assert translator.to_identifiers(primary_keys) == {translator.to_identifier(key) for key in primary_keys}
+
+
+def test_identifiers_are_the_same_across_translators() -> None:
+    primary_key: PrimaryKey = {"a": 5, "b": "x"}
+    assert IdentificationTranslator().to_identifier(primary_key) == IdentificationTranslator().to_identifier(
+        primary_key
+    )
+
+
+def test_identifiers_do_not_depend_on_order_of_attributes() -> None:
+    assert derive_identifier({"a": 5, "b": "x"}) == derive_identifier({"b": "x", "a": 5})
+
+
+@pytest.mark.parametrize(
+    "value", [5, 5.0, np.int64(5), np.uint8(5), np.float32(5), Decimal(5), Decimal("5.00"), Decimal("5E0")]
+)
+def test_identifiers_do_not_depend_on_numeric_type(value: Any) -> None:
+    assert derive_identifier({"a": value}) == derive_identifier({"a": 5})
+
+
+@pytest.mark.parametrize("value", [0.25, np.float32(0.25), Decimal("0.25"), Decimal("0.2500")])
+def test_identifiers_of_fractional_numbers_do_not_depend_on_numeric_type(value: Any) -> None:
+    assert derive_identifier({"a": value}) == derive_identifier({"a": 0.25})
+
+
+@pytest.mark.parametrize(
+    ("primary_key1", "primary_key2"),
+    [
+        ({"a": "1"}, {"a": 1}),
+        ({"a": "1\x1fb=2"}, {"a": "1", "b": "2"}),
+        ({"a": "b=1"}, {"a=b": 1}),
+        ({"a": 1.5}, {"a": "1.5"}),
+    ],
+)
+def test_canonical_representations_of_different_primary_keys_differ(
+    primary_key1: PrimaryKey, primary_key2: PrimaryKey
+) -> None:
+    assert identification.canonicalize(primary_key1) != identification.canonicalize(primary_key2)
+
+
+def test_colliding_identifiers_raise_error(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(identification, "derive_identifier", lambda primary_key: Identifier(1))
+    translator = IdentificationTranslator()
+    translator.to_identifier({"a": 1})
+    assert translator.to_identifier({"a": 1.0}) == Identifier(1)
+    with pytest.raises(IdentifierCollision):
+        translator.to_identifier({"a": 2})
+
+
+def test_identifiers_are_stable() -> None:
+    assert derive_identifier({"a": 1, "b": "x"}) == 560272390841641010
+
+
+def test_translating_multiple_identifiers_to_primary_keys_preserves_order() -> None:
+    translator = IdentificationTranslator()
+    primary_keys: list[PrimaryKey] = [{"a": 5, "b": 4}, {"a": 12, "b": 8}, {"a": 7, "b": 0}]
+    identifiers = [translator.to_identifier(key) for key in primary_keys]
+    assert translator.to_primary_keys(reversed(identifiers)) == list(reversed(primary_keys))
+
+
+def test_translating_identifiers_of_primary_keys_with_different_attributes() -> None:
+    translator = IdentificationTranslator()
+    primary_keys: list[PrimaryKey] = [{"a": 5, "b": 4}, {"c": "x"}, {"b": 1, "c": "y"}]
+    identifiers = [translator.to_identifier(key) for key in primary_keys]
+    assert translator.to_primary_keys(identifiers) == primary_keys
+
+
+def test_primary_keys_are_remembered_without_max_size() -> None:
+    translator = IdentificationTranslator()
+    with translator.scope():
+        identifier = translator.to_identifier({"a": 1})
+    assert translator.to_primary_key(identifier) == {"a": 1}
+
+
+def test_primary_keys_are_forgotten_after_scope_with_max_size_of_zero() -> None:
+    translator = IdentificationTranslator(max_size=0)
+    with translator.scope():
+        identifier = translator.to_identifier({"a": 1})
+        with translator.scope():
+            translator.to_identifier({"a": 2})
+        assert translator.to_primary_key(identifier) == {"a": 1}
+    assert len(translator) == 0
+    with pytest.raises(KeyError):
+        translator.to_primary_key(identifier)
+
+
+def test_identifiers_stay_the_same_after_eviction() -> None:
+    translator = IdentificationTranslator(max_size=0)
+    with translator.scope():
+        old = translator.to_identifier({"a": 1})
+    with translator.scope():
+        new = translator.to_identifier({"a": 1})
+    assert new == old
+
+
+def test_least_recently_used_primary_keys_are_evicted() -> None:
+    translator = IdentificationTranslator(max_size=2)
+    with translator.scope():
+        for value in range(3):
+            translator.to_identifier({"a": value})
+        translator.to_identifier({"a": 0})
+    assert translator.to_primary_keys(translator.to_identifier({"a": value}) for value in (2, 0)) == [
+        {"a": 2},
+        {"a": 0},
+    ]
+    assert len(translator) == 2
+
+
+def test_primary_keys_are_not_evicted_if_scope_exits_with_error() -> None:
+    translator = IdentificationTranslator(max_size=0)
+    identifiers = []
+
+    def translate_and_fail() -> None:
+        with translator.scope():
+            identifiers.append(translator.to_identifier({"a": 1}))
+            raise RuntimeError
+
+    with pytest.raises(RuntimeError):
+        translate_and_fail()
+    assert translator.to_primary_key(identifiers[0]) == {"a": 1}
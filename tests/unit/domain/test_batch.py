@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import time
+from collections.abc import Callable
+from itertools import cycle, islice
+
+import pytest
+
+from link.domain import events
+from link.domain.batch import EntityBatch
+from link.domain.custom_types import Identifier
+from link.domain.link import create_entity
+from link.domain.state import STATE_MAP, Commands, Components, Entity, Operations, Processes, Transition, states
+from tests.assignments import create_identifier
+
+from .types import EntityConfig
+
+
+def create_entity_configs() -> list[EntityConfig]:
+    configs: list[EntityConfig] = []
+    for persistent_state in STATE_MAP:
+        processes = [Processes.PULL, Processes.DELETE] if persistent_state.has_process else [Processes.NONE]
+        for process in processes:
+            configs.append(
+                {
+                    "components": list(persistent_state.presence),
+                    "is_tainted": persistent_state.is_tainted,
+                    "process": process,
+                }
+            )
+    return configs
+
+
+def create_entities_in_all_states() -> list[Entity]:
+    return [
+        create_entity(create_identifier(str(index)), **config) for index, config in enumerate(create_entity_configs())
+    ]
+
+
+@pytest.mark.parametrize(
+    ("entity_operation", "batch_operation"),
+    [
+        (Entity.pull, EntityBatch.pull),
+        (Entity.delete, EntityBatch.delete),
+        (Entity.start_pull, EntityBatch.start_pull),
+    ],
+)
+def test_batch_is_equivalent_to_individual_entities(
+    entity_operation: Callable[[Entity], None], batch_operation: Callable[[EntityBatch], None]
+) -> None:
+    batch = EntityBatch.from_entities(create_entities_in_all_states())
+    entities = create_entities_in_all_states()
+    batch_operation(batch)
+    for entity in entities:
+        entity_operation(entity)
+    assert batch.states == [entity.state for entity in entities]
+    assert batch.processes == [entity.current_process for entity in entities]
+    assert batch.is_tainted == [entity.is_tainted for entity in entities]
+    assert list(batch.events) == [event for entity in entities for event in entity.events]
+
+
+def test_events_of_an_entity_are_recorded_in_order() -> None:
+    identifier = create_identifier("1")
+    entity = create_entity(identifier, components=[Components.SOURCE], is_tainted=False, process=Processes.NONE)
+    batch = EntityBatch.from_entities([entity])
+    batch.pull()
+    assert list(batch.events) == [
+        events.StateChanged(
+            Operations.START_PULL,
+            identifier,
+            Transition(states.Unshared, states.Activated),
+            Commands.START_PULL_PROCESS,
+        ),
+        events.StateChanged(
+            Operations.PROCESS, identifier, Transition(states.Activated, states.Received), Commands.ADD_TO_LOCAL
+        ),
+        events.StateChanged(
+            Operations.PROCESS, identifier, Transition(states.Received, states.Shared), Commands.FINISH_PULL_PROCESS
+        ),
+    ]
+
+
+@pytest.mark.slow()
+def test_batch_is_faster_than_individual_entities() -> None:
+    entities = [
+        create_entity(Identifier(index), **config)
+        for index, config in enumerate(islice(cycle(create_entity_configs()), 1_000_000))
+    ]
+    batch = EntityBatch.from_entities(entities)
+    start = time.perf_counter()
+    batch.pull()
+    batch_duration = time.perf_counter() - start
+    start = time.perf_counter()
+    for entity in entities:
+        entity.pull()
+    entity_duration = time.perf_counter() - start
+    assert batch_duration < entity_duration
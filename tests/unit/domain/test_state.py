@@ -1,10 +1,26 @@
 from __future__ import annotations
 
+from collections.abc import Iterable
+from pathlib import Path
+
 import pytest
 
 from link.domain import events
 from link.domain.link import create_entity
-from link.domain.state import Commands, Components, Operations, Processes, State, Transition, states
+from link.domain.state import (
+    DELETE_PATHS,
+    PULL_PATHS,
+    STATE_MAP,
+    Commands,
+    Components,
+    Operations,
+    Processes,
+    State,
+    Transition,
+    encode,
+    lookup_transition,
+    states,
+)
 from tests.assignments import create_identifier
 
 from .types import EntityConfig
@@ -215,3 +231,51 @@ def test_starting_delete_on_tainted_entity() -> None:
     assert entity.state == transition.new
     assert entity.current_process == Processes.DELETE
     assert list(entity.events) == expected_events
+
+
+def render_transition_tables() -> str:
+    def format_process(process: Processes) -> str:
+        return process.name.lower() if process is not Processes.NONE else "-"
+
+    def format_commands(commands: Iterable[Commands]) -> str:
+        return ", ".join(command.name.lower().replace("_", " ") for command in commands) or "-"
+
+    valid_states = [
+        (state, process, persistent_state.is_tainted)
+        for persistent_state, state in STATE_MAP.items()
+        for process in ([Processes.PULL, Processes.DELETE] if persistent_state.has_process else [Processes.NONE])
+    ]
+    lines = [
+        "| State | Process | Is flagged | Operation | New state | New process | Command |",
+        "|-------|---------|------------|-----------|-----------|-------------|---------|",
+    ]
+    for state, process, is_tainted in valid_states:
+        for operation in Operations:
+            compiled = lookup_transition(state, operation, process, is_tainted)
+            if compiled is None:
+                continue
+            lines.append(
+                f"| {state.__name__} | {format_process(process)} | {'yes' if is_tainted else 'no'} "
+                f"| {operation.name.lower().replace('_', ' ')} | {compiled.transition.new.__name__} "
+                f"| {format_process(compiled.process)} | {format_commands([compiled.command])} |"
+            )
+    lines.extend(
+        [
+            "",
+            "| State | Process | Is flagged | Commands when pulled | Commands when deleted |",
+            "|-------|---------|------------|----------------------|-----------------------|",
+        ]
+    )
+    for state, process, is_tainted in valid_states:
+        code = encode(state, process, is_tainted)
+        lines.append(
+            f"| {state.__name__} | {format_process(process)} | {'yes' if is_tainted else 'no'} "
+            f"| {format_commands(PULL_PATHS[code].commands)} | {format_commands(DELETE_PATHS[code].commands)} |"
+        )
+    return "\n".join(lines)
+
+
+def test_documented_transition_tables_are_up_to_date() -> None:
+    documentation = (Path(__file__).parents[3] / "docs" / "entity_states.md").read_text()
+    tables = render_transition_tables()
+    assert tables in documentation, f"Update the transition tables in docs/entity_states.md to:\n\n{tables}"
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Optional, cast
+
+import pytest
+
+from link.infrastructure.daemon import SyncDaemon
+
+
+@dataclass
+class FakeClock:
+    now: float = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@dataclass
+class FakeStop:
+    clock: FakeClock
+    waits: list[float] = field(default_factory=list)
+
+    def wait(self, timeout: float) -> bool:
+        self.waits.append(timeout)
+        self.clock.now += timeout
+        return False
+
+
+@dataclass
+class FakePendingDeletes:
+    rows: list[dict[str, Any]]
+    n_fetches: int = 0
+
+    def proj(self) -> FakePendingDeletes:
+        return self
+
+    def fetch(self, *, as_dict: bool) -> list[dict[str, Any]]:
+        self.n_fetches += 1
+        return list(self.rows)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+
+@dataclass
+class FakeSource:
+    rows: list[dict[str, Any]]
+    flagged: FakePendingDeletes = field(default_factory=lambda: FakePendingDeletes([]))
+    pulled: list[dict[str, Any]] = field(default_factory=list)
+    error: Optional[Exception] = None
+    primary_key: tuple[str, ...] = ("a",)
+    full_table_name: str = "`schema`.`table`"
+
+    def proj(self) -> FakeSource:
+        return self
+
+    def fetch(self, *, as_dict: bool, order_by: list[str], limit: int) -> list[dict[str, Any]]:
+        return sorted(self.rows, key=lambda row: row["a"], reverse=True)[:limit]
+
+    @property
+    def pending_deletes(self) -> FakePendingDeletes:
+        return self.flagged
+
+    def sync(self, *, reconcile_every: int, page_size: Optional[int]) -> int:
+        if self.error is not None:
+            raise self.error
+        new = [row for row in self.rows if row not in self.pulled]
+        self.pulled.extend(new)
+        return len(new)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+
+def run(source: FakeSource, *, max_polls: int, **kwargs: Any) -> tuple[SyncDaemon, FakeStop]:
+    clock = FakeClock()
+    stop = FakeStop(clock)
+    daemon = SyncDaemon(cast(Any, [source]), clock=clock, **kwargs)
+    daemon.run(stop=cast(Any, stop), max_polls=max_polls)
+    return daemon, stop
+
+
+def test_unchanged_sources_are_polled_less_often() -> None:
+    _, stop = run(FakeSource([{"a": 1}]), max_polls=6, min_interval=1, max_interval=8)
+
+    assert stop.waits == [0, 1, 2, 4, 8, 8]
+
+
+def test_unchanged_sources_are_only_synced_once() -> None:
+    daemon, _ = run(FakeSource([{"a": 1}, {"a": 2}]), max_polls=3)
+
+    metrics = daemon.metrics["`schema`.`table`"]
+    assert (metrics.n_polls, metrics.n_syncs, metrics.n_pulled) == (3, 1, 2)
+
+
+def test_changed_sources_are_synced_and_polled_again_soon() -> None:
+    source = FakeSource([{"a": 1}])
+    clock = FakeClock()
+    stop = FakeStop(clock)
+    daemon = SyncDaemon(cast(Any, [source]), clock=clock, min_interval=1)
+    daemon.run(stop=cast(Any, stop), max_polls=3)
+    source.rows.append({"a": 2})
+
+    daemon.run(stop=cast(Any, stop), max_polls=1)
+    daemon.run(stop=cast(Any, stop), max_polls=1)
+
+    assert stop.waits[-2:] == [4, 1]
+    metrics = daemon.metrics["`schema`.`table`"]
+    assert (metrics.n_syncs, metrics.n_pulled, metrics.lag) == (2, 2, 4)
+
+
+def test_flagged_entities_are_reported_as_pending_deletes() -> None:
+    daemon, _ = run(FakeSource([{"a": 1}], flagged=FakePendingDeletes([{"a": 1}])), max_polls=1)
+
+    assert daemon.metrics["`schema`.`table`"].pending_deletes == [{"a": 1}]
+
+
+def test_flagged_entities_are_only_fetched_when_their_number_changes() -> None:
+    source = FakeSource([{"a": 1}, {"a": 2}], flagged=FakePendingDeletes([{"a": 1}]))
+    clock = FakeClock()
+    stop = FakeStop(clock)
+    daemon = SyncDaemon(cast(Any, [source]), clock=clock)
+    daemon.run(stop=cast(Any, stop), max_polls=3)
+    source.flagged.rows.append({"a": 2})
+
+    daemon.run(stop=cast(Any, stop), max_polls=1)
+
+    assert source.flagged.n_fetches == 2
+    assert daemon.metrics["`schema`.`table`"].pending_deletes == [{"a": 1}, {"a": 2}]
+
+
+def test_flagging_entities_does_not_trigger_sync() -> None:
+    source = FakeSource([{"a": 1}])
+    clock = FakeClock()
+    stop = FakeStop(clock)
+    daemon = SyncDaemon(cast(Any, [source]), clock=clock)
+    daemon.run(stop=cast(Any, stop), max_polls=1)
+    source.flagged.rows.append({"a": 1})
+
+    daemon.run(stop=cast(Any, stop), max_polls=1)
+
+    assert daemon.metrics["`schema`.`table`"].n_syncs == 1
+
+
+def test_failed_syncs_are_retried() -> None:
+    source = FakeSource([{"a": 1}], error=RuntimeError("sync failed"))
+
+    daemon, _ = run(source, max_polls=2)
+
+    metrics = daemon.metrics["`schema`.`table`"]
+    assert (metrics.n_failures, metrics.n_syncs) == (2, 0)
+
+
+def test_stopping_ends_run() -> None:
+    class Stopped:
+        def wait(self, timeout: float) -> bool:
+            return True
+
+    source = FakeSource([{"a": 1}])
+    daemon = SyncDaemon(cast(Any, [source]))
+
+    daemon.run(stop=cast(Any, Stopped()))
+
+    assert daemon.metrics["`schema`.`table`"].n_polls == 0
+
+
+@pytest.mark.parametrize(
+    ("kwargs", "message"),
+    [({"min_interval": 0}, "min_interval"), ({"max_interval": 0.5}, "max_interval"), ({"backoff": 0.5}, "backoff")],
+)
+def test_invalid_options_raise_error(kwargs: dict[str, Any], message: str) -> None:
+    with pytest.raises(ValueError, match=message):
+        SyncDaemon([], **kwargs)
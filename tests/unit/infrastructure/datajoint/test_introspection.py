@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, cast
+
+import pytest
+
+from link.infrastructure.factory import spawn_table_class
+from link.infrastructure.introspection import PartTableCache, SchemaCache
+
+
+@dataclass
+class FakeTable:
+    table_name: str
+    child_names: list[str] = field(default_factory=list)
+
+    @property
+    def full_table_name(self) -> str:
+        return f"`schema`.`{self.table_name}`"
+
+    def children(self, *, as_objects: bool) -> list[FakeTable]:
+        return [FakeTable(name) for name in self.child_names]
+
+
+def get_parts(cache: PartTableCache, master: FakeTable) -> dict[str, Any]:
+    return cache(cast(Any, master))
+
+
+def test_only_part_tables_are_returned() -> None:
+    master = FakeTable("master", ["master__part1", "other", "master__part2"])
+
+    parts = get_parts(PartTableCache(), master)
+
+    assert {name: part.table_name for name, part in parts.items()} == {
+        "__part1": "master__part1",
+        "__part2": "master__part2",
+    }
+
+
+def test_part_tables_are_reused_while_children_do_not_change() -> None:
+    cache = PartTableCache()
+    master = FakeTable("master", ["master__part"])
+
+    assert get_parts(cache, master)["__part"] is get_parts(cache, master)["__part"]
+
+
+def test_part_tables_are_discovered_again_when_children_change() -> None:
+    cache = PartTableCache()
+    master = FakeTable("master", ["master__part1"])
+    get_parts(cache, master)
+
+    master.child_names.append("master__part2")
+
+    assert set(get_parts(cache, master)) == {"__part1", "__part2"}
+
+
+def test_cached_table_names_are_loaded(tmp_path: Path) -> None:
+    cache = SchemaCache(tmp_path)
+    cache.store("host", "schema", "1:2", ["foo", "foo__bar"])
+
+    assert SchemaCache(tmp_path).load("host", "schema", lambda: "1:2") == ["foo", "foo__bar"]
+
+
+@pytest.mark.parametrize(
+    ("host", "schema", "fingerprint"), [("other", "schema", "1:2"), ("host", "other", "1:2"), ("host", "schema", "1:3")]
+)
+def test_cached_table_names_are_only_loaded_if_entry_matches(
+    tmp_path: Path, host: str, schema: str, fingerprint: str
+) -> None:
+    cache = SchemaCache(tmp_path)
+    cache.store("host", "schema", "1:2", ["foo"])
+
+    assert SchemaCache(tmp_path).load(host, schema, lambda: fingerprint) is None
+
+
+def test_unreadable_entries_are_ignored(tmp_path: Path) -> None:
+    cache = SchemaCache(tmp_path)
+    cache.store("host", "schema", "1:2", ["foo"])
+    for path in tmp_path.iterdir():
+        path.write_text("{")
+
+    assert SchemaCache(tmp_path).load("host", "schema", lambda: "1:2") is None
+
+
+def test_table_names_are_cached_in_memory_without_directory() -> None:
+    cache = SchemaCache()
+    cache.store("host", "schema", "1:2", ["foo"])
+
+    assert cache.load("host", "schema", lambda: "1:2") == ["foo"]
+    assert cache.load("host", "other", lambda: "1:2") is None
+
+
+def test_fingerprint_is_not_computed_for_entries_in_memory(tmp_path: Path) -> None:
+    cache = SchemaCache(tmp_path)
+    cache.store("host", "schema", "1:2", ["foo"])
+
+    def fingerprint() -> str:
+        raise AssertionError
+
+    assert cache.load("host", "schema", fingerprint) == ["foo"]
+
+
+def test_invalidated_entries_are_forgotten(tmp_path: Path) -> None:
+    cache = SchemaCache(tmp_path)
+    cache.store("host", "schema", "1:2", ["foo"])
+
+    cache.invalidate("host", "schema")
+
+    assert cache.load("host", "schema", lambda: "1:2") is None
+    assert SchemaCache(tmp_path).load("host", "schema", lambda: "1:2") is None
+
+
+class FakeCursor:
+    def __init__(self, rows: list[tuple[Any, ...]]) -> None:
+        self.rows = rows
+
+    def __iter__(self) -> Iterator[tuple[Any, ...]]:
+        return iter(self.rows)
+
+    def fetchone(self) -> tuple[Any, ...]:
+        return self.rows[0]
+
+
+@dataclass
+class FakeSchema:
+    table_names: list[str]
+    database: str = "schema"
+    spawned: list[type] = field(default_factory=list)
+
+    @property
+    def connection(self) -> FakeSchema:
+        return self
+
+    @property
+    def conn_info(self) -> dict[str, str]:
+        return {"host": "host"}
+
+    def query(self, query: str, args: Any = None) -> FakeCursor:
+        if query.startswith("SHOW TABLES"):
+            return FakeCursor([(name,) for name in self.table_names])
+        return FakeCursor([(len(self.table_names), 0)])
+
+    def __call__(self, cls: type, context: dict[str, Any]) -> type:
+        parts = [name for name in vars(cls) if not name.startswith("_")]
+        if any(f"#master__{part.lower()}" not in self.table_names for part in parts):
+            raise RuntimeError("Table does not exist")
+        self.spawned.append(cls)
+        return cls
+
+
+def test_stale_entries_are_invalidated_when_spawning_fails(tmp_path: Path) -> None:
+    cache = SchemaCache(tmp_path)
+    cache.store("host", "schema", "2:0", ["#master", "#master__dropped"])
+    schema = FakeSchema(["#master", "#master__part"])
+
+    table_cls = spawn_table_class(cast(Any, schema), "Master", cache)
+
+    assert table_cls is not None
+    assert hasattr(table_cls, "Part")
+    assert not hasattr(table_cls, "Dropped")
+    assert cache.load("host", "schema", lambda: "2:0") == ["#master", "#master__part"]
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Any
+from uuid import UUID
+
+import numpy as np
+import pytest
+
+from link.infrastructure.marks import create_mark, create_sync_name, decode_mark, encode_mark, to_row_literal
+
+
+def test_mark_contains_values_of_attributes_in_order() -> None:
+    row = {"a": np.int64(1), "b": "it's", "c": datetime(2024, 1, 2, 3, 4, 5)}
+
+    mark = create_mark(row, ["c", "a"])
+
+    assert mark == [datetime(2024, 1, 2, 3, 4, 5), 1]
+    assert type(mark[1]) is int
+
+
+def test_mark_is_rendered_as_escaped_row_literal() -> None:
+    assert to_row_literal(["it's", 1]) == "('it\\'s', 1)"
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        None,
+        1,
+        1.5,
+        "') OR 1=1 -- ",
+        datetime(2024, 1, 2, 3, 4, 5, 6),
+        date(2024, 1, 2),
+        timedelta(hours=1, microseconds=5),
+        Decimal("1.50"),
+        UUID("12345678-1234-5678-1234-567812345678"),
+        b"\x00\xff",
+    ],
+)
+def test_encoded_mark_decodes_to_same_values(value: Any) -> None:
+    encoded = encode_mark([value])
+
+    assert isinstance(encoded, str)
+    assert decode_mark(encoded) == [value]
+
+
+def test_encoding_mark_with_unsupported_value_raises_error() -> None:
+    with pytest.raises(TypeError, match="object"):
+        encode_mark([object()])
+
+
+def test_sync_name_depends_on_restriction_and_attributes() -> None:
+    names = {
+        create_sync_name("", ["a"]),
+        create_sync_name(" WHERE (`a` = 1)", ["a"]),
+        create_sync_name("", ["a", "b"]),
+        create_sync_name("", ["ab"]),
+    }
+
+    assert len(names) == 4
+    assert all(len(name) == 32 for name in names)
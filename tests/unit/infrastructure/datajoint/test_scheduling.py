@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Optional, cast
+
+import pytest
+
+from link.infrastructure.scheduling import pull_tables
+
+
+@dataclass
+class FakeConnection:
+    host: str = "host"
+
+    @property
+    def conn_info(self) -> dict[str, str]:
+        return {"host": self.host}
+
+
+@dataclass
+class FakeSource:
+    name: str
+    log: list[str]
+    parents: list[FakeSource] = field(default_factory=list)
+    connection: FakeConnection = field(default_factory=FakeConnection)
+    duration: float = 0.05
+    error: Optional[Exception] = None
+    active: list[str] = field(default_factory=list)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    @property
+    def full_table_name(self) -> str:
+        return f"`schema`.`{self.name}`"
+
+    def ancestors(self) -> list[str]:
+        return [self.full_table_name] + [name for parent in self.parents for name in parent.ancestors()]
+
+    def pull(self, *, page_size: Optional[int] = None) -> None:
+        with self.lock:
+            self.active.append(self.name)
+            self.log.append(f"start {self.name} {len(self.active)}")
+        time.sleep(self.duration)
+        with self.lock:
+            self.active.remove(self.name)
+            self.log.append(f"end {self.name}")
+        if self.error is not None:
+            raise self.error
+
+
+def pull(*sources: FakeSource, max_pulls_per_server: int = 2) -> None:
+    pull_tables(cast(Any, sources), max_pulls_per_server=max_pulls_per_server)
+
+
+def create_sources(*names: str, **kwargs: Any) -> list[FakeSource]:
+    log: list[str] = []
+    active: list[str] = []
+    lock = threading.Lock()
+    return [FakeSource(name, log, active=active, lock=lock, connection=FakeConnection(), **kwargs) for name in names]
+
+
+def test_dependent_tables_are_pulled_after_their_ancestors() -> None:
+    parent, child, grandchild = create_sources("parent", "child", "grandchild")
+    child.parents = [parent]
+    grandchild.parents = [child]
+
+    pull(grandchild, child, parent)
+
+    assert parent.log == [
+        "start parent 1",
+        "end parent",
+        "start child 1",
+        "end child",
+        "start grandchild 1",
+        "end grandchild",
+    ]
+
+
+def test_independent_tables_are_pulled_concurrently() -> None:
+    first, second = create_sources("first", "second")
+
+    pull(first, second)
+
+    assert "start first 2" in first.log or "start second 2" in first.log
+
+
+def test_pulls_from_same_server_are_limited() -> None:
+    sources = create_sources("first", "second", "third")
+
+    pull(*sources, max_pulls_per_server=1)
+
+    assert all(not entry.startswith("start") or entry.endswith(" 1") for entry in sources[0].log)
+
+
+def test_tables_sharing_a_connection_are_pulled_one_after_another() -> None:
+    first, second = create_sources("first", "second")
+    second.connection = first.connection
+
+    pull(first, second)
+
+    assert all(not entry.startswith("start") or entry.endswith(" 1") for entry in first.log)
+
+
+def test_dependents_of_failed_tables_are_not_pulled() -> None:
+    parent, child = create_sources("parent", "child")
+    child.parents = [parent]
+    parent.error = RuntimeError("pull failed")
+
+    with pytest.raises(RuntimeError, match="pull failed"):
+        pull(parent, child)
+
+    assert parent.log == ["start parent 1", "end parent"]
+
+
+def test_invalid_limit_raises_error() -> None:
+    with pytest.raises(ValueError, match="max_pulls_per_server"):
+        pull(*create_sources("table"), max_pulls_per_server=0)
+
+
+def test_tables_given_more_than_once_raise_error() -> None:
+    (table,) = create_sources("table")
+
+    with pytest.raises(ValueError, match="more than once"):
+        pull(table, table)
+
+    assert table.log == []
+
+
+def test_tables_waiting_for_their_connection_do_not_block_other_tables_on_same_server() -> None:
+    first, second, third = create_sources("first", "second", "third")
+    second.connection = first.connection
+
+    pull(first, second, third, max_pulls_per_server=2)
+
+    assert all(entry.startswith("start") for entry in first.log[:2])
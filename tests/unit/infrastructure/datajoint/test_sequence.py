@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import time
+from collections.abc import Iterator
+
+import pytest
+
+from link.infrastructure.sequence import prefetch
+
+
+def test_prefetching_yields_all_items_in_order() -> None:
+    with prefetch(iter(range(10)), depth=2) as items:
+        assert list(items) == list(range(10))
+
+
+def test_prefetching_reraises_exceptions() -> None:
+    def produce() -> Iterator[int]:
+        yield 1
+        raise RuntimeError("fetching failed")
+
+    with prefetch(produce(), depth=2) as items:
+        assert next(items) == 1
+        with pytest.raises(RuntimeError, match="fetching failed"):
+            next(items)
+
+
+def test_prefetching_is_bounded_by_depth() -> None:
+    produced: list[int] = []
+
+    def produce() -> Iterator[int]:
+        for item in range(10):
+            produced.append(item)
+            yield item
+
+    with prefetch(produce(), depth=2) as items:
+        assert next(items) == 0
+        time.sleep(0.2)
+        assert len(produced) <= 4
+
+
+def test_unconsumed_items_are_discarded_on_exit() -> None:
+    discarded: list[int] = []
+
+    with prefetch(iter(range(10)), depth=3, discard=discarded.append) as items:
+        first = next(items)
+
+    assert first == 0
+    assert discarded == list(range(1, len(discarded) + 1))
+    assert 1 <= len(discarded) <= 4
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import cast
+
+import numpy as np
+
+from link.adapters.identification import derive_identifier
+from link.infrastructure.sharding import LeaseHeartbeat, ShardLeases, group_by_shard, shard_of
+
+
+def test_shard_does_not_depend_on_order_of_attributes() -> None:
+    assert shard_of({"a": 1, "b": "x"}, 7) == shard_of({"b": "x", "a": 1}, 7)
+
+
+def test_shard_does_not_depend_on_numeric_type() -> None:
+    assert shard_of({"a": np.int64(12)}, 7) == shard_of({"a": 12}, 7) == shard_of({"a": 12.0}, 7)
+
+
+def test_shard_is_derived_from_identifier() -> None:
+    assert shard_of({"a": 1, "b": "x"}, 1000) == derive_identifier({"a": 1, "b": "x"}) % 1000 == 10
+
+
+def test_grouping_by_shard_assigns_each_key_to_exactly_one_shard() -> None:
+    primary_keys = [{"a": i} for i in range(100)]
+    groups = group_by_shard(primary_keys, 4)
+    assert set(groups) == {0, 1, 2, 3}
+    assert sorted(key["a"] for group in groups.values() for key in group) == list(range(100))
+    assert all(shard_of(key, 4) == shard for shard, group in groups.items() for key in group)
+
+
+class FakeLeases:
+    def __init__(self, renewals: int) -> None:
+        self.renewals = renewals
+        self.renewed = threading.Event()
+
+    def renew(self, shard: int) -> bool:
+        self.renewals -= 1
+        if self.renewals <= 0:
+            self.renewed.set()
+        return self.renewals > 0
+
+
+def test_heartbeat_renews_lease_until_it_is_lost() -> None:
+    leases = FakeLeases(renewals=3)
+    with LeaseHeartbeat(cast(ShardLeases, leases), 0, interval=0.001) as heartbeat:
+        assert leases.renewed.wait(timeout=5)
+    assert not heartbeat.is_held
+    assert leases.renewals == 0
+
+
+def test_heartbeat_keeps_lease_while_renewals_succeed() -> None:
+    leases = FakeLeases(renewals=1000000)
+    with LeaseHeartbeat(cast(ShardLeases, leases), 0, interval=0.001) as heartbeat:
+        time.sleep(0.01)
+        assert heartbeat.is_held
+    assert leases.renewals < 1000000
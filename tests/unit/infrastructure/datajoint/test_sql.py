@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+from typing import Any
+from uuid import UUID
+
+import numpy as np
+import pytest
+
+from link.infrastructure.sql import to_literal
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [
+        (5, "5"),
+        (np.int64(5), "5"),
+        (1.5, "1.5"),
+        (np.float32(1.5), "1.5"),
+        ("foo", "'foo'"),
+        ("it's", "'it\\'s'"),
+        ("back\\slash", "'back\\\\slash'"),
+        (b"\x00\xff", "X'00ff'"),
+        (UUID(int=255), "X'000000000000000000000000000000ff'"),
+    ],
+)
+def test_values_are_converted_to_literals(value: Any, expected: str) -> None:
+    assert to_literal(value) == expected